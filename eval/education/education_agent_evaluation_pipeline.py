@@ -1,4 +1,4 @@
-from fetch_and_parse_n8n_execution_log import fetch_and_parse_n8n_execution_log
+from n8n_analytics import fetch_and_parse_n8n_execution_log
 
 
 result = fetch_and_parse_n8n_execution_log(
@@ -0,0 +1,38 @@
+"""
+n8n execution-log analytics shared by the evaluation pipelines
+(eval/scheduler, eval/education).
+
+    execution_log : fetch raw logs, parse them (single pass / streaming)
+    records       : compact ExecutionRecord / ToolCall records
+    aggregate     : numpy aggregation across many executions
+
+Install it into the pipelines' environment with `pip install -e eval`
+(eval/pyproject.toml; `pip install -e "eval[stream]"` adds ijson for the
+incremental parsers).
+"""
+
+from .aggregate import CallTable, node_latency_percentiles, summarize, tokens_by_model
+from .execution_log import (
+    fetch_and_parse_n8n_execution_log,
+    fetch_n8n_execution_log,
+    parse_execution_record,
+    parse_execution_record_stream,
+    parse_n8n_execution_log,
+    parse_n8n_execution_log_stream,
+)
+from .records import ExecutionRecord, ToolCall
+
+__all__ = [
+    "CallTable",
+    "ExecutionRecord",
+    "ToolCall",
+    "fetch_and_parse_n8n_execution_log",
+    "fetch_n8n_execution_log",
+    "node_latency_percentiles",
+    "parse_execution_record",
+    "parse_execution_record_stream",
+    "parse_n8n_execution_log",
+    "parse_n8n_execution_log_stream",
+    "summarize",
+    "tokens_by_model",
+]
@@ -0,0 +1,117 @@
+"""
+Vectorized aggregation over many parsed executions. The calls of all
+records are laid out once as numpy columns (CallTable); per-node latency
+percentiles and per-model token totals are then computed for every node /
+model at once instead of looping over executions in Python.
+"""
+
+from typing import Dict, Iterable, List, Sequence
+
+import numpy as np
+
+from .records import ExecutionRecord
+
+DEFAULT_PERCENTILES = (50, 90, 95, 99)
+
+
+class CallTable:
+    """Columnar view of the calls and token usage of many executions."""
+
+    def __init__(self, records: Iterable[ExecutionRecord]):
+        records = list(records)
+        node_ids: Dict[str, int] = {}
+        model_ids: Dict[str, int] = {}
+        call_node, call_ms, call_execution = [], [], []
+        token_model, token_count = [], []
+        for i, record in enumerate(records):
+            for call in record.calls:
+                call_node.append(node_ids.setdefault(call.node, len(node_ids)))
+                call_ms.append(np.nan if call.execution_ms is None else call.execution_ms)
+                call_execution.append(i)
+            for model, tokens in record.tokens_by_model.items():
+                token_model.append(model_ids.setdefault(model, len(model_ids)))
+                token_count.append(tokens)
+
+        self.nodes: List[str] = list(node_ids)
+        self.models: List[str] = list(model_ids)
+        self.call_node = np.asarray(call_node, dtype=np.int32)
+        self.call_ms = np.asarray(call_ms, dtype=np.float64)
+        self.call_execution = np.asarray(call_execution, dtype=np.int32)
+        self.token_model = np.asarray(token_model, dtype=np.int32)
+        self.token_count = np.asarray(token_count, dtype=np.int64)
+        self.total_exec_ms = np.asarray([r.total_exec_ms for r in records], dtype=np.float64)
+        self.token_total = np.asarray([r.token_total for r in records], dtype=np.int64)
+
+
+def _grouped_percentiles(groups: np.ndarray, values: np.ndarray, n_groups: int,
+                         percentiles: Sequence[float]) -> np.ndarray:
+    """
+    Linear-interpolated percentiles of `values` per group id, for all groups
+    at once (same definition as np.percentile); shape (n_groups, len(percentiles)),
+    NaN for groups without values.
+    """
+    keep = ~np.isnan(values)
+    groups, values = groups[keep], values[keep]
+    order = np.lexsort((values, groups))
+    groups, values = groups[order], values[order]
+    counts = np.bincount(groups, minlength=n_groups)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+    q = np.asarray(percentiles, dtype=np.float64) / 100.0
+    position = (np.maximum(counts, 1) - 1)[:, None] * q[None, :]
+    low = np.floor(position).astype(np.int64)
+    high = np.ceil(position).astype(np.int64)
+    out = np.full((n_groups, len(q)), np.nan)
+    present = counts > 0
+    if values.size:
+        base = starts[:, None]
+        v_low = values[np.minimum(base + low, values.size - 1)]
+        v_high = values[np.minimum(base + high, values.size - 1)]
+        out[present] = (v_low + (v_high - v_low) * (position - low))[present]
+    return out
+
+
+def node_latency_percentiles(table: CallTable,
+                             percentiles: Sequence[float] = DEFAULT_PERCENTILES) -> Dict[str, Dict[str, float]]:
+    """node -> {"calls", "mean_ms", "p50_ms", ...} over every call of every execution."""
+    n = len(table.nodes)
+    if not n:
+        return {}
+    timed = ~np.isnan(table.call_ms)
+    calls = np.bincount(table.call_node, minlength=n)
+    timed_calls = np.bincount(table.call_node[timed], minlength=n)
+    sums = np.bincount(table.call_node[timed], weights=table.call_ms[timed], minlength=n)
+    means = np.divide(sums, timed_calls, out=np.full(n, np.nan), where=timed_calls > 0)
+    values = _grouped_percentiles(table.call_node, table.call_ms, n, percentiles)
+    return {
+        node: {
+            "calls": int(calls[i]),
+            "mean_ms": float(means[i]),
+            **{f"p{p:g}_ms": float(values[i, j]) for j, p in enumerate(percentiles)},
+        }
+        for i, node in enumerate(table.nodes)
+    }
+
+
+def tokens_by_model(table: CallTable) -> Dict[str, int]:
+    """Total tokens per language model over all executions."""
+    totals = np.bincount(table.token_model, weights=table.token_count, minlength=len(table.models))
+    return {model: int(totals[i]) for i, model in enumerate(table.models)}
+
+
+def summarize(records: Iterable[ExecutionRecord],
+              percentiles: Sequence[float] = DEFAULT_PERCENTILES) -> Dict[str, object]:
+    """Cross-execution summary: wall clock and token percentiles, per-node latency, tokens per model."""
+    table = CallTable(records)
+    executions = table.total_exec_ms.size
+    summary: Dict[str, object] = {"executions": executions}
+    if executions:
+        exec_ms = np.percentile(table.total_exec_ms, percentiles)
+        tokens = np.percentile(table.token_total, percentiles)
+        summary["total_exec_ms"] = {"mean": float(table.total_exec_ms.mean()),
+                                    **{f"p{p:g}": float(v) for p, v in zip(percentiles, exec_ms)}}
+        summary["token_total"] = {"sum": int(table.token_total.sum()), "mean": float(table.token_total.mean()),
+                                  **{f"p{p:g}": float(v) for p, v in zip(percentiles, tokens)}}
+    summary["node_latency"] = node_latency_percentiles(table, percentiles)
+    summary["tokens_by_model"] = tokens_by_model(table)
+    return summary
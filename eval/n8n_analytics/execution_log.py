@@ -0,0 +1,286 @@
+"""
+Fetching and parsing n8n execution logs (shared by the scheduler and
+education pipelines).
+"""
+
+import requests
+from datetime import datetime
+from typing import Dict, Any, IO, List, Optional, Tuple
+
+from .records import ExecutionRecord, ToolCall
+
+try:
+    import ijson  # optional: incremental JSON decoding of large logs
+except ImportError:
+    ijson = None
+
+# Utility helpers
+def _safe_get(d: dict, path: List[str]):
+    """
+    Walk a list of keys/indices and return value or None.
+    """
+    cur = d
+    for p in path:
+        try:
+            cur = cur[p]
+        except (KeyError, IndexError, TypeError):
+            return None
+    return cur
+
+
+def _call_input(block: Dict[str, Any]):
+    raw_in_block = block.get("inputOverride") or block.get("data", {})
+
+    # Check for specific AI node input structures first
+    if "ai_tool" in raw_in_block:
+        # Specifically get the 'query' part for tools
+        return _safe_get(raw_in_block, ["ai_tool", 0, 0, "json", "query"])
+    if "ai_languageModel" in raw_in_block:
+        # Specifically get the 'messages' for language models
+        return _safe_get(raw_in_block, ["ai_languageModel", 0, 0, "json", "messages"])
+    if "ai_vectorStore" in raw_in_block:
+        # Prioritize 'query', fallback to the whole json if 'query' not found
+        inp = _safe_get(raw_in_block, ["ai_vectorStore", 0, 0, "json", "query"])
+        if inp is None:
+            inp = _safe_get(raw_in_block, ["ai_vectorStore", 0, 0, "json"])
+        return inp
+    # Fallback for generic nodes (like Webhook trigger)
+    if "main" in raw_in_block:
+        maybe = _safe_get(raw_in_block, ["main", 0, 0, "json"])
+        if isinstance(maybe, dict):
+            # Prefer 'body' if it exists (common for webhooks), else take the whole json
+            return maybe.get("body", maybe)
+        return None
+    # Broadest fallback: use the raw block if it's not empty and none of the above matched
+    return raw_in_block or None
+
+
+def _call_output(block: Dict[str, Any]):
+    data_block = block.get("data", {})
+    if "ai_tool" in data_block:
+        # Response is usually directly under json
+        return _safe_get(data_block, ["ai_tool", 0, 0, "json", "response"])
+    if "ai_vectorStore" in data_block:
+        return _safe_get(data_block, ["ai_vectorStore", 0, 0, "json", "response"])
+    if "ai_languageModel" in data_block:
+        # Prioritize the generated text, fallback to the whole response object
+        maybe_text = _safe_get(data_block, ["ai_languageModel", 0, 0, "json", "response", "generations", 0, 0, "text"])
+        if maybe_text is not None:
+            return maybe_text
+        return _safe_get(data_block, ["ai_languageModel", 0, 0, "json", "response"])
+    if "main" in data_block:
+        # For generic nodes, output might just be the json itself
+        maybe = _safe_get(data_block, ["main", 0, 0, "json"])
+        if isinstance(maybe, dict):
+            return maybe
+    return None
+
+
+def _model_name(name: str, block: Dict[str, Any]) -> str:
+    """Model a language-model node ran with (falls back to the node name)."""
+    options = _safe_get(block, ["inputOverride", "ai_languageModel", 0, 0, "json", "options"]) or {}
+    return options.get("model") or options.get("model_name") or options.get("modelName") or name
+
+
+class _LogMetrics:
+    """
+    Accumulates the metrics of one execution while its runData is visited
+    node by node, so every block is looked at exactly once and a streamed
+    log never has to be held in memory as a whole.
+    """
+
+    def __init__(self):
+        self.node_times: List[Tuple[str, int]] = []
+        self.main_json: Dict[str, Any] = {}          # node -> first block's main output json
+        self.calls: List[ToolCall] = []
+        self.tool_exec_ms: Dict[str, float] = {}
+        self.token_total = 0
+        self.tokens_by_model: Dict[str, int] = {}
+
+    def add_node(self, name: str, blocks: List[Dict[str, Any]]) -> None:
+        blocks = blocks or []
+        if blocks:
+            self.main_json[name] = _safe_get(blocks[0], ["data", "main", 0, 0, "json"])
+        is_chat_model = name.startswith("OpenAI Chat Model")
+        calls = 0
+        total_exec = 0
+        for block in blocks:
+            start_time = _safe_get(block, ["startTime"])
+            exec_time = _safe_get(block, ["executionTime"])
+            if isinstance(start_time, int):
+                self.node_times.append((name, start_time))
+            if isinstance(exec_time, (int, float)):
+                total_exec = exec_time            # keep last exec-time
+
+            tokens = _safe_get(block, ["data", "ai_languageModel", 0, 0, "json", "tokenUsage", "totalTokens"])
+            if isinstance(tokens, int):
+                model = _model_name(name, block)
+                self.tokens_by_model[model] = self.tokens_by_model.get(model, 0) + tokens
+                # Total OpenAI tokens ── sum every call in every "OpenAI Chat Model" node
+                if is_chat_model:
+                    self.token_total += tokens
+
+            inp, out = _call_input(block), _call_output(block)
+            # Only record if we found meaningful input OR output
+            if inp is not None or out is not None:
+                self.calls.append(ToolCall(name, start_time, exec_time, inp, out))
+                calls += 1
+        if calls:
+            self.tool_exec_ms[name] = total_exec
+
+    def record(self, workflow_name, started_at: str, stopped_at: str,
+               execution_id: Optional[str] = None) -> ExecutionRecord:
+        # Node order (with duplicates if a tool is called multiple times), by actual call time
+        self.node_times.sort(key=lambda x: x[1])
+        tool_order = [n for n, _ in self.node_times]
+
+        # Final output: the last node whose first block returned an `output`
+        final_out = None
+        for name in reversed(tool_order):
+            maybe = self.main_json.get(name)
+            if isinstance(maybe, dict) and "output" in maybe:
+                final_out = maybe["output"]
+                break
+
+        # Input query
+        input_query = None
+        for node in tool_order:
+            jq = self.main_json.get(node)
+            if isinstance(jq, dict):
+                for key in ("chatInput", "query"):
+                    if key in jq and isinstance(jq[key], str):
+                        input_query = jq[key]
+                        break
+                if input_query:
+                    break
+                body_prompt = _safe_get(jq, ["body", "prompt"])
+                if isinstance(body_prompt, str):
+                    input_query = body_prompt
+                    break
+
+        # Wall-clock duration
+        t0 = datetime.fromisoformat(started_at.replace("Z", "+00:00"))
+        t1 = datetime.fromisoformat(stopped_at.replace("Z", "+00:00"))
+
+        return ExecutionRecord(
+            execution_id=execution_id,
+            workflow_name=workflow_name,
+            final_out=final_out,
+            input_query=input_query,
+            total_exec_ms=(t1 - t0).total_seconds() * 1000,
+            token_total=self.token_total,
+            tokens_by_model=self.tokens_by_model,
+            tool_order=tool_order,
+            tool_exec_ms=self.tool_exec_ms,
+            calls=self.calls,
+        )
+
+
+# Fetch
+def fetch_n8n_execution_log(execution_id: int, webhook_url: str, timeout: int = 10,
+                            session: Optional[requests.Session] = None) -> Dict[str, Any]:
+    """
+    Download the raw n8n execution log from the execution webhook
+    (?executionId=<id>). Raises requests exceptions on failure.
+    """
+    resp = (session or requests).get(webhook_url, params={"executionId": execution_id}, timeout=timeout)
+    resp.raise_for_status()
+    return resp.json()
+
+
+# Main parser
+def fetch_and_parse_n8n_execution_log(execution_id: int, webhook_url: str, timeout: int = 10,
+                                      keep_raw_log: bool = True) -> Dict[str, Any]:
+    """
+    Download a detailed n8n execution log, parse key metrics, and return them.
+    See parse_n8n_execution_log() for the returned keys. Without
+    `keep_raw_log` the response body is decoded incrementally and
+    "raw_log" is None.
+    """
+    if keep_raw_log:
+        return parse_n8n_execution_log(fetch_n8n_execution_log(execution_id, webhook_url, timeout))
+    with requests.get(webhook_url, params={"executionId": execution_id}, timeout=timeout, stream=True) as resp:
+        resp.raise_for_status()
+        resp.raw.decode_content = True
+        return parse_n8n_execution_log_stream(resp.raw)
+
+
+def parse_execution_record(log: Dict[str, Any], execution_id: Optional[str] = None) -> ExecutionRecord:
+    """Parse a raw n8n execution log into an ExecutionRecord in one pass over runData."""
+    metrics = _LogMetrics()
+    for name, blocks in log["data"]["resultData"]["runData"].items():
+        metrics.add_node(name, blocks)
+    # Workflow name (if present)
+    workflow_name = _safe_get(log, ["workflowData", "name"]) or log.get("workflowId")
+    return metrics.record(workflow_name, log["startedAt"], log["stoppedAt"],
+                          execution_id if execution_id is not None else log.get("id"))
+
+
+_STREAM_FIELDS = ("id", "workflowData.name", "workflowId", "startedAt", "stoppedAt")
+_RUN_DATA = "data.resultData.runData"
+
+
+def parse_execution_record_stream(stream: IO[bytes], execution_id: Optional[str] = None) -> ExecutionRecord:
+    """
+    Same as parse_execution_record(), decoded incrementally from a file-like
+    object: only one runData node is materialised at a time. Falls back to
+    json.load when ijson is missing.
+    """
+    if ijson is None:
+        import json
+        return parse_execution_record(json.load(stream), execution_id)
+
+    metrics = _LogMetrics()
+    fields: Dict[str, Any] = {}
+    node, builder, depth = None, None, 0
+    for prefix, event, value in ijson.parse(stream, use_float=True):
+        if builder is not None:
+            builder.event(event, value)
+            if event in ("start_map", "start_array"):
+                depth += 1
+            elif event in ("end_map", "end_array"):
+                depth -= 1
+            if depth == 0:
+                metrics.add_node(node, builder.value)
+                builder = None
+        elif event == "map_key" and prefix == _RUN_DATA:
+            node, builder, depth = value, ijson.ObjectBuilder(), 0
+        elif prefix in _STREAM_FIELDS and event in ("string", "number"):
+            fields[prefix] = value
+    workflow_name = fields.get("workflowData.name") or fields.get("workflowId")
+    return metrics.record(workflow_name, fields["startedAt"], fields["stoppedAt"],
+                          execution_id if execution_id is not None else fields.get("id"))
+
+
+def parse_n8n_execution_log(log: Dict[str, Any], keep_raw_log: bool = True) -> Dict[str, Any]:
+    """
+    Parse key metrics out of a raw n8n execution log.
+
+    Parameters
+    ----------
+    log : dict
+        Execution log as returned by fetch_n8n_execution_log().
+    keep_raw_log : bool
+        Include the log itself as "raw_log" (None otherwise).
+
+    Returns
+    -------
+    dict : {
+        "workflow_name"      : str | None,
+        "raw_log"            : full JSON | None,
+        "final_out"          : str | None,
+        "token_total"        : int,
+        "input_query"        : str | None,
+        "total_exec_ms"      : float,
+        "tool_order"         : list[str],
+        "tool_exec_ms"       : dict[node, ms],
+        "tool_calls"         : dict[node, list[call_info]],
+        "tool_call_counts"   : dict[node, int]
+    }
+    """
+    return parse_execution_record(log).to_dict(log if keep_raw_log else None)
+
+
+def parse_n8n_execution_log_stream(stream: IO[bytes]) -> Dict[str, Any]:
+    """parse_n8n_execution_log() for a file-like object, without "raw_log"."""
+    return parse_execution_record_stream(stream).to_dict()
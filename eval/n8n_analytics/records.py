@@ -0,0 +1,71 @@
+"""
+Typed, compact records of parsed n8n executions. Thousands of executions
+with hundreds of calls each stay cheap to keep around: records use
+__slots__ and hold only what the metrics need (no raw log).
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+
+@dataclass(slots=True, frozen=True)
+class ToolCall:
+    """One run of one node (tool, language model, webhook, ...)."""
+    node: str
+    start_time: Optional[int]          # epoch ms
+    execution_ms: Optional[float]
+    input: Any = None
+    output: Any = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The per-call dict of fetch_and_parse_n8n_execution_log()["tool_calls"]."""
+        return {
+            "startTime": self.start_time,
+            "executionTime": self.execution_ms,
+            "input": self.input,
+            "output": self.output,
+        }
+
+
+@dataclass(slots=True)
+class ExecutionRecord:
+    """Metrics of one n8n execution."""
+    execution_id: Optional[str]
+    workflow_name: Optional[str]
+    final_out: Optional[str]
+    input_query: Optional[str]
+    total_exec_ms: float
+    token_total: int                   # "OpenAI Chat Model*" nodes, as reported so far
+    tokens_by_model: Dict[str, int] = field(default_factory=dict)   # every language-model node
+    tool_order: List[str] = field(default_factory=list)
+    tool_exec_ms: Dict[str, float] = field(default_factory=dict)
+    calls: List[ToolCall] = field(default_factory=list)
+
+    @property
+    def tool_calls(self) -> Dict[str, List[Dict[str, Any]]]:
+        grouped: Dict[str, List[Dict[str, Any]]] = {}
+        for call in self.calls:
+            grouped.setdefault(call.node, []).append(call.to_dict())
+        return grouped
+
+    @property
+    def tool_call_counts(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for call in self.calls:
+            counts[call.node] = counts.get(call.node, 0) + 1
+        return counts
+
+    def to_dict(self, raw_log: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """The dict returned by fetch_and_parse_n8n_execution_log()."""
+        return {
+            "workflow_name": self.workflow_name,
+            "raw_log": raw_log,
+            "final_out": self.final_out,
+            "token_total": self.token_total,
+            "input_query": self.input_query,
+            "total_exec_ms": self.total_exec_ms,
+            "tool_order": self.tool_order,
+            "tool_exec_ms": self.tool_exec_ms,
+            "tool_calls": self.tool_calls,
+            "tool_call_counts": self.tool_call_counts,
+        }
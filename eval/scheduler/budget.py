@@ -0,0 +1,98 @@
+"""
+Evaluation budgets
+Per-task and per-run limits on wall clock, tokens (token_total of the n8n
+execution) and FHIR requests (the harness's own, TaskInterface.fhir.total),
+so large sweeps stay bounded and runs of different agents stay comparable.
+
+- The agent request gets the wall clock left of the task and run budgets
+  as a hard deadline and is aborted when it runs out.
+- Tokens and FHIR requests are only known once a task has finished; a task
+  over its budget is failed with a "Budget exceeded" message.
+- Once a run budget is spent no further tasks are started.
+"""
+
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional
+
+BUDGET_EXCEEDED = "Budget exceeded"
+
+
+@dataclass
+class Limits:
+    seconds: Optional[float] = None
+    tokens: Optional[int] = None
+    fhir_requests: Optional[int] = None
+
+    def exceeded(self, seconds: float, tokens: Optional[int], fhir_requests: int) -> List[str]:
+        """Human-readable list of the limits that were overrun (empty if none)."""
+        reasons = []
+        if self.seconds is not None and seconds > self.seconds:
+            reasons.append(f"wall clock {seconds:.1f}s > {self.seconds:g}s")
+        if self.tokens is not None and tokens is not None and tokens > self.tokens:
+            reasons.append(f"tokens {tokens} > {self.tokens}")
+        if self.fhir_requests is not None and fhir_requests > self.fhir_requests:
+            reasons.append(f"FHIR requests {fhir_requests} > {self.fhir_requests}")
+        return reasons
+
+
+class Budget:
+    """Task and run limits plus what the run has spent so far (thread-safe)."""
+
+    def __init__(self, task: Limits, run: Limits):
+        self.task = task
+        self.run = run
+        self.started = time.monotonic()
+        self.tokens = 0
+        self.fhir_requests = 0
+        self.tasks = 0
+        self.over_budget: List[Dict[str, Any]] = []
+        self.stopped: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def remaining_seconds(self, task_started: float) -> Optional[float]:
+        """Wall clock a task started at `task_started` (time.monotonic()) may still use; None if unlimited."""
+        remaining = []
+        if self.task.seconds is not None:
+            remaining.append(self.task.seconds - (time.monotonic() - task_started))
+        if self.run.seconds is not None:
+            remaining.append(self.run.seconds - self.elapsed())
+        return max(min(remaining), 0.0) if remaining else None
+
+    def exhausted(self) -> Optional[str]:
+        """Why no further task may start, or None while the run budget lasts."""
+        with self._lock:
+            if self.stopped is None:
+                reasons = self.run.exceeded(self.elapsed(), self.tokens, self.fhir_requests)
+                if reasons:
+                    self.stopped = "; ".join(reasons)
+            return self.stopped
+
+    def charge(self, task_id: str, trial: int, seconds: float, tokens: Optional[int], fhir_requests: int) -> List[str]:
+        """Add a finished task to the run totals; returns the task limits it overran."""
+        reasons = self.task.exceeded(seconds, tokens, fhir_requests)
+        with self._lock:
+            self.tasks += 1
+            self.tokens += tokens or 0
+            self.fhir_requests += fhir_requests
+            if reasons:
+                self.over_budget.append({"task_id": task_id, "trial": trial, "reasons": reasons})
+        return reasons
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "limits": {"task": asdict(self.task), "run": asdict(self.run)},
+                "spent": {
+                    "seconds": self.elapsed(),
+                    "tokens": self.tokens,
+                    "fhir_requests": self.fhir_requests,
+                    "tasks": self.tasks,
+                },
+                "over_budget": list(self.over_budget),
+                "stopped": self.stopped,
+            }
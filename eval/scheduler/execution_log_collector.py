@@ -0,0 +1,339 @@
+"""
+n8n execution log collector
+Fetches many n8n execution logs concurrently from the execution webhook and
+keeps the raw logs in a local content-addressed cache, so post-hoc analysis
+never has to hit n8n twice for the same execution:
+
+    <cache_dir>/objects/<sha[:2]>/<sha>.json.gz   raw log, gzip, keyed by content hash
+    <cache_dir>/index/<execution id>             sha256 of the execution's log
+
+A log is streamed from the response into the cache and read back from there
+as a stream (LogCache.open), so a large trace is never held in memory whole.
+Requests go through a shared token bucket (`rate` per second) and are retried
+with exponential backoff on connection errors, timeouts, 429 and 5xx
+(honouring Retry-After). Executions that have not finished yet are not
+cached. Ids already in the index are skipped, so re-running a collection only
+fills the gaps left by earlier failures.
+
+Command line (collects the execution ids of saved task results):
+    python execution_log_collector.py --results_dir experiments/output
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import IO, Any, Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import quote
+
+import requests  # type: ignore
+from requests.adapters import HTTPAdapter
+
+try:
+    import ijson  # optional: incremental JSON decoding of large logs
+except ImportError:
+    ijson = None
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+JSON_ERRORS: Tuple[type, ...] = (ValueError,) + ((ijson.JSONError,) if ijson else ())
+
+
+class IncompleteLogError(Exception):
+    """The execution has not finished yet; its log must not be cached."""
+
+
+def execution_finished(log: Dict[str, Any]) -> bool:
+    """Whether an execution log (or n8n API execution) describes a finished run."""
+    return bool(log.get("stoppedAt")) and log.get("status") not in ("new", "running", "waiting")
+
+
+def stream_finished(stream: IO[bytes]) -> bool:
+    """execution_finished() for a raw log in a file-like object, decoded incrementally."""
+    if ijson is None:
+        return execution_finished(json.load(stream))
+    fields: Dict[str, Any] = {}
+    for prefix, event, value in ijson.parse(stream):
+        if prefix in ("stoppedAt", "status") and event in ("string", "null"):
+            fields[prefix] = value
+            if len(fields) == 2:
+                break
+    return execution_finished(fields)
+
+
+class LogCache:
+    """
+    Content-addressed store of raw execution logs. The index is one small
+    file per execution id, written atomically, so any number of threads and
+    processes can share a cache directory without rewriting (or racing on) a
+    common index.
+    """
+
+    def __init__(self, cache_dir: str = ".execution_logs"):
+        self.cache_dir = cache_dir
+        self.index_dir = os.path.join(cache_dir, "index")
+        os.makedirs(os.path.join(cache_dir, "objects"), exist_ok=True)
+        os.makedirs(self.index_dir, exist_ok=True)
+        # caches written before the per-id index kept a single index.json
+        try:
+            with open(os.path.join(cache_dir, "index.json")) as f:
+                self._legacy: Dict[str, str] = json.load(f)
+        except (OSError, ValueError):
+            self._legacy = {}
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.cache_dir, "objects", digest[:2], f"{digest}.json.gz")
+
+    def _index_path(self, execution_id) -> str:
+        return os.path.join(self.index_dir, quote(str(execution_id), safe=""))
+
+    def digest(self, execution_id) -> Optional[str]:
+        """sha256 of the cached log of an execution (None if not cached)."""
+        try:
+            with open(self._index_path(execution_id)) as f:
+                digest = f.read().strip()
+        except FileNotFoundError:
+            digest = self._legacy.get(str(execution_id))
+        return digest if digest and os.path.exists(self._path(digest)) else None
+
+    def __contains__(self, execution_id) -> bool:
+        return self.digest(execution_id) is not None
+
+    def open(self, execution_id) -> Optional[IO[bytes]]:
+        """The cached raw log as a binary stream (None if not cached)."""
+        digest = self.digest(execution_id)
+        return gzip.open(self._path(digest), "rb") if digest is not None else None
+
+    def get(self, execution_id) -> Optional[Dict[str, Any]]:
+        f = self.open(execution_id)
+        if f is None:
+            return None
+        with f:
+            return json.load(f)
+
+    @staticmethod
+    def _write_atomic(path: str, data: bytes, compress: bool = False) -> None:
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with (gzip.open(tmp, "wb") if compress else open(tmp, "wb")) as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def put(self, execution_id, log: Dict[str, Any]) -> str:
+        data = json.dumps(log, sort_keys=True, separators=(",", ":")).encode()
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._write_atomic(path, data, compress=True)
+        self._write_atomic(self._index_path(execution_id), digest.encode())
+        return digest
+
+    def put_stream(self, execution_id, chunks: Iterable[bytes],
+                   check: Optional[Callable[[IO[bytes]], None]] = None) -> str:
+        """
+        put() for a log arriving as raw JSON chunks, spooled to disk as it
+        comes. `check` gets the spooled log and may raise to reject it, in
+        which case nothing is cached.
+        """
+        digest = hashlib.sha256()
+        tmp = os.path.join(self.cache_dir, "objects", f"{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            with gzip.open(tmp, "wb") as f:
+                for chunk in chunks:
+                    digest.update(chunk)
+                    f.write(chunk)
+            if check is not None:
+                with gzip.open(tmp, "rb") as f:
+                    check(f)
+            path = self._path(digest.hexdigest())
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        self._write_atomic(self._index_path(execution_id), digest.hexdigest().encode())
+        return digest.hexdigest()
+
+
+class RateLimiter:
+    """Token bucket shared by all fetch threads."""
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = rate
+        self.capacity = burst or max(1, int(rate))
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+@dataclass
+class CollectReport:
+    fetched: List[str] = field(default_factory=list)
+    cached: List[str] = field(default_factory=list)
+    failed: Dict[str, str] = field(default_factory=dict)   # execution id -> last error
+    seconds: float = 0.0
+
+
+class ExecutionLogCollector:
+    def __init__(self,
+                 webhook_url: str,
+                 cache_dir: str = ".execution_logs",
+                 workers: int = 8,
+                 rate: float = 5.0,
+                 retries: int = 4,
+                 backoff: float = 0.5,
+                 timeout: float = 30):
+        self.webhook_url = webhook_url
+        self.cache = LogCache(cache_dir)
+        self.workers = workers
+        self.limiter = RateLimiter(rate)
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=max(workers, 1))
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def download(self, execution_id) -> str:
+        """
+        Stream one log into the cache with rate limiting and retries (no
+        cache lookup); returns its digest.
+        """
+        def check(f: IO[bytes]) -> None:
+            if not stream_finished(f):
+                raise IncompleteLogError(f"execution {execution_id} has not finished")
+
+        for attempt in range(self.retries + 1):
+            self.limiter.acquire()
+            delay = self.backoff * 2 ** attempt * (1 + random.random() / 2)
+            try:
+                with self.session.get(self.webhook_url, params={"executionId": execution_id},
+                                      timeout=self.timeout, stream=True) as response:
+                    response.raise_for_status()
+                    return self.cache.put_stream(execution_id, response.iter_content(64 * 1024), check)
+            except requests.HTTPError as e:
+                status = e.response.status_code if e.response is not None else None
+                if status not in RETRY_STATUSES or attempt == self.retries:
+                    raise
+                retry_after = e.response.headers.get("Retry-After", "")
+                if retry_after.isdigit():
+                    delay = max(delay, float(retry_after))
+            except (requests.ConnectionError, requests.Timeout, IncompleteLogError) + JSON_ERRORS:
+                if attempt == self.retries:
+                    raise
+            logger.debug(f"Retrying execution log {execution_id} in {delay:.1f}s (attempt {attempt + 1})")
+            time.sleep(delay)
+        raise AssertionError("unreachable")
+
+    def open(self, execution_id) -> IO[bytes]:
+        """Raw log as a binary stream from the cache, downloading it first if needed."""
+        f = self.cache.open(execution_id)
+        if f is None:
+            self.download(execution_id)
+            f = self.cache.open(execution_id)
+        return f
+
+    def get(self, execution_id) -> Dict[str, Any]:
+        """Raw log from the cache, downloading it first if needed."""
+        with self.open(execution_id) as f:
+            return json.load(f)
+
+    def collect(self, execution_ids: Iterable) -> CollectReport:
+        """Make sure every execution's log is cached; returns what happened per id."""
+        start = time.perf_counter()
+        report = CollectReport()
+        pending = []
+        for execution_id in dict.fromkeys(str(i) for i in execution_ids if i is not None):
+            (report.cached if execution_id in self.cache else pending).append(execution_id)
+
+        def work(execution_id: str) -> None:
+            try:
+                self.download(execution_id)
+                report.fetched.append(execution_id)
+            except Exception as e:
+                report.failed[execution_id] = f"{type(e).__name__}: {e}"
+                logger.warning(f"Failed to fetch execution log {execution_id}: {e}")
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            list(pool.map(work, pending))
+        report.seconds = time.perf_counter() - start
+        logger.info(f"Execution logs: {len(report.fetched)} fetched, {len(report.cached)} cached, "
+                    f"{len(report.failed)} failed in {report.seconds:.1f}s")
+        return report
+
+
+_shared: Dict[Tuple[str, str], ExecutionLogCollector] = {}
+_shared_lock = threading.Lock()
+
+
+def shared_collector(webhook_url: str, cache_dir: str = ".execution_logs", **kwargs) -> ExecutionLogCollector:
+    """
+    One collector per (webhook, cache dir) and process, shared by every task,
+    so concurrent workers go through one rate limiter and connection pool.
+    """
+    key = (webhook_url, os.path.abspath(cache_dir))
+    with _shared_lock:
+        collector = _shared.get(key)
+        if collector is None:
+            collector = _shared[key] = ExecutionLogCollector(webhook_url, cache_dir, **kwargs)
+        return collector
+
+
+def execution_ids_from_results(results_dir: str) -> List[str]:
+    """Execution ids recorded in the *_task_result.json files of a run."""
+    ids = []
+    for file in sorted(os.listdir(results_dir)):
+        if not file.endswith("_task_result.json"):
+            continue
+        with open(os.path.join(results_dir, file)) as f:
+            execution_id = (json.load(f).get("execution_result") or {}).get("execution_id")
+        if execution_id:
+            ids.append(str(execution_id))
+    return ids
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv  # type: ignore
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Fetch and cache n8n execution logs")
+    parser.add_argument("--results_dir", type=str, default=None, help="Collect the execution ids of these task results")
+    parser.add_argument("--ids", type=str, nargs="*", default=[], help="Execution ids to collect")
+    parser.add_argument("--cache_dir", type=str, default=os.getenv("N8N_LOG_CACHE_DIR", ".execution_logs"))
+    parser.add_argument("--webhook_url", type=str, default=os.getenv("N8N_EXECUTION_URL"))
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=5.0, help="Max requests per second")
+    parser.add_argument("--retries", type=int, default=4)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    ids = list(args.ids) + (execution_ids_from_results(args.results_dir) if args.results_dir else [])
+    collector = ExecutionLogCollector(args.webhook_url, args.cache_dir, workers=args.workers,
+                                      rate=args.rate, retries=args.retries)
+    report = collector.collect(ids)
+    for execution_id, error in report.failed.items():
+        print(f"{execution_id}: {error}")
+    print(f"{len(report.fetched)} fetched, {len(report.cached)} already cached, {len(report.failed)} failed")
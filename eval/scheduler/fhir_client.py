@@ -0,0 +1,103 @@
+"""
+Pooled FHIR client
+All FHIR traffic of the evaluation harness (fixture setup, resets, oracle
+queries) goes through FHIRClient: one keep-alive requests.Session per process
+with a sized connection pool, urllib3 retries for transient failures, default
+timeouts and headers, and per-client request counters so each task can report
+how many FHIR calls it made.
+
+Settings (environment):
+  FHIR_POOL_MAXSIZE      connections kept per host (default 32)
+  FHIR_RETRIES           retries on connection errors / 502-504 (default 3)
+  FHIR_RETRY_BACKOFF     urllib3 backoff factor in seconds (default 0.2)
+  FHIR_CONNECT_TIMEOUT   connect timeout in seconds (default 5)
+  FHIR_TIMEOUT           read timeout in seconds (default 60)
+"""
+
+import os
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, Optional
+
+import requests  # type: ignore
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_HEADERS = {
+    "Content-Type": "application/fhir+json",
+    "Accept": "application/fhir+json",
+}
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def shared_session() -> requests.Session:
+    """The process-wide pooled session (created on first use)."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            retry = Retry(
+                total=int(os.getenv("FHIR_RETRIES", 3)),
+                backoff_factor=float(os.getenv("FHIR_RETRY_BACKOFF", 0.2)),
+                status_forcelist=(502, 503, 504),
+                # POST creates resources, so only connection errors are retried for it
+                allowed_methods=frozenset({"GET", "HEAD", "PUT", "DELETE", "OPTIONS"}),
+                raise_on_status=False,
+            )
+            maxsize = int(os.getenv("FHIR_POOL_MAXSIZE", 32))
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=maxsize, max_retries=retry)
+            session = requests.Session()
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+        return _session
+
+
+class FHIRClient:
+    """
+    Thin wrapper around the shared session bound to one FHIR base URL.
+    Accepts absolute URLs or paths relative to the base URL and keeps
+    request counts per method (`counts`) and in total (`total`).
+    """
+
+    def __init__(self, base_url: str, headers: Optional[Dict[str, str]] = None,
+                 timeout=None, session: Optional[requests.Session] = None):
+        self.base_url = base_url.rstrip("/")
+        self.headers = headers or DEFAULT_HEADERS
+        self.timeout = timeout or (float(os.getenv("FHIR_CONNECT_TIMEOUT", 5)),
+                                   float(os.getenv("FHIR_TIMEOUT", 60)))
+        self.session = session or shared_session()
+        self.counts: Counter = Counter()
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+    def request(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        if not url.startswith(("http://", "https://")):
+            url = f"{self.base_url}/{url.lstrip('/')}"
+        kwargs["headers"] = {**self.headers, **(kwargs.get("headers") or {})}
+        kwargs.setdefault("timeout", self.timeout)
+        start = time.perf_counter()
+        try:
+            return self.session.request(method, url, **kwargs)
+        finally:
+            with self._lock:
+                self.counts[method.upper()] += 1
+                self.seconds += time.perf_counter() - start
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def put(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.request("PUT", url, **kwargs)
+
+    def delete(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.request("DELETE", url, **kwargs)
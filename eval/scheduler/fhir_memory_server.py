@@ -0,0 +1,1054 @@
+"""
+In-memory FHIR server
+A lightweight stand-in for the Dockerized HAPI server, implementing the
+subset of FHIR R4 REST the evaluation tasks (and the agents) use:
+
+- CRUD: read, vread, create, update-as-create (PUT), delete (409 while still
+  referenced, unless X-Cascade: delete / _cascade=delete), conditional delete
+- search: token, string, reference and date parameters with prefixes
+  (eq/ne/gt/lt/ge/le/sa/eb), comma-OR and repeated-AND values, modifiers
+  (:exact, :contains, :not, :missing, :<Type>), chained parameters
+  (schedule.actor.family, schedule.actor:Practitioner=...), _id,
+  _lastUpdated, _sort, _count/_offset paging, _summary=count, _elements,
+  _include and _revinclude (incl. :iterate and *)
+- transaction / batch Bundles (urn:uuid references, all-or-nothing
+  transactions), system _history, $expunge, metadata
+
+Token and reference parameters are indexed on write, so searches only scan
+the candidate set. Referential integrity is enforced on write like HAPI.
+There is no profile validation; the only repair HAPI's lenient parser makes
+that is mirrored is wrapping a single object where R4 expects a list, for the
+elements in _LIST_ELEMENTS.
+
+Use it in-process (no sockets) through the shared FHIR session:
+    from fhir_memory_server import install
+    install("http://fhir.local/fhir")
+or as a standalone HTTP server the agents can reach:
+    python fhir_memory_server.py --port 7070      # -> http://localhost:7070/fhir
+"""
+
+import argparse
+import copy
+import io
+import itertools
+import json
+import re
+import threading
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+import requests  # type: ignore
+from requests.adapters import BaseAdapter
+
+DEFAULT_PAGE_SIZE = 20      # HAPI defaults
+MAX_PAGE_SIZE = 200
+
+# -- Search parameter registry ----------------------------------------------
+# name -> (type, paths[, target type for reference params])
+_NAME = {
+    "name": ("string", ["name"]),
+    "family": ("string", ["name.family"]),
+    "given": ("string", ["name.given"]),
+    "address": ("string", ["address"]),
+    "address-city": ("string", ["address.city"]),
+    "address-state": ("string", ["address.state"]),
+    "address-postalcode": ("string", ["address.postalCode"]),
+    "telecom": ("token", ["telecom"]),
+    "phone": ("token", ["telecom"]),
+    "email": ("token", ["telecom"]),
+    "identifier": ("token", ["identifier"]),
+    "gender": ("token", ["gender"]),
+}
+_SUBJECT = {
+    "subject": ("reference", ["subject"]),
+    "patient": ("reference", ["subject"], "Patient"),
+}
+
+SEARCH_PARAMS: Dict[str, Dict[str, tuple]] = {
+    "Patient": {**_NAME, "birthdate": ("date", ["birthDate"]), "active": ("token", ["active"]),
+                "general-practitioner": ("reference", ["generalPractitioner"])},
+    "Practitioner": {**_NAME, "communication": ("token", ["communication"]),
+                     "active": ("token", ["active"])},
+    "RelatedPerson": {**_NAME, "patient": ("reference", ["patient"]),
+                      "relationship": ("token", ["relationship"]),
+                      "birthdate": ("date", ["birthDate"])},
+    "Organization": {"name": ("string", ["name", "alias"]), "identifier": ("token", ["identifier"]),
+                     "type": ("token", ["type"]), "address-city": ("string", ["address.city"]),
+                     "active": ("token", ["active"])},
+    "Location": {"name": ("string", ["name", "alias"]), "address-city": ("string", ["address.city"]),
+                 "organization": ("reference", ["managingOrganization"]), "status": ("token", ["status"])},
+    "Condition": {**_SUBJECT, "code": ("token", ["code"]), "clinical-status": ("token", ["clinicalStatus"]),
+                  "onset-date": ("date", ["onsetDateTime", "onsetPeriod"]),
+                  "recorded-date": ("date", ["recordedDate"])},
+    "Procedure": {**_SUBJECT, "code": ("token", ["code"]), "status": ("token", ["status"]),
+                  "date": ("date", ["performedDateTime", "performedPeriod"])},
+    "ServiceRequest": {**_SUBJECT, "code": ("token", ["code"]), "status": ("token", ["status"]),
+                       "intent": ("token", ["intent"]), "priority": ("token", ["priority"]),
+                       "requester": ("reference", ["requester"]),
+                       "performer": ("reference", ["performer"]),
+                       "occurrence": ("date", ["occurrenceDateTime", "occurrencePeriod", "occurrenceTiming.event"]),
+                       "authored": ("date", ["authoredOn"])},
+    "Coverage": {"beneficiary": ("reference", ["beneficiary"]),
+                 "patient": ("reference", ["beneficiary"], "Patient"),
+                 "subscriber": ("reference", ["subscriber"]),
+                 "policy-holder": ("reference", ["policyHolder"]),
+                 "payor": ("reference", ["payor"]), "status": ("token", ["status"]),
+                 "type": ("token", ["type"]), "identifier": ("token", ["identifier"])},
+    "Account": {**_SUBJECT, "status": ("token", ["status"]), "name": ("string", ["name"]),
+                "owner": ("reference", ["owner"]), "identifier": ("token", ["identifier"]),
+                "type": ("token", ["type"]), "period": ("date", ["servicePeriod"])},
+    "Consent": {"patient": ("reference", ["patient"]), "status": ("token", ["status"]),
+                "category": ("token", ["category"]), "date": ("date", ["dateTime"]),
+                "organization": ("reference", ["organization"])},
+    "DocumentReference": {**_SUBJECT, "status": ("token", ["status"]), "type": ("token", ["type"]),
+                          "category": ("token", ["category"]), "date": ("date", ["date"]),
+                          "author": ("reference", ["author"])},
+    "CarePlan": {**_SUBJECT, "status": ("token", ["status"]), "intent": ("token", ["intent"]),
+                 "encounter": ("reference", ["encounter"]), "date": ("date", ["period"])},
+    "Encounter": {**_SUBJECT, "status": ("token", ["status"]), "date": ("date", ["period"]),
+                  "practitioner": ("reference", ["participant.individual"], "Practitioner")},
+    "Schedule": {"actor": ("reference", ["actor"]), "active": ("token", ["active"]),
+                 "specialty": ("token", ["specialty"]), "service-type": ("token", ["serviceType"]),
+                 "service-category": ("token", ["serviceCategory"]),
+                 "date": ("date", ["planningHorizon"]), "identifier": ("token", ["identifier"])},
+    "Slot": {"schedule": ("reference", ["schedule"]), "status": ("token", ["status"]),
+             "start": ("date", ["start"]), "specialty": ("token", ["specialty"]),
+             "service-type": ("token", ["serviceType"]), "service-category": ("token", ["serviceCategory"]),
+             "appointment-type": ("token", ["appointmentType"]), "identifier": ("token", ["identifier"])},
+    "Appointment": {"actor": ("reference", ["participant.actor"]),
+                    "patient": ("reference", ["participant.actor"], "Patient"),
+                    "practitioner": ("reference", ["participant.actor"], "Practitioner"),
+                    "location": ("reference", ["participant.actor"], "Location"),
+                    "status": ("token", ["status"]), "date": ("date", ["start"]),
+                    "slot": ("reference", ["slot"]), "service-type": ("token", ["serviceType"]),
+                    "specialty": ("token", ["specialty"]), "appointment-type": ("token", ["appointmentType"]),
+                    "reason-code": ("token", ["reasonCode"]),
+                    "based-on": ("reference", ["basedOn"]), "identifier": ("token", ["identifier"])},
+}
+COMMON_PARAMS = {
+    "_id": ("token", ["id"]),
+    "_lastUpdated": ("date", ["meta.lastUpdated"]),
+}
+# R4 elements with cardinality 0..* per resource type (dotted paths go through
+# the list at each step); a single object sent for one is wrapped in a list
+_PERSON = ("identifier", "name", "name.given", "name.prefix", "telecom", "address", "address.line",
+           "communication", "photo")
+_LIST_ELEMENTS: Dict[str, Tuple[str, ...]] = {
+    "Patient": _PERSON + ("contact", "generalPractitioner", "link"),
+    "Practitioner": _PERSON + ("qualification",),
+    "RelatedPerson": _PERSON + ("relationship",),
+    "Organization": ("identifier", "type", "alias", "telecom", "address", "contact", "endpoint"),
+    "Location": ("identifier", "alias", "type", "telecom", "hoursOfOperation", "endpoint"),
+    "Condition": ("identifier", "category", "bodySite", "stage", "evidence", "note"),
+    "Procedure": ("identifier", "basedOn", "partOf", "performer", "reasonCode", "reasonReference",
+                  "bodySite", "note", "report", "complication", "followUp", "usedCode"),
+    "ServiceRequest": ("identifier", "basedOn", "replaces", "category", "orderDetail", "performer",
+                       "locationCode", "locationReference", "reasonCode", "reasonReference", "insurance",
+                       "supportingInfo", "specimen", "bodySite", "note", "relevantHistory"),
+    "Coverage": ("identifier", "payor", "class", "costToBeneficiary", "contract"),
+    "Account": ("identifier", "subject", "coverage", "guarantor"),
+    "Consent": ("identifier", "category", "performer", "organization", "policy", "verification"),
+    "DocumentReference": ("identifier", "category", "author", "relatesTo", "securityLabel", "content"),
+    "CarePlan": ("identifier", "basedOn", "replaces", "partOf", "category", "contributor", "careTeam",
+                 "addresses", "supportingInfo", "goal", "activity", "note"),
+    "Encounter": ("identifier", "statusHistory", "classHistory", "type", "episodeOfCare", "basedOn",
+                  "participant", "participant.type", "appointment", "reasonCode", "reasonReference",
+                  "diagnosis", "account", "location"),
+    "Schedule": ("identifier", "serviceCategory", "serviceType", "specialty", "actor"),
+    "Slot": ("identifier", "serviceCategory", "serviceType", "specialty"),
+    "Appointment": ("identifier", "serviceCategory", "serviceType", "specialty", "reasonCode",
+                    "reasonReference", "supportingInformation", "slot", "basedOn", "participant",
+                    "participant.type", "requestedPeriod"),
+}
+
+# control parameters that never filter
+_RESULT_PARAMS = {"_count", "_offset", "_sort", "_summary", "_elements", "_include", "_revinclude",
+                  "_total", "_format", "_pretty", "_cascade", "_getpagesoffset"}
+
+_REF_RE = re.compile(r"^([A-Z][A-Za-z]+)/([A-Za-z0-9\-.]{1,64})(?:/_history/\S+)?$")
+_DATE_PREFIXES = ("eq", "ne", "gt", "lt", "ge", "le", "sa", "eb", "ap")
+
+
+class FHIRError(Exception):
+    def __init__(self, status: int, message: str, code: str = "processing"):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+
+
+def operation_outcome(message: str, severity: str = "error", code: str = "processing") -> dict:
+    return {"resourceType": "OperationOutcome",
+            "issue": [{"severity": severity, "code": code, "diagnostics": message}]}
+
+
+def _int_param(query: Dict[str, List[str]], name: str, default: int) -> int:
+    """Non-negative integer search control parameter (_count, _offset); 400 if malformed."""
+    raw = (query.get(name) or [""])[0] or str(default)
+    if not raw.isdigit():
+        raise FHIRError(400, f"Invalid value for {name}: '{raw}' (expected a non-negative integer)")
+    return int(raw)
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+
+
+# -- Value helpers -----------------------------------------------------------
+def _walk(value: Any, path: str) -> List[Any]:
+    """Values at a dotted path, flattening lists on the way."""
+    current = [value]
+    for key in path.split("."):
+        nxt = []
+        for item in current:
+            if isinstance(item, dict) and key in item:
+                child = item[key]
+                nxt.extend(child if isinstance(child, list) else [child])
+        current = nxt
+    return current
+
+
+def _listify(node: Any, parts: List[str]) -> None:
+    if isinstance(node, list):
+        for item in node:
+            _listify(item, parts)
+    elif isinstance(node, dict) and parts[0] in node:
+        if len(parts) > 1:
+            _listify(node[parts[0]], parts[1:])
+        elif not isinstance(node[parts[0]], list):
+            node[parts[0]] = [node[parts[0]]]
+
+
+def _normalize(resource: dict) -> dict:
+    """Wrap single values of 0..* elements in a list, in place (HAPI's parser is as lenient)."""
+    for path in _LIST_ELEMENTS.get(resource.get("resourceType"), ()):
+        _listify(resource, path.split("."))
+    return resource
+
+
+def _references(value: Any) -> Iterable[str]:
+    """Every `reference` string anywhere in a resource."""
+    if isinstance(value, dict):
+        for key, child in value.items():
+            if key == "reference" and isinstance(child, str):
+                yield child
+            else:
+                yield from _references(child)
+    elif isinstance(value, list):
+        for child in value:
+            yield from _references(child)
+
+
+def _ref_key(reference: str) -> Optional[str]:
+    """'Patient/1', 'http://x/fhir/Patient/1/_history/2' -> 'Patient/1' (None for contained / urn refs)."""
+    if not reference or reference.startswith(("#", "urn:")):
+        return None
+    parts = reference.rstrip("/").split("/")
+    if "_history" in parts:
+        parts = parts[:parts.index("_history")]
+    if len(parts) >= 2 and parts[-2][:1].isupper():
+        return f"{parts[-2]}/{parts[-1]}"
+    return None
+
+
+def _tokens(value: Any) -> List[Tuple[Optional[str], str]]:
+    """(system, code) pairs for code, boolean, Coding, CodeableConcept, Identifier, ContactPoint."""
+    if isinstance(value, bool):
+        return [(None, "true" if value else "false")]
+    if isinstance(value, (str, int)):
+        return [(None, str(value))]
+    if isinstance(value, dict):
+        if "coding" in value:
+            pairs = [p for coding in value["coding"] for p in _tokens(coding)]
+            if value.get("text"):
+                pairs.append((None, value["text"]))
+            return pairs
+        if "code" in value:
+            return [(value.get("system"), str(value["code"]))]
+        if "value" in value:
+            return [(value.get("system"), str(value["value"]))]
+        if "language" in value:     # Practitioner.communication (R5 style)
+            return _tokens(value["language"])
+    return []
+
+
+def _strings(value: Any) -> List[str]:
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, dict):
+        out = []
+        for key in ("text", "family", "given", "prefix", "suffix", "line", "city", "district",
+                    "state", "postalCode", "country"):
+            child = value.get(key)
+            if isinstance(child, list):
+                out.extend(c for c in child if isinstance(c, str))
+            elif isinstance(child, str):
+                out.append(child)
+        return out
+    return []
+
+
+def _parse_instant(text: str, upper: bool = False) -> Optional[datetime]:
+    """Start (or end, with `upper`) of the interval a FHIR date/dateTime/instant denotes."""
+    m = re.match(r"^(\d{4})(?:-(\d{2})(?:-(\d{2})(?:T(\d{2}):(\d{2})(?::(\d{2})(\.\d+)?)?"
+                 r"(Z|[+-]\d{2}:\d{2})?)?)?)?$", text.strip())
+    if not m:
+        return None
+    year, month, day, hour, minute, second, frac, tz = m.groups()
+    tzinfo = timezone.utc
+    if tz and tz != "Z":
+        sign = 1 if tz[0] == "+" else -1
+        tzinfo = timezone(sign * timedelta(hours=int(tz[1:3]), minutes=int(tz[4:6])))
+    start = datetime(int(year), int(month or 1), int(day or 1), int(hour or 0), int(minute or 0),
+                     int(second or 0), int(float(frac) * 1e6) if frac else 0, tzinfo=tzinfo)
+    if not upper:
+        return start
+    if month is None:
+        end = start.replace(year=start.year + 1)
+    elif day is None:
+        end = (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    elif hour is None:
+        end = start + timedelta(days=1)
+    elif second is None:
+        end = start + timedelta(minutes=1)
+    elif frac is None:
+        end = start + timedelta(seconds=1)
+    else:
+        return start
+    return end - timedelta(microseconds=1)
+
+
+_MIN = datetime.min.replace(tzinfo=timezone.utc)
+_MAX = datetime.max.replace(tzinfo=timezone.utc)
+
+
+def _date_range(value: Any) -> Optional[Tuple[datetime, datetime]]:
+    if isinstance(value, str):
+        low, high = _parse_instant(value), _parse_instant(value, upper=True)
+        return (low, high) if low else None
+    if isinstance(value, dict) and ("start" in value or "end" in value):
+        low = _parse_instant(value["start"]) if value.get("start") else _MIN
+        high = _parse_instant(value["end"], upper=True) if value.get("end") else _MAX
+        return (low or _MIN, high or _MAX)
+    return None
+
+
+def _date_matches(prefix: str, r: Tuple[datetime, datetime], p: Tuple[datetime, datetime]) -> bool:
+    r_low, r_high = r
+    p_low, p_high = p
+    if prefix == "eq":
+        return p_low <= r_low and r_high <= p_high
+    if prefix == "ne":
+        return not (p_low <= r_low and r_high <= p_high)
+    if prefix == "gt":
+        return r_high > p_high
+    if prefix == "lt":
+        return r_low < p_low
+    if prefix == "ge":
+        return r_high >= p_low
+    if prefix == "le":
+        return r_low <= p_high
+    if prefix == "sa":
+        return r_low > p_high
+    if prefix == "eb":
+        return r_high < p_low
+    if prefix == "ap":
+        slack = max((p_high - p_low) * 0.1, timedelta(days=1))
+        return r_low <= p_high + slack and r_high >= p_low - slack
+    return False
+
+
+# -- Server core -------------------------------------------------------------
+class MemoryFHIRServer:
+    def __init__(self, base_url: str = "http://fhir.local/fhir", enforce_referential_integrity: bool = True):
+        self.base_url = base_url.rstrip("/")
+        self.enforce_referential_integrity = enforce_referential_integrity
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self.resources: Dict[str, Dict[str, dict]] = defaultdict(dict)    # type -> id -> current
+        self.versions: Dict[str, List[Optional[dict]]] = defaultdict(list)  # "Type/id" -> history (None = deleted)
+        self.history: List[Tuple[str, str, str]] = []                     # (key, versionId, method)
+        self.index: Dict[str, Dict[str, Dict[str, Set[str]]]] = defaultdict(lambda: defaultdict(lambda: defaultdict(set)))
+        self._indexed: Dict[str, List[Tuple[str, str]]] = {}              # "Type/id" -> [(param, value)]
+        self.referenced_by: Dict[str, Set[str]] = defaultdict(set)        # target key -> source keys
+        self._refs: Dict[str, Set[str]] = {}                              # source key -> target keys
+        self._ids = itertools.count(1)
+        # inside a transaction: "Type/id" -> (resource, version count) before its first change
+        self._undo: Optional[Dict[str, Tuple[Optional[dict], int]]] = None
+
+    # -- Indexing ------------------------------------------------------------
+    @staticmethod
+    def params_for(resource_type: str) -> Dict[str, tuple]:
+        return {**COMMON_PARAMS, **SEARCH_PARAMS.get(resource_type, {})}
+
+    def _index_keys(self, resource: dict) -> List[Tuple[str, str]]:
+        keys = []
+        for name, spec in self.params_for(resource["resourceType"]).items():
+            kind, paths = spec[0], spec[1]
+            values = [v for path in paths for v in _walk(resource, path)]
+            if kind == "token":
+                for system, code in (pair for v in values for pair in _tokens(v)):
+                    keys.append((name, code.lower()))
+                    if system:
+                        keys.append((name, f"{system}|{code}".lower()))
+            elif kind == "reference":
+                for v in values:
+                    ref = _ref_key(v.get("reference", "")) if isinstance(v, dict) else None
+                    if ref and (len(spec) < 3 or ref.startswith(spec[2] + "/")):
+                        keys.append((name, ref))
+        return keys
+
+    def _store(self, resource: dict) -> None:
+        key = f"{resource['resourceType']}/{resource['id']}"
+        self._unindex(key)
+        self.resources[resource["resourceType"]][resource["id"]] = resource
+        entries = self._index_keys(resource)
+        for name, value in entries:
+            self.index[resource["resourceType"]][name][value].add(resource["id"])
+        self._indexed[key] = entries
+        targets = {t for t in (_ref_key(r) for r in _references(resource)) if t and t != key}
+        for target in targets:
+            self.referenced_by[target].add(key)
+        self._refs[key] = targets
+
+    def _unindex(self, key: str) -> None:
+        resource_type, resource_id = key.split("/", 1)
+        for name, value in self._indexed.pop(key, []):
+            self.index[resource_type][name][value].discard(resource_id)
+        for target in self._refs.pop(key, set()):
+            self.referenced_by[target].discard(key)
+
+    # -- Entry point ---------------------------------------------------------
+    def handle(self, method: str, url: str, body: Optional[dict] = None,
+               headers: Optional[Dict[str, str]] = None) -> Tuple[int, Dict[str, str], Optional[dict]]:
+        """Serve one REST call; returns (status, headers, JSON body)."""
+        headers = {k.lower(): v for k, v in (headers or {}).items()}
+        parts = urlsplit(url)
+        path = parts.path
+        base_path = urlsplit(self.base_url).path.rstrip("/")
+        if base_path and path.startswith(base_path):
+            path = path[len(base_path):]
+        segments = [s for s in path.split("/") if s]
+        query = parse_qs(parts.query, keep_blank_values=True)
+        try:
+            with self._lock:
+                return self._route(method.upper(), segments, query, body, headers)
+        except FHIRError as e:
+            return e.status, {}, operation_outcome(str(e), code=e.code)
+
+    def _route(self, method, segments, query, body, headers):
+        n = len(segments)
+        if n == 0:
+            if method == "POST":
+                return self.process_bundle(body or {})
+            raise FHIRError(400, "Nothing to do at the server root")
+        if segments[0] == "metadata":
+            return 200, {}, self.capability_statement()
+        if segments[0] == "$expunge" and method == "POST":
+            return 200, {}, self.expunge(body or {})
+        if segments[0] == "_history":
+            return 200, {}, self.system_history(query)
+        resource_type = segments[0]
+        if not resource_type[:1].isupper():
+            raise FHIRError(404, f"Unknown resource type '{resource_type}'", "not-supported")
+        if n == 1:
+            if method == "GET":
+                return 200, {}, self.search(resource_type, query)
+            if method == "POST" and body is not None and body.get("resourceType") == "Bundle" and resource_type == "Bundle":
+                return self.create(body)
+            if method == "POST":
+                return self.create(self._check_body(resource_type, body), headers.get("if-none-exist"))
+            if method == "DELETE":
+                return self.conditional_delete(resource_type, query, self._cascade(query, headers))
+        if n == 2 and segments[1] == "_search" and method == "POST":
+            return 200, {}, self.search(resource_type, query)
+        if n == 2:
+            resource_id = segments[1]
+            if method == "GET":
+                return self.read(resource_type, resource_id)
+            if method == "PUT":
+                resource = self._check_body(resource_type, body)
+                if resource.get("id") not in (None, resource_id):
+                    raise FHIRError(400, f"Resource id '{resource.get('id')}' does not match URL id '{resource_id}'")
+                return self.update(resource_type, resource_id, resource)
+            if method == "DELETE":
+                return self.delete(resource_type, resource_id, self._cascade(query, headers))
+        if n == 4 and segments[2] == "_history" and method == "GET":
+            return self.vread(resource_type, segments[1], segments[3])
+        raise FHIRError(405, f"{method} /{'/'.join(segments)} is not supported", "not-supported")
+
+    @staticmethod
+    def _check_body(resource_type: str, body: Optional[dict]) -> dict:
+        if not isinstance(body, dict) or body.get("resourceType") != resource_type:
+            raise FHIRError(400, f"Body must be a {resource_type} resource")
+        return body
+
+    @staticmethod
+    def _cascade(query, headers) -> bool:
+        return headers.get("x-cascade") == "delete" or query.get("_cascade", [""])[0] == "delete"
+
+    def _location(self, resource: dict) -> Dict[str, str]:
+        meta = resource["meta"]
+        return {"Location": f"{self.base_url}/{resource['resourceType']}/{resource['id']}/_history/{meta['versionId']}",
+                "ETag": f'W/"{meta["versionId"]}"',
+                "Last-Modified": meta["lastUpdated"]}
+
+    # -- CRUD ----------------------------------------------------------------
+    def read(self, resource_type: str, resource_id: str):
+        resource = self.resources[resource_type].get(resource_id)
+        if resource is None:
+            if self.versions.get(f"{resource_type}/{resource_id}"):
+                raise FHIRError(410, f"Resource {resource_type}/{resource_id} is deleted", "deleted")
+            raise FHIRError(404, f"Resource {resource_type}/{resource_id} is not known", "not-found")
+        return 200, self._location(resource), copy.deepcopy(resource)
+
+    def vread(self, resource_type: str, resource_id: str, version: str):
+        history = self.versions.get(f"{resource_type}/{resource_id}") or []
+        if not version.isdigit() or not 0 < int(version) <= len(history) or history[int(version) - 1] is None:
+            raise FHIRError(404, f"Version {version} of {resource_type}/{resource_id} is not known", "not-found")
+        resource = history[int(version) - 1]
+        return 200, self._location(resource), copy.deepcopy(resource)
+
+    def _remember(self, key: str) -> None:
+        """Record a resource's state before a transaction first changes it (stored resources are never mutated)."""
+        if self._undo is not None and key not in self._undo:
+            resource_type, resource_id = key.split("/", 1)
+            self._undo[key] = (self.resources[resource_type].get(resource_id), len(self.versions.get(key, ())))
+
+    def _write(self, resource: dict, method: str) -> dict:
+        resource = _normalize(copy.deepcopy(resource))
+        key = f"{resource['resourceType']}/{resource['id']}"
+        self._remember(key)
+        history = self.versions[key]
+        resource["meta"] = {**resource.get("meta", {}), "versionId": str(len(history) + 1), "lastUpdated": _now()}
+        history.append(copy.deepcopy(resource))
+        self.history.append((key, resource["meta"]["versionId"], method))
+        self._store(resource)
+        return resource
+
+    def _check_references(self, resource: dict) -> None:
+        if not self.enforce_referential_integrity:
+            return
+        for reference in _references(resource):
+            target = _ref_key(reference)
+            if target and _REF_RE.match(reference) and target.split("/", 1)[1] not in self.resources[target.split("/", 1)[0]]:
+                raise FHIRError(400, f"Resource {target} not found, specified in path: "
+                                     f"{resource['resourceType']}", "processing")
+
+    def create(self, resource: dict, if_none_exist: Optional[str] = None):
+        if if_none_exist:
+            matches = self._matches(resource["resourceType"], parse_qs(if_none_exist))
+            if len(matches) == 1:
+                return 200, self._location(matches[0]), copy.deepcopy(matches[0])
+            if len(matches) > 1:
+                raise FHIRError(412, "Multiple resources match the If-None-Exist criteria")
+        resource = {**resource, "id": str(next(self._ids))}
+        while resource["id"] in self.resources[resource["resourceType"]]:
+            resource["id"] = str(next(self._ids))
+        self._check_references(resource)
+        stored = self._write(resource, "POST")
+        return 201, self._location(stored), copy.deepcopy(stored)
+
+    def update(self, resource_type: str, resource_id: str, resource: dict):
+        resource = {**resource, "id": resource_id}
+        self._check_references(resource)
+        created = resource_id not in self.resources[resource_type]
+        stored = self._write(resource, "PUT")
+        return (201 if created else 200), self._location(stored), copy.deepcopy(stored)
+
+    def delete(self, resource_type: str, resource_id: str, cascade: bool = False):
+        key = f"{resource_type}/{resource_id}"
+        if resource_id not in self.resources[resource_type]:
+            return 200, {}, operation_outcome(f"Resource {key} was not found, nothing deleted", "warning")
+        referrers = sorted(self.referenced_by.get(key, ()))
+        if referrers and not cascade:
+            raise FHIRError(409, f"Unable to delete {key} because at least one resource has a reference "
+                                 f"to this resource. First reference found was resource {referrers[0]}", "conflict")
+        for referrer in referrers:
+            self.delete(*referrer.split("/", 1), cascade=True)
+        self._remember(key)
+        self._unindex(key)
+        del self.resources[resource_type][resource_id]
+        self.versions[key].append(None)
+        self.history.append((key, str(len(self.versions[key])), "DELETE"))
+        return 200, {}, operation_outcome(f"Successfully deleted {key}", "information", "informational")
+
+    def conditional_delete(self, resource_type: str, query, cascade: bool = False):
+        criteria = {k: v for k, v in query.items() if k not in _RESULT_PARAMS}
+        if not criteria:
+            raise FHIRError(400, "Conditional delete requires search criteria")
+        matches = self._matches(resource_type, query)
+        for resource in matches:
+            if resource["id"] in self.resources[resource_type]:
+                self.delete(resource_type, resource["id"], cascade)
+        return 200, {}, operation_outcome(f"Successfully deleted {len(matches)} resource(s)", "information",
+                                          "informational")
+
+    def expunge(self, parameters: dict):
+        everything = any(p.get("name") == "expungeEverything" and p.get("valueBoolean")
+                         for p in parameters.get("parameter", []))
+        if not everything:
+            raise FHIRError(400, "Only expungeEverything is supported")
+        if self._undo is not None:
+            raise FHIRError(400, "$expunge cannot be part of a transaction")
+        count = sum(len(v) for v in self.versions.values())
+        self._reset()
+        return {"resourceType": "Parameters", "parameter": [{"name": "count", "valueInteger": count}]}
+
+    # -- Search --------------------------------------------------------------
+    def _candidates(self, resource_type: str, name: str, values: List[str], modifier: str) -> Optional[Set[str]]:
+        """Ids matching an indexed parameter (token/reference without modifiers), else None."""
+        spec = self.params_for(resource_type).get(name)
+        if spec is None or spec[0] not in ("token", "reference") or modifier:
+            return None
+        index = self.index[resource_type][name]
+        ids: Set[str] = set()
+        for value in values:
+            if spec[0] == "token":
+                lookup = value.lower()
+                lookup = lookup[1:] if lookup.startswith("|") else lookup
+            else:
+                lookup = _ref_key(value) or value
+            if spec[0] == "reference" and "/" not in lookup:
+                ids.update(i for ref, members in index.items() if ref.endswith("/" + lookup) for i in members)
+            else:
+                ids.update(index.get(lookup, ()))
+        return ids
+
+    def _match_param(self, resource: dict, name: str, modifier: str, values: List[str]) -> bool:
+        """True when any of the comma-separated `values` matches."""
+        resource_type = resource["resourceType"]
+        spec = self.params_for(resource_type).get(name)
+        if spec is None:
+            return True     # unknown parameters are ignored (lenient, like HAPI)
+        kind, paths = spec[0], spec[1]
+        found = [v for path in paths for v in _walk(resource, path)]
+        if modifier == "missing":
+            return (not found) == (values[0].lower() == "true")
+        if kind == "token":
+            pairs = [p for v in found for p in _tokens(v)]
+            hit = any(self._token_match(pairs, value) for value in values)
+            return not hit if modifier == "not" else hit
+        if kind == "string":
+            strings = [s.lower() for v in found for s in _strings(v)]
+            for value in (v.lower() for v in values):
+                if modifier == "exact" and any(s == value for s in (x for v in found for x in _strings(v))):
+                    return True
+                if modifier == "contains" and any(value in s for s in strings):
+                    return True
+                if not modifier and any(s.startswith(value) for s in strings):
+                    return True
+            return False
+        if kind == "reference":
+            refs = [_ref_key(v.get("reference", "")) for v in found if isinstance(v, dict)]
+            refs = [r for r in refs if r and (len(spec) < 3 or r.startswith(spec[2] + "/"))]
+            if modifier and modifier[:1].isupper():
+                refs = [r for r in refs if r.startswith(modifier + "/")]
+            for value in values:
+                target = _ref_key(value) or value
+                if "/" in target and target in refs:
+                    return True
+                if "/" not in target and any(r.split("/", 1)[1] == target for r in refs):
+                    return True
+            return False
+        if kind == "date":
+            ranges = [r for r in (_date_range(v) for v in found) if r]
+            for value in values:
+                prefix = value[:2] if value[:2] in _DATE_PREFIXES else "eq"
+                text = value[2:] if value[:2] in _DATE_PREFIXES else value
+                low, high = _parse_instant(text), _parse_instant(text, upper=True)
+                if low is None:
+                    raise FHIRError(400, f"Invalid date/time format: '{value}'")
+                if any(_date_matches(prefix, r, (low, high)) for r in ranges):
+                    return True
+            return False
+        return True
+
+    @staticmethod
+    def _token_match(pairs: List[Tuple[Optional[str], str]], value: str) -> bool:
+        if "|" in value:
+            system, code = value.split("|", 1)
+            return any((not system or (s or "") == system) and (not code or c.lower() == code.lower())
+                       for s, c in pairs)
+        return any(c.lower() == value.lower() for _, c in pairs)
+
+    def _chain_targets(self, resource_type: str, link: str, rest: str, values: List[str]) -> Set[str]:
+        """Keys of resources that `link` may point to and that satisfy `rest=values`."""
+        name, _, type_modifier = link.partition(":")
+        spec = self.params_for(resource_type).get(name)
+        if spec is None or spec[0] != "reference":
+            raise FHIRError(400, f"Invalid chain: '{name}' is not a reference parameter of {resource_type}")
+        if type_modifier or len(spec) > 2:
+            target_types = [type_modifier or spec[2]]
+        else:   # the types this parameter currently points to
+            target_types = sorted({ref.split("/", 1)[0] for ref, ids in self.index[resource_type][name].items()
+                                   if ids and "/" in ref})
+        keys = set()
+        for target_type in target_types:
+            for target in self._matches(target_type, {rest: [",".join(values)]}, page=False):
+                keys.add(f"{target_type}/{target['id']}")
+        return keys
+
+    def _matches(self, resource_type: str, query: Dict[str, List[str]], page: bool = False) -> List[dict]:
+        filters = [(k, v) for k, v in query.items() if k not in _RESULT_PARAMS]
+        store = self.resources[resource_type]
+        candidates: Optional[Set[str]] = None
+        checks = []
+        for raw_name, raw_values in filters:
+            for raw in raw_values:                  # repeated parameters are ANDed
+                values = raw.split(",")             # comma-separated values are ORed
+                if "." in raw_name:
+                    link, rest = raw_name.split(".", 1)
+                    targets = self._chain_targets(resource_type, link, rest, values)
+                    ids = self._candidates(resource_type, link.partition(":")[0], sorted(targets), "") or set()
+                    candidates = ids if candidates is None else candidates & ids
+                    continue
+                name, _, modifier = raw_name.partition(":")
+                ids = self._candidates(resource_type, name, values, modifier)
+                if ids is not None:
+                    candidates = ids if candidates is None else candidates & ids
+                else:
+                    checks.append((name, modifier, values))
+        pool = (store[i] for i in candidates if i in store) if candidates is not None else store.values()
+        return [r for r in pool if all(self._match_param(r, n, m, v) for n, m, v in checks)]
+
+    def _sort(self, resource_type: str, resources: List[dict], sort: str) -> List[dict]:
+        for field in reversed([f for f in sort.split(",") if f]):
+            descending = field.startswith("-")
+            name = field.lstrip("-")
+            spec = self.params_for(resource_type).get(name)
+
+            def key(resource, spec=spec, name=name):
+                if spec is None:
+                    return (1, "")
+                values = [v for path in spec[1] for v in _walk(resource, path)]
+                if spec[0] == "date":
+                    ranges = [r for r in (_date_range(v) for v in values) if r]
+                    return (0, min(r[0] for r in ranges).isoformat()) if ranges else (1, "")
+                strings = [s for v in values for s in (_strings(v) or [c for _, c in _tokens(v)])]
+                if name == "_id":
+                    return (0, resource["id"].zfill(20))
+                return (0, min(strings).lower()) if strings else (1, "")
+
+            present = [r for r in resources if key(r)[0] == 0]
+            missing = [r for r in resources if key(r)[0] == 1]
+            resources = sorted(present, key=key, reverse=descending) + missing
+        return resources
+
+    def search(self, resource_type: str, query: Dict[str, List[str]]) -> dict:
+        matches = self._matches(resource_type, query)
+        matches = self._sort(resource_type, matches, ",".join(query.get("_sort", [])) or "_id")
+        total = len(matches)
+        bundle = {"resourceType": "Bundle", "id": str(uuid.uuid4()), "meta": {"lastUpdated": _now()},
+                  "type": "searchset", "total": total}
+        count = min(_int_param(query, "_count", DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE)
+        offset = _int_param(query, "_offset" if "_offset" in query else "_getpagesoffset", 0)
+        # _count=0 asks for the total only, like HAPI (no page, hence no next link)
+        if query.get("_summary", [""])[0] == "count" or count == 0:
+            return bundle
+        page = matches[offset:offset + count]
+        params = {k: v for k, v in query.items() if k not in ("_offset", "_getpagesoffset")}
+        self_url = f"{self.base_url}/{resource_type}?{urlencode(params, doseq=True)}"
+        bundle["link"] = [{"relation": "self", "url": self_url + (f"&_offset={offset}" if offset else "")}]
+        if offset + count < total:
+            bundle["link"].append({"relation": "next", "url": f"{self_url}&_offset={offset + count}"})
+        if offset:
+            bundle["link"].append({"relation": "previous", "url": f"{self_url}&_offset={max(0, offset - count)}"})
+
+        elements = [e for v in query.get("_elements", []) for e in v.split(",") if e]
+        entries = [{"fullUrl": f"{self.base_url}/{resource_type}/{r['id']}",
+                    "resource": self._subset(r, elements), "search": {"mode": "match"}} for r in page]
+        seen = {f"{resource_type}/{r['id']}" for r in page}
+        for included in self._includes(page, query, seen):
+            entries.append({"fullUrl": f"{self.base_url}/{included['resourceType']}/{included['id']}",
+                            "resource": copy.deepcopy(included), "search": {"mode": "include"}})
+        if entries:     # HAPI omits `entry` for empty pages
+            bundle["entry"] = entries
+        return bundle
+
+    @staticmethod
+    def _subset(resource: dict, elements: List[str]) -> dict:
+        if not elements:
+            return copy.deepcopy(resource)
+        subset = {k: copy.deepcopy(v) for k, v in resource.items() if k in ("resourceType", "id", "meta", *elements)}
+        subset["meta"] = {**subset.get("meta", {}),
+                          "tag": [{"system": "http://terminology.hl7.org/CodeSystem/v3-ObservationValue",
+                                   "code": "SUBSETTED"}]}
+        return subset
+
+    def _includes(self, page: List[dict], query, seen: Set[str]) -> List[dict]:
+        out: List[dict] = []
+        frontier = list(page)
+        includes = [(k, v) for k, vs in query.items() for v in vs if k.split(":")[0] in ("_include", "_revinclude")]
+        while frontier and includes:
+            added = []
+            for param, value in includes:
+                rev = param.startswith("_revinclude")
+                for resource in frontier:
+                    key = f"{resource['resourceType']}/{resource['id']}"
+                    if rev:
+                        sources = self.referenced_by.get(key, set())
+                        if value != "*":
+                            source_type, _, source_param = value.partition(":")
+                            spec = self.params_for(source_type).get(source_param)
+                            sources = {s for s in sources if s.startswith(source_type + "/") and spec
+                                       and key in {_ref_key(v.get("reference", "")) for path in spec[1]
+                                                   for v in _walk(self.resources[source_type][s.split("/", 1)[1]], path)
+                                                   if isinstance(v, dict)}}
+                        targets = sources
+                    else:
+                        source_type, _, source_param = value.partition(":")
+                        if value != "*" and source_type != resource["resourceType"]:
+                            continue
+                        spec = self.params_for(resource["resourceType"]).get(source_param)
+                        if value == "*":
+                            targets = self._refs.get(key, set())
+                        elif spec:
+                            targets = {_ref_key(v.get("reference", "")) for path in spec[1]
+                                       for v in _walk(resource, path) if isinstance(v, dict)}
+                        else:
+                            targets = set()
+                    for target in targets:
+                        if not target or target in seen:
+                            continue
+                        target_type, target_id = target.split("/", 1)
+                        found = self.resources[target_type].get(target_id)
+                        if found is not None:
+                            seen.add(target)
+                            out.append(found)
+                            added.append(found)
+            iterate = any(":iterate" in param for param, _ in includes)
+            frontier = added if iterate else []
+        return out
+
+    # -- History / capabilities ----------------------------------------------
+    def system_history(self, query) -> dict:
+        count = min(_int_param(query, "_count", DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE)
+        entries = []
+        for key, version, method in reversed(self.history[-count:] if count else []):
+            resource = self.versions[key][int(version) - 1]
+            entry = {"fullUrl": f"{self.base_url}/{key}",
+                     "request": {"method": method, "url": key},
+                     "response": {"status": "200 OK", "etag": f'W/"{version}"'}}
+            if resource is not None:
+                entry["resource"] = copy.deepcopy(resource)
+            else:
+                entry["resource"] = {"resourceType": key.split("/")[0], "id": key.split("/")[1],
+                                     "meta": {"versionId": version}}
+            entries.append(entry)
+        return {"resourceType": "Bundle", "type": "history", "total": len(self.history), "entry": entries}
+
+    def capability_statement(self) -> dict:
+        return {
+            "resourceType": "CapabilityStatement",
+            "status": "active",
+            "kind": "instance",
+            "fhirVersion": "4.0.1",
+            "format": ["application/fhir+json"],
+            "software": {"name": "fhir_memory_server"},
+            "rest": [{
+                "mode": "server",
+                "resource": [{"type": t,
+                              "interaction": [{"code": c} for c in ("read", "vread", "update", "delete",
+                                                                   "create", "search-type")],
+                              "searchParam": [{"name": n, "type": s[0]} for n, s in self.params_for(t).items()]}
+                             for t in sorted(SEARCH_PARAMS)],
+                "interaction": [{"code": "transaction"}, {"code": "batch"}, {"code": "history-system"}],
+            }],
+        }
+
+    # -- Bundles -------------------------------------------------------------
+    def process_bundle(self, bundle: dict):
+        kind = bundle.get("type")
+        if bundle.get("resourceType") != "Bundle" or kind not in ("transaction", "batch"):
+            raise FHIRError(400, "Expected a Bundle of type transaction or batch")
+        entries = bundle.get("entry", [])
+        if kind == "batch":
+            responses = [self._bundle_entry(entry) for entry in entries]
+            return 200, {}, {"resourceType": "Bundle", "type": "batch-response", "entry": responses}
+
+        # all-or-nothing: an undo log of the resources the transaction touches
+        self._undo, history_length = {}, len(self.history)
+        try:
+            # assign ids to POSTed resources so urn:uuid references can be rewritten
+            replacements = {}
+            preassigned = set()
+            for i, entry in enumerate(entries):
+                if entry.get("request", {}).get("method") == "POST" and str(entry.get("fullUrl", "")).startswith("urn:"):
+                    new_id = str(next(self._ids))
+                    replacements[entry["fullUrl"]] = f"{entry['resource']['resourceType']}/{new_id}"
+                    preassigned.add(i)
+            if replacements:
+                text = json.dumps([entry.get("resource") for entry in entries])
+                for urn, ref in replacements.items():
+                    text = text.replace(f'"{urn}"', f'"{ref}"')
+                entries = [{**entry, "resource": resource} if resource is not None else entry
+                           for entry, resource in zip(entries, json.loads(text))]
+                for i in preassigned:
+                    entries[i]["resource"]["id"] = replacements[entries[i]["fullUrl"]].split("/", 1)[1]
+            order = {"DELETE": 0, "POST": 1, "PUT": 2, "PATCH": 2, "GET": 3}
+            ordered = sorted(range(len(entries)), key=lambda i: order.get(entries[i].get("request", {}).get("method"), 4))
+            responses: List[Optional[dict]] = [None] * len(entries)
+            integrity, self.enforce_referential_integrity = self.enforce_referential_integrity, False
+            try:
+                for i in ordered:
+                    responses[i] = self._bundle_entry(entries[i], raise_errors=True, keep_id=i in preassigned)
+            finally:
+                self.enforce_referential_integrity = integrity
+            for entry in entries:
+                if entry.get("request", {}).get("method") in ("POST", "PUT") and "resource" in entry:
+                    self._check_references(entry["resource"])
+        except FHIRError:
+            self._rollback(history_length)
+            raise
+        finally:
+            self._undo = None
+        return 200, {}, {"resourceType": "Bundle", "type": "transaction-response", "entry": responses}
+
+    def _bundle_entry(self, entry: dict, raise_errors: bool = False, keep_id: bool = False) -> dict:
+        request = entry.get("request", {})
+        method, url = request.get("method", "GET"), request.get("url", "")
+        try:
+            if method == "POST" and keep_id:
+                resource = entry["resource"]
+                self._check_references(resource)
+                stored = self._write(resource, "POST")
+                status, headers, body = 201, self._location(stored), stored
+            else:
+                status, headers, body = self._route_entry(method, url, entry.get("resource"), request)
+        except FHIRError as e:
+            if raise_errors:
+                raise
+            return {"response": {"status": f"{e.status} {_REASONS.get(e.status, '')}".strip(),
+                                 "outcome": operation_outcome(str(e), code=e.code)}}
+        response = {"status": f"{status} {_REASONS.get(status, '')}".strip()}
+        if "ETag" in headers:
+            response.update(etag=headers["ETag"], location=headers["Location"], lastModified=headers["Last-Modified"])
+        out = {"response": response}
+        if body is not None and method == "GET":
+            out["resource"] = body
+        return out
+
+    def _route_entry(self, method, url, resource, request):
+        parts = urlsplit(url)
+        segments = [s for s in parts.path.split("/") if s]
+        headers = {}
+        if request.get("ifNoneExist"):
+            headers["if-none-exist"] = request["ifNoneExist"]
+        return self._route(method, segments, parse_qs(parts.query, keep_blank_values=True), resource, headers)
+
+    def _rollback(self, history_length: int) -> None:
+        """Undo a failed transaction: put back every resource it touched."""
+        for key, (resource, version_count) in self._undo.items():
+            resource_type, resource_id = key.split("/", 1)
+            del self.versions[key][version_count:]
+            if not self.versions[key]:
+                del self.versions[key]
+            if resource is None:
+                self._unindex(key)
+                self.resources[resource_type].pop(resource_id, None)
+            else:
+                self._store(resource)
+        del self.history[history_length:]
+
+
+_REASONS = {200: "OK", 201: "Created", 204: "No Content", 400: "Bad Request", 404: "Not Found",
+            405: "Method Not Allowed", 409: "Conflict", 410: "Gone", 412: "Precondition Failed"}
+
+
+# -- requests transport (in-process) ----------------------------------------
+class MemoryFHIRAdapter(BaseAdapter):
+    """requests adapter answering from a MemoryFHIRServer instead of the network."""
+
+    def __init__(self, server: MemoryFHIRServer):
+        super().__init__()
+        self.server = server
+
+    def send(self, request, **kwargs):
+        body = None
+        if request.body:
+            raw = request.body.decode() if isinstance(request.body, bytes) else request.body
+            body = json.loads(raw) if raw.strip() else None
+        status, headers, payload = self.server.handle(request.method, request.url, body, dict(request.headers))
+        response = requests.Response()
+        response.status_code = status
+        response.reason = _REASONS.get(status, "")
+        response.url = request.url
+        response.request = request
+        data = json.dumps(payload).encode() if payload is not None else b""
+        response.raw = io.BytesIO(data)
+        response.headers = requests.structures.CaseInsensitiveDict(
+            {"Content-Type": "application/fhir+json;charset=utf-8", "Content-Length": str(len(data)), **headers})
+        response.encoding = "utf-8"
+        return response
+
+    def close(self):
+        pass
+
+
+def install(base_url: str = "http://fhir.local/fhir", server: Optional[MemoryFHIRServer] = None,
+            session: Optional[requests.Session] = None) -> MemoryFHIRServer:
+    """Serve `base_url` from memory for the shared FHIR session (or `session`)."""
+    from fhir_client import shared_session
+
+    server = server or MemoryFHIRServer(base_url)
+    (session or shared_session()).mount(base_url.rstrip("/"), MemoryFHIRAdapter(server))
+    return server
+
+
+# -- HTTP transport (standalone) ---------------------------------------------
+def make_http_server(host: str = "0.0.0.0", port: int = 7070, base_path: str = "/fhir",
+                     server: Optional[MemoryFHIRServer] = None) -> ThreadingHTTPServer:
+    server = server or MemoryFHIRServer(f"http://{'localhost' if host == '0.0.0.0' else host}:{port}{base_path}")
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _handle(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length) if length else b""
+            try:
+                body = json.loads(raw) if raw.strip() else None
+            except ValueError:
+                body = None
+            status, headers, payload = server.handle(self.command, self.path, body, dict(self.headers))
+            data = json.dumps(payload).encode() if payload is not None else b""
+            self.send_response(status)
+            self.send_header("Content-Type", "application/fhir+json;charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        do_GET = do_POST = do_PUT = do_DELETE = _handle
+
+    httpd = ThreadingHTTPServer((host, port), Handler)
+    httpd.daemon_threads = True
+    httpd.fhir = server
+    return httpd
+
+
+def serve_in_background(host: str = "127.0.0.1", port: int = 7070, base_path: str = "/fhir") -> ThreadingHTTPServer:
+    httpd = make_http_server(host, port, base_path)
+    threading.Thread(target=httpd.serve_forever, name="fhir-memory-server", daemon=True).start()
+    return httpd
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="In-memory FHIR server for offline evaluation")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=7070)
+    parser.add_argument("--base-path", default="/fhir")
+    args = parser.parse_args()
+    httpd = make_http_server(args.host, args.port, args.base_path)
+    print(f"In-memory FHIR server listening on {httpd.fhir.base_url}")
+    httpd.serve_forever()
@@ -0,0 +1,186 @@
+"""
+FHIR server reset engine
+Wipes the evaluation FHIR server between tasks using the cheapest operation
+the server allows, in this order:
+
+1. expunge  : POST [base]/$expunge expungeEverything=true (HAPI, needs
+              hapi.fhir.expunge_enabled)
+2. cascade  : one conditional DELETE per resource type with X-Cascade: delete
+              (HAPI, needs allow_multiple_delete + allow_cascading_deletes)
+3. parallel : list the ids of every type and DELETE them concurrently in
+              dependency order; a 409 falls back to the recursive
+              `on_conflict` delete (TaskInterface.delete_resource)
+
+A strategy the server rejects is remembered per base URL, so later tasks go
+straight to the one that works.
+"""
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence
+
+from fhir_client import FHIRClient
+
+logger = logging.getLogger(__name__)
+
+# Resources that depend on others are deleted first
+DELETION_ORDER = [
+    "Appointment",       # Depends on Patient, Practitioner, Location, Slot
+    "Slot",              # Depends on Schedule
+    "Schedule",          # Depends on Practitioner
+    "DocumentReference", # Depends on Patient, Practitioner
+    "Consent",           # Depends on Patient, Organization, DocumentReference
+    "Account",           # Depends on Patient, RelatedPerson
+    "RelatedPerson",     # Depends on Patient
+    "Coverage",          # Depends on Patient, Organization
+    "Procedure",         # Depends on Patient
+    "Condition",         # Depends on Patient
+    "ServiceRequest",    # Depends on Patient
+    "CarePlan",          # Depends on Patient, Encounter
+    "Location",          # No dependencies
+    "Organization",      # No dependencies
+    "Patient",           # No dependencies
+    "Practitioner",      # No dependencies
+]
+
+STRATEGIES = ("expunge", "cascade", "parallel")
+
+# base URL -> strategies the server refused
+_unsupported: Dict[str, set] = {}
+
+
+class ResetError(Exception):
+    """A reset strategy could not clean the server."""
+
+
+@dataclass
+class ResetReport:
+    strategy: Optional[str] = None
+    seconds: float = 0.0
+    deleted: Dict[str, int] = field(default_factory=dict)
+    attempts: List[str] = field(default_factory=list)   # "<strategy>: <why it was skipped>"
+
+
+class FHIRReset:
+    def __init__(self,
+                 fhir_server_url: str,
+                 headers: Optional[Dict[str, str]] = None,
+                 resource_types: Sequence[str] = DELETION_ORDER,
+                 strategies: Sequence[str] = STRATEGIES,
+                 workers: int = 8,
+                 timeout: float = 60,
+                 on_conflict: Optional[Callable[[str, str], None]] = None,
+                 client: Optional[FHIRClient] = None):
+        self.base_url = fhir_server_url.rstrip("/")
+        self.headers = headers or {"Accept": "application/fhir+json", "Content-Type": "application/fhir+json"}
+        self.resource_types = list(resource_types)
+        self.strategies = [s for s in strategies if s in STRATEGIES]
+        self.workers = workers
+        self.timeout = timeout
+        self.on_conflict = on_conflict
+        self.client = client or FHIRClient(self.base_url, self.headers)
+
+    def reset(self) -> ResetReport:
+        """Run the first strategy that works and report how long cleaning took."""
+        report = ResetReport()
+        start = time.perf_counter()
+        skipped = _unsupported.setdefault(self.base_url, set())
+        for strategy in self.strategies:
+            if strategy in skipped:
+                continue
+            try:
+                report.deleted = getattr(self, f"_{strategy}")()
+                report.strategy = strategy
+                break
+            except ResetError as e:
+                logger.info(f"FHIR reset via {strategy} unavailable: {e}")
+                report.attempts.append(f"{strategy}: {e}")
+                skipped.add(strategy)
+        report.seconds = time.perf_counter() - start
+        if report.strategy is None:
+            raise ResetError(f"No reset strategy succeeded: {report.attempts}")
+        logger.info(f"FHIR server reset via {report.strategy} in {report.seconds:.2f}s")
+        return report
+
+    # -- Strategies ----------------------------------------------------------
+    def _expunge(self) -> Dict[str, int]:
+        params = {
+            "resourceType": "Parameters",
+            "parameter": [{"name": "expungeEverything", "valueBoolean": True}],
+        }
+        response = self.client.post(f"{self.base_url}/$expunge", json=params, timeout=self.timeout)
+        if response.status_code != 200:
+            raise ResetError(f"{response.status_code} {response.text[:200]}")
+        count = next((p.get("valueInteger") for p in response.json().get("parameter", [])
+                      if p.get("name") == "count"), None)
+        return {"*": count} if count is not None else {}
+
+    def _cascade(self) -> Dict[str, int]:
+        headers = {"X-Cascade": "delete"}
+        deleted = {}
+        for resource_type in self.resource_types:
+            total = self.count(resource_type)
+            if not total:
+                continue
+            response = self.client.delete(f"{self.base_url}/{resource_type}",
+                                           params={"_lastUpdated": "gt1900-01-01"},
+                                           headers=headers, timeout=self.timeout)
+            if response.status_code not in (200, 204):
+                raise ResetError(f"DELETE {resource_type}: {response.status_code} {response.text[:200]}")
+            deleted[resource_type] = total
+        leftover = {t: n for t in self.resource_types if (n := self.count(t))}
+        if leftover:
+            raise ResetError(f"resources left after conditional delete: {leftover}")
+        return deleted
+
+    def _parallel(self) -> Dict[str, int]:
+        deleted = {}
+        for resource_type in self.resource_types:
+            ids = self.resource_ids(resource_type)
+            if ids:
+                self.delete_ids(resource_type, ids)
+                deleted[resource_type] = len(ids)
+        return deleted
+
+    # -- Helpers -------------------------------------------------------------
+    def count(self, resource_type: str) -> int:
+        """Number of stored resources of a type; ResetError if the server cannot tell."""
+        response = self.client.get(f"{self.base_url}/{resource_type}", params={"_summary": "count"})
+        if response.status_code != 200:
+            raise ResetError(f"count {resource_type}: {response.status_code} {response.text[:200]}")
+        total = response.json().get("total")
+        if total is None:
+            raise ResetError(f"count {resource_type}: no total in the response")
+        return total
+
+    def resource_ids(self, resource_type: str) -> List[str]:
+        """All ids of a resource type, following paging links."""
+        url = f"{self.base_url}/{resource_type}"
+        params = {"_count": 1000, "_elements": "id"}
+        ids = []
+        while url:
+            response = self.client.get(url, params=params)
+            if response.status_code != 200:
+                logger.error(f"Failed to fetch {resource_type}: {response.status_code}")
+                break
+            data = response.json()
+            ids.extend(entry["resource"]["id"] for entry in data.get("entry", []))
+            url = next((link["url"] for link in data.get("link", []) if link["relation"] == "next"), None)
+            params = None    # the next link carries its own query
+        return ids
+
+    def delete_ids(self, resource_type: str, ids: Sequence[str]) -> None:
+        """DELETE the given resources of one type concurrently."""
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            list(pool.map(lambda i: self._delete_one(resource_type, i), ids))
+
+    def _delete_one(self, resource_type: str, resource_id: str) -> None:
+        url = f"{self.base_url}/{resource_type}/{resource_id}"
+        response = self.client.delete(url)
+        if response.status_code == 409 and self.on_conflict:
+            # still referenced by something outside DELETION_ORDER
+            self.on_conflict(resource_type, resource_id)
+        elif response.status_code not in (200, 204, 404, 410):
+            logger.error(f"DELETE {url}: {response.status_code} {response.text[:200]}")
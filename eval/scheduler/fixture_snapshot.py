@@ -0,0 +1,193 @@
+"""
+Fixture snapshots
+Most tasks seed near-identical fixtures (PROVIDER001, SCHEDULE001, their
+slots, ...). Instead of wiping the FHIR server and re-creating everything,
+FixtureSnapshot captures the resources a task's prepare_test_data() would
+write, hashes them, and brings the server to exactly that set by
+
+- deleting resources the fixture does not contain,
+- upserting only resources that are missing, changed, or were modified on the
+  server since we last wrote them (their versionId moved on).
+
+What was last written (hash + versionId per resource) is kept in
+<snapshot_dir>/server-<key>.json together with the newest entry of the
+server's _history; if the fixture is unchanged and nothing was written to the
+server since, the restore is skipped without listing anything. Each task's
+fixture manifest is kept in <snapshot_dir>/tasks/<task_id>.json.
+
+Tasks that read their fixtures back while preparing them cannot be captured,
+and tasks that wait for the server to index their fixtures opt out with
+SNAPSHOT_FIXTURES = False (a restore would skip the wait); restore() returns
+None for both and the caller falls back to cleanup_test_data() +
+prepare_test_data().
+"""
+
+import hashlib
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from fhir_client import FHIRClient
+from fhir_reset import DELETION_ORDER, FHIRReset
+
+logger = logging.getLogger(__name__)
+
+# server-managed elements that do not describe the fixture itself
+_IGNORED_ELEMENTS = ("meta", "text")
+
+
+def resource_key(resource: Dict[str, Any]) -> str:
+    return f"{resource['resourceType']}/{resource['id']}"
+
+
+def resource_hash(resource: Dict[str, Any]) -> str:
+    body = {k: v for k, v in resource.items() if k not in _IGNORED_ELEMENTS}
+    return hashlib.sha256(json.dumps(body, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+
+def fixture_hash(hashes: Dict[str, str]) -> str:
+    return hashlib.sha256("\n".join(f"{k}={h}" for k, h in sorted(hashes.items())).encode()).hexdigest()
+
+
+@dataclass
+class SnapshotReport:
+    task_id: str
+    fixture_hash: str
+    skipped: bool = False
+    upserted: List[str] = field(default_factory=list)
+    deleted: List[str] = field(default_factory=list)
+    unchanged: int = 0
+    seconds: float = 0.0
+
+
+class FixtureSnapshot:
+    def __init__(self,
+                 fhir_server_url: str,
+                 snapshot_dir: str = ".fixture_snapshots",
+                 resource_types=DELETION_ORDER):
+        self.base_url = fhir_server_url.rstrip("/")
+        self.snapshot_dir = snapshot_dir
+        self.resource_types = list(resource_types)
+        key = hashlib.sha1(self.base_url.encode()).hexdigest()[:10]
+        self.state_file = os.path.join(snapshot_dir, f"server-{key}.json")
+        os.makedirs(os.path.join(snapshot_dir, "tasks"), exist_ok=True)
+
+    # -- Persistence ---------------------------------------------------------
+    def _load_state(self) -> Dict[str, Any]:
+        try:
+            with open(self.state_file) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"fixture": None, "marker": None, "resources": {}}
+
+    def _save_state(self, state: Dict[str, Any]) -> None:
+        tmp = self.state_file + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp, self.state_file)
+
+    def _save_manifest(self, task_id: str, digest: str, hashes: Dict[str, str]) -> None:
+        with open(os.path.join(self.snapshot_dir, "tasks", f"{task_id}.json"), "w") as f:
+            json.dump({"fixture_hash": digest, "resources": hashes}, f, indent=2, sort_keys=True)
+
+    # -- Server state --------------------------------------------------------
+    def history_marker(self, client: FHIRClient) -> Optional[str]:
+        """Newest entry of the server-wide _history; changes with every write."""
+        response = client.get(f"{self.base_url}/_history", params={"_count": 1})
+        if response.status_code != 200:
+            return None
+        entries = response.json().get("entry", [])
+        if not entries:
+            return "empty"
+        meta = entries[0].get("resource", {}).get("meta", {})
+        return f"{entries[0].get('fullUrl')}|{meta.get('versionId')}|{meta.get('lastUpdated')}"
+
+    def server_versions(self, client: FHIRClient) -> Dict[str, Optional[str]]:
+        """`Type/id` -> versionId for every resource of the tracked types."""
+        versions = {}
+        for resource_type in self.resource_types:
+            url = f"{self.base_url}/{resource_type}"
+            params = {"_count": 1000, "_elements": "id"}
+            while url:
+                response = client.get(url, params=params)
+                if response.status_code != 200:
+                    logger.error(f"Failed to list {resource_type}: {response.status_code}")
+                    break
+                data = response.json()
+                for entry in data.get("entry", []):
+                    resource = entry["resource"]
+                    versions[resource_key(resource)] = resource.get("meta", {}).get("versionId")
+                url = next((link["url"] for link in data.get("link", []) if link["relation"] == "next"), None)
+                params = None
+        return versions
+
+    # -- Restore -------------------------------------------------------------
+    def restore(self, task) -> Optional[SnapshotReport]:
+        """Bring the server to the task's fixture, writing only the difference."""
+        start = time.perf_counter()
+        client = task.fhir
+        resources = task.capture_test_data()
+        if resources is None:
+            return None
+
+        desired = {resource_key(r): r for r in resources}   # last upsert of a resource wins
+        hashes = {key: resource_hash(r) for key, r in desired.items()}
+        digest = fixture_hash(hashes)
+        report = SnapshotReport(task_id=task.get_task_id(), fixture_hash=digest)
+        self._save_manifest(report.task_id, digest, hashes)
+
+        state = self._load_state()
+        if state["fixture"] == digest and state["marker"] and state["marker"] == self.history_marker(client):
+            report.skipped = True
+            report.unchanged = len(desired)
+            report.seconds = time.perf_counter() - start
+            logger.info(f"Fixture {digest[:12]} for task {report.task_id} already on the server")
+            return report
+
+        current = self.server_versions(client)
+        written = state["resources"]
+
+        # delete what the fixture does not contain, dependents first
+        stale = [key for key in current if key not in desired]
+        reset = FHIRReset(self.base_url, resource_types=self.resource_types,
+                          on_conflict=task.delete_resource, client=client)
+        for resource_type in self.resource_types:
+            ids = [key.split("/", 1)[1] for key in stale if key.startswith(resource_type + "/")]
+            if ids:
+                reset.delete_ids(resource_type, ids)
+        report.deleted = stale
+
+        changed = [
+            key for key in desired
+            if key not in current
+            or written.get(key, {}).get("hash") != hashes[key]
+            or written.get(key, {}).get("version") != current[key]
+        ]
+        report.unchanged = len(desired) - len(changed)
+
+        with task.fhir_batch():
+            for key in changed:
+                task.upsert_to_fhir(desired[key])
+        report.upserted = changed
+
+        resources_state = {key: written[key] for key in desired if key not in changed and key in written}
+        for result in task.fhir_batch_results:
+            if result.success:
+                key = f"{result.resource_type}/{result.resource_id}"
+                resources_state[key] = {"hash": hashes[key], "version": result.version}
+        complete = all(r.success for r in task.fhir_batch_results)
+        self._save_state({
+            "fixture": digest if complete else None,
+            "marker": self.history_marker(client),
+            "resources": resources_state,
+        })
+
+        report.seconds = time.perf_counter() - start
+        logger.info(
+            f"Fixture {digest[:12]} for task {report.task_id}: {len(changed)} upserted, "
+            f"{len(stale)} deleted, {report.unchanged} unchanged in {report.seconds:.2f}s"
+        )
+        return report
@@ -6,6 +6,7 @@ import sys
 from typing import List, Dict, Any
 from dotenv import load_dotenv
 import ast
+import json
 
 def get_class_names(filepath):
     with open(filepath, "r") as file:
@@ -30,7 +31,8 @@ def get_task_config(task_file: str, env_file: str) -> Dict[str, Any]:
         
     return config
 
-def generate_task_config(task_dir: str, output_file: str, task_prefix: str = 'task_', env_file: str = None):
+def generate_task_config(task_dir: str, output_file: str, task_prefix: str = 'task_', env_file: str = None,
+                         durations_file: str = None):
     """Generate YAML configuration from task files.
     
     Args:
@@ -38,7 +40,14 @@ def generate_task_config(task_dir: str, output_file: str, task_prefix: str = 'ta
         output_file (str): Path to output YAML file
         task_prefix (str): Prefix for task files to process (default: 'task_')
         env_file (str): Path to environment file
+        durations_file (str): Task durations recorded by run_eval.py; copied into
+            `expected_seconds` so `run_eval.py --shard` can balance shards
     """
+    durations = {}
+    if durations_file and os.path.exists(durations_file):
+        with open(durations_file) as f:
+            durations = json.load(f)
+
     # Find all task_*.py files
     task_files = []
     for file in os.listdir(task_dir):
@@ -53,6 +62,8 @@ def generate_task_config(task_dir: str, output_file: str, task_prefix: str = 'ta
     for task_file in task_files:
         try:
             task_config = get_task_config(task_file, env_file)
+            if task_config['class'] in durations:
+                task_config['expected_seconds'] = round(durations[task_config['class']], 1)
             tasks.append(task_config)
         except Exception as e:
             print(f"Error processing {task_file}: {str(e)}")
@@ -88,11 +99,18 @@ def parse_args():
         help='Prefix for task files to process',
         default='task_'
     )
+
+    parser.add_argument(
+        '--durations_file',
+        type=str,
+        help='Task durations recorded by run_eval.py, stored as expected_seconds for --shard balancing',
+        default=None
+    )
     
     return parser.parse_args()
 
 if __name__ == '__main__':
     args = parse_args()
         
-    generate_task_config(args.task_dir, args.output_yaml, args.prefix)
+    generate_task_config(args.task_dir, args.output_yaml, args.prefix, durations_file=args.durations_file)
     print(f"Configuration generated at {args.output_yaml}") 
\ No newline at end of file
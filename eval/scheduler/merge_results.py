@@ -0,0 +1,58 @@
+"""
+Merge sharded evaluation results
+Each `run_eval.py --shard i/N` machine writes its own results store; this
+combines them into one and reports over the whole sweep.
+
+    python merge_results.py experiments/merged.sqlite3 shard1/results.sqlite3 shard2/results.sqlite3 \
+        --report experiments/merged_report.json
+"""
+
+import argparse
+import json
+import os
+
+from results_store import ResultsStore
+from trial_stats import trial_summary
+
+
+def merge_results(output_db, shard_paths):
+    """Merge the shard stores (files, or output directories holding results.sqlite3) into `output_db`."""
+    store = ResultsStore(output_db)
+    for path in shard_paths:
+        if os.path.isdir(path):
+            path = os.path.join(path, "results.sqlite3")
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No results store at {path}")
+        added = store.merge(path)
+        print(f"Merged {added} rows from {path}")
+    return store
+
+
+def sweep_report(store):
+    """Summary and repeated-trial statistics per (experiment, agent) of the newest run of every task."""
+    report = []
+    for group in store.summary(group_by=("experiment", "agent")):
+        rows = store.rows(experiment=group["experiment"], agent=group["agent"])
+        group["trials"] = max(row["trial"] for row in rows) + 1
+        if group["trials"] > 1:
+            group["trial_stats"] = trial_summary(rows)["overall"]
+        report.append(group)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Merge the results stores of sharded evaluation runs")
+    parser.add_argument("output", type=str, help="Merged SQLite results store (created if missing)")
+    parser.add_argument("shards", type=str, nargs="+", help="Shard results stores or output directories")
+    parser.add_argument("--report", type=str, default=None, help="Also write the report to this JSON file")
+    args = parser.parse_args()
+
+    store = merge_results(args.output, args.shards)
+    report = sweep_report(store)
+    for group in report:
+        print(f"{group['experiment']} / {group['agent']}: {group['successes']}/{group['runs']} succeeded "
+              f"({group['success_rate']:.2%}), {group['trials']} trial(s)")
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.report}")
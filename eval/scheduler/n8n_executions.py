@@ -0,0 +1,111 @@
+"""
+Abandoned agent executions
+Aborting the agent request at its deadline only closes the HTTP connection:
+the n8n workflow keeps running and could still write to the task's FHIR
+server after the worker has moved on (and wiped it for the next task). So
+a timed-out execution is stopped through the n8n public API (N8N_API_URL,
+e.g. https://<host>/api/v1, with N8N_API_KEY) and the worker waits up to
+N8N_STOP_WAIT seconds until n8n reports it finished.
+
+The execution id is only known if the response headers arrived; otherwise
+the running executions are searched for the request's session id. Without
+the API nothing can be stopped, and the execution-log webhook is polled
+until the execution has finished on its own.
+"""
+
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+import requests  # type: ignore
+
+from execution_log_collector import execution_finished
+
+logger = logging.getLogger(__name__)
+
+
+class N8nExecutions:
+    def __init__(self,
+                 api_url: Optional[str],
+                 api_key: Optional[str],
+                 log_webhook_url: Optional[str],
+                 wait: float = 120,
+                 poll: float = 2.0,
+                 timeout: float = 10):
+        self.api_url = api_url.rstrip("/") if api_url else None
+        self.log_webhook_url = log_webhook_url
+        self.wait = wait
+        self.poll = poll
+        self.timeout = timeout
+        self.session = requests.Session()
+        if api_key:
+            self.session.headers["X-N8N-API-KEY"] = api_key
+
+    @classmethod
+    def from_env(cls, log_webhook_url: Optional[str]) -> "N8nExecutions":
+        return cls(os.getenv("N8N_API_URL"), os.getenv("N8N_API_KEY"), log_webhook_url,
+                   wait=float(os.getenv("N8N_STOP_WAIT", 120)))
+
+    def _get(self, execution_id) -> Dict[str, Any]:
+        if self.api_url:
+            response = self.session.get(f"{self.api_url}/executions/{execution_id}", timeout=self.timeout)
+        else:
+            response = requests.get(self.log_webhook_url, params={"executionId": execution_id}, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def find_running(self, session_id: str) -> List[str]:
+        """Ids of running executions whose data mention `session_id` (needs the API)."""
+        response = self.session.get(f"{self.api_url}/executions",
+                                    params={"status": "running", "includeData": "true", "limit": 100},
+                                    timeout=self.timeout)
+        response.raise_for_status()
+        return [str(execution["id"]) for execution in response.json().get("data", [])
+                if session_id in json.dumps(execution.get("data"))]
+
+    def stop(self, execution_id) -> None:
+        response = self.session.post(f"{self.api_url}/executions/{execution_id}/stop", timeout=self.timeout)
+        # 404/409: already finished (or never started)
+        if response.status_code not in (404, 409):
+            response.raise_for_status()
+
+    def wait_finished(self, execution_id) -> bool:
+        """Poll the execution until n8n reports it finished; False if it still runs after `wait` seconds."""
+        deadline = time.monotonic() + self.wait
+        while True:
+            try:
+                if execution_finished(self._get(execution_id)):
+                    return True
+            except (requests.RequestException, ValueError) as e:
+                logger.debug(f"Polling execution {execution_id}: {e}")
+            if time.monotonic() + self.poll > deadline:
+                return False
+            time.sleep(self.poll)
+
+    def stop_abandoned(self, execution_id: Optional[str], session_id: str) -> bool:
+        """
+        Stop the execution behind a timed-out agent request and wait until it
+        has finished. True once it is known to be over.
+        """
+        if execution_id is None and not self.api_url:
+            logger.warning(f"Session {session_id}: execution id unknown and N8N_API_URL not set, "
+                           f"cannot stop the abandoned n8n execution")
+            return False
+        try:
+            execution_ids = [str(execution_id)] if execution_id is not None else self.find_running(session_id)
+            if self.api_url:
+                for running_id in execution_ids:
+                    self.stop(running_id)
+        except requests.RequestException as e:
+            logger.error(f"Session {session_id}: failed to stop n8n execution {execution_id}: {e}")
+            if execution_id is None:
+                return False
+            execution_ids = [str(execution_id)]
+
+        stopped = all(self.wait_finished(running_id) for running_id in execution_ids)
+        if not stopped:
+            logger.warning(f"Session {session_id}: n8n execution(s) {execution_ids} still running "
+                           f"after {self.wait:g}s; the FHIR server may still be written to")
+        return stopped
@@ -0,0 +1,162 @@
+"""
+Parallel evaluation runner
+Every task wipes and re-seeds its FHIR server, so tasks can only run
+concurrently when each worker owns a FHIR base URL: either a HAPI partition
+(URL-based tenants, hapi.fhir.partitioning.request_tenant_partitioning_mode)
+or a server from a pool.
+
+Tasks are handed out longest-first from a shared queue (LPT scheduling) using
+the durations recorded by earlier runs, so long tasks don't end up at the
+tail of a worker's queue.
+
+With several trials per task the queue holds one round per trial, each in
+its own random order: trial k of every task is handed out before trial k+1
+of any, so drift over the run (time of day, API load) spreads evenly over
+tasks instead of landing on whichever task happens to run last.
+"""
+
+import json
+import logging
+import os
+import random
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import requests  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+# expected seconds for a task that has never been timed (when nothing was timed yet)
+DEFAULT_DURATION = 120.0
+
+
+def create_partitions(fhir_root: str, count: int, prefix: str = "EVAL", first_id: int = 1,
+                      headers: Optional[Dict[str, str]] = None) -> List[str]:
+    """
+    Make sure partitions <prefix><n> exist on a HAPI server running in
+    URL-tenant mode and return their base URLs (<fhir_root>/<prefix><n>).
+    """
+    fhir_root = fhir_root.rstrip("/")
+    urls = []
+    for n in range(first_id, first_id + count):
+        name = f"{prefix}{n}"
+        params = {
+            "resourceType": "Parameters",
+            "parameter": [
+                {"name": "id", "valueInteger": n},
+                {"name": "name", "valueCode": name},
+            ],
+        }
+        response = requests.post(f"{fhir_root}/DEFAULT/$partition-management-create-partition",
+                                 json=params, headers=headers)
+        if response.status_code not in (200, 201) and "already" not in response.text:
+            raise Exception(f"Failed to create partition {name}: {response.status_code} {response.text}")
+        urls.append(f"{fhir_root}/{name}")
+    return urls
+
+
+def load_durations(path: str) -> Dict[str, float]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_durations(path: str, durations: Dict[str, float]) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(durations, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def lpt_order(task_classes: List[type], durations: Dict[str, float]) -> List[type]:
+    """Longest expected duration first; untimed tasks are assumed to take the average."""
+    known = [durations[c.__name__] for c in task_classes if c.__name__ in durations]
+    default = sum(known) / len(known) if known else DEFAULT_DURATION
+    return sorted(task_classes, key=lambda c: durations.get(c.__name__, default), reverse=True)
+
+
+def trial_rounds(task_classes: List[type], trials: int, durations: Dict[str, float],
+                 balance: bool, seed: Optional[int] = None) -> List[Tuple[type, int]]:
+    """
+    (task_class, trial) pairs, round by round. A single trial keeps the
+    configured order; repeated trials shuffle every round. Rounds are
+    ordered longest-first when balancing (ties keep the shuffled order).
+    """
+    rng = random.Random(seed)
+    queue = []
+    for trial in range(trials):
+        round_ = list(task_classes)
+        if trials > 1:
+            rng.shuffle(round_)
+        if balance:
+            round_ = lpt_order(round_, durations)
+        queue.extend((task_class, trial) for task_class in round_)
+    return queue
+
+
+def run_parallel(task_classes: List[type],
+                 fhir_urls: List[str],
+                 run_task: Callable[[type, str, int], Optional[str]],
+                 durations_file: str,
+                 balance: bool = True,
+                 trials: int = 1,
+                 seed: Optional[int] = None,
+                 should_stop: Optional[Callable[[], Optional[str]]] = None) -> List[Tuple[type, int]]:
+    """
+    Run `run_task(task_class, fhir_url, trial)` `trials` times for every
+    task with one worker per FHIR base URL. `run_task` returns None when it
+    skipped the task (nothing is timed then). Durations are smoothed into
+    `durations_file` as tasks finish; the first worker exception is
+    re-raised once all workers stop.
+
+    Before each task `should_stop()` may return a reason to start no more
+    tasks; the (task_class, trial) pairs that were never started are returned.
+    """
+    durations = load_durations(durations_file)
+    queue = trial_rounds(task_classes, trials, durations, balance, seed)
+    lock = threading.Lock()
+    errors = []
+    not_started: List[Tuple[type, int]] = []
+
+    def worker(fhir_url: str) -> None:
+        while True:
+            with lock:
+                if not queue or errors:
+                    return
+                reason = should_stop() if should_stop else None
+                if reason:
+                    logger.warning(f"Not starting {len(queue)} remaining task(s): {reason}")
+                    not_started.extend(queue)
+                    queue.clear()
+                    return
+                task_class, trial = queue.pop(0)
+            start = time.perf_counter()
+            try:
+                ran = run_task(task_class, fhir_url, trial)
+            except Exception as e:
+                logger.exception(f"Task {task_class.__name__} failed on {fhir_url}")
+                with lock:
+                    errors.append(e)
+                return
+            elapsed = time.perf_counter() - start
+            if ran is None:
+                continue
+            with lock:
+                previous = durations.get(task_class.__name__)
+                durations[task_class.__name__] = elapsed if previous is None else 0.5 * previous + 0.5 * elapsed
+                save_durations(durations_file, durations)
+            logger.info(f"Task {task_class.__name__} (trial {trial}) finished on {fhir_url} in {elapsed:.1f}s")
+
+    threads = [threading.Thread(target=worker, args=(url,), name=f"eval-worker-{i}")
+               for i, url in enumerate(fhir_urls)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+    return not_started
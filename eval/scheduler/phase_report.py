@@ -0,0 +1,84 @@
+"""
+Phase report
+Where evaluation wall clock goes: the mean time and FHIR requests of every
+task phase (restore, cleanup, prepare, execute, fetch_log, validate) over the
+stored runs, with tasks ranked by harness overhead, i.e. everything but
+waiting for the agent.
+
+Command line:
+    python phase_report.py experiments/output/results.sqlite3 --agent n8n
+"""
+
+import argparse
+import json
+from typing import Any, Dict, List
+
+from results_store import AGENT_PHASES, ResultsStore
+
+
+def phase_report(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Per-task means of ResultsStore.rows() that carry phase timings, ranked
+    by harness time, plus each phase's total and share of all recorded time.
+    """
+    by_task: Dict[str, List[Dict[str, Any]]] = {}
+    for row in rows:
+        if row.get("phase_timings"):
+            by_task.setdefault(row["task_id"], []).append(row)
+
+    totals: Dict[str, Dict[str, float]] = {}
+    tasks = []
+    for task_id, task_rows in by_task.items():
+        n = len(task_rows)
+        phases: Dict[str, Dict[str, float]] = {}
+        for row in task_rows:
+            for name, timing in row["phase_timings"].items():
+                phase = phases.setdefault(name, {"mean_ms": 0.0, "mean_fhir_requests": 0.0})
+                phase["mean_ms"] += timing["ms"] / n
+                phase["mean_fhir_requests"] += timing["fhir_requests"] / n
+                total = totals.setdefault(name, {"ms": 0.0, "fhir_requests": 0})
+                total["ms"] += timing["ms"]
+                total["fhir_requests"] += timing["fhir_requests"]
+        harness_ms = sum(p["mean_ms"] for name, p in phases.items() if name not in AGENT_PHASES)
+        agent_ms = sum(p["mean_ms"] for name, p in phases.items() if name in AGENT_PHASES)
+        tasks.append({
+            "task_id": task_id,
+            "task_name": task_rows[0]["task_name"],
+            "runs": n,
+            "harness_ms": harness_ms,
+            "agent_ms": agent_ms,
+            "overhead_share": harness_ms / (harness_ms + agent_ms) if harness_ms + agent_ms else None,
+            "phases": phases,
+        })
+    tasks.sort(key=lambda t: t["harness_ms"], reverse=True)
+
+    overall_ms = sum(t["ms"] for t in totals.values())
+    for total in totals.values():
+        total["share"] = total["ms"] / overall_ms if overall_ms else 0.0
+    return {"phases": totals, "tasks": tasks}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rank tasks by harness overhead vs. agent time")
+    parser.add_argument("db", type=str, help="Path to the results SQLite file")
+    parser.add_argument("--agent", type=str, default=None)
+    parser.add_argument("--experiment", type=str, default=None)
+    parser.add_argument("--run_id", type=str, default=None)
+    parser.add_argument("--json", action="store_true", help="Print the full report as JSON")
+    args = parser.parse_args()
+
+    store = ResultsStore(args.db)
+    report = phase_report(store.rows(agent=args.agent, experiment=args.experiment, run_id=args.run_id))
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for name, total in sorted(report["phases"].items(), key=lambda item: item[1]["ms"], reverse=True):
+            print(f"{name:<10} {total['ms'] / 1000:>10.1f}s {total['share']:>7.1%} {total['fhir_requests']:>8} FHIR requests")
+        print()
+        print(f"{'task':<8} {'runs':>4} {'harness s':>10} {'agent s':>10} {'overhead':>9}  slowest harness phase")
+        for task in report["tasks"]:
+            harness = {name: p for name, p in task["phases"].items() if name not in AGENT_PHASES}
+            slowest = max(harness, key=lambda name: harness[name]["mean_ms"]) if harness else "-"
+            share = f"{task['overhead_share']:.1%}" if task["overhead_share"] is not None else "-"
+            print(f"{task['task_id']:<8} {task['runs']:>4} {task['harness_ms'] / 1000:>10.2f} "
+                  f"{task['agent_ms'] / 1000:>10.2f} {share:>9}  {slowest}")
@@ -0,0 +1,278 @@
+"""
+Evaluation results store
+Append-only SQLite table with one row per task run (the TaskResult, its
+flattened ExecutionResult metrics and the failure mode), so summaries over
+many runs and experiments are indexed queries instead of crawls over
+*_task_result.json files.
+
+Re-running a task appends a new row; aggregations use the newest row per
+(experiment, agent, task, trial) unless `latest=False`.
+
+Command line:
+    python results_store.py experiments/output/results.sqlite3 --group_by task_id
+"""
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# columns that can be filtered on / grouped by
+KEY_COLUMNS = ("run_id", "experiment", "agent", "task_id", "task_name", "trial", "workflow_name")
+# phases (TaskResult.phase_timings) spent waiting for the agent; the others are harness overhead
+AGENT_PHASES = ("execute",)
+
+
+class ResultsStore:
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS task_runs (
+            id                      INTEGER PRIMARY KEY,
+            run_id                  TEXT NOT NULL,
+            created                 REAL NOT NULL,
+            experiment              TEXT,
+            agent                   TEXT NOT NULL,
+            task_id                 TEXT NOT NULL,
+            task_name               TEXT,
+            trial                   INTEGER NOT NULL DEFAULT 0,
+            task_success            INTEGER NOT NULL,
+            assertion_error_message TEXT,
+            execution_success       INTEGER,
+            execution_id            TEXT,
+            workflow_name           TEXT,
+            response_msg            TEXT,
+            token_total             INTEGER,
+            total_exec_ms           REAL,
+            tool_call_total         INTEGER,
+            tool_call_counts        TEXT,
+            tool_exec_ms            TEXT,
+            tool_order              TEXT,
+            failure_mode            TEXT,
+            phase_timings           TEXT,
+            harness_ms              REAL,
+            agent_ms                REAL,
+            fhir_requests           INTEGER
+        );
+        CREATE INDEX IF NOT EXISTS task_runs_task ON task_runs (experiment, agent, task_id, trial, id);
+        CREATE INDEX IF NOT EXISTS task_runs_run ON task_runs (run_id);
+    """
+
+    # columns added after the first release: (name, type), applied to older files on open
+    MIGRATIONS = (
+        ("phase_timings", "TEXT"),
+        ("harness_ms", "REAL"),
+        ("agent_ms", "REAL"),
+        ("fhir_requests", "INTEGER"),
+    )
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._conn()
+        conn.executescript(self.SCHEMA)
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(task_runs)")}
+        for name, column_type in self.MIGRATIONS:
+            if name not in columns:
+                conn.execute(f"ALTER TABLE task_runs ADD COLUMN {name} {column_type}")
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared across threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # -- Writing -------------------------------------------------------------
+    def append(self,
+               task_result: Dict[str, Any],
+               run_id: str,
+               agent: str,
+               experiment: Optional[str] = None,
+               trial: int = 0,
+               failure_mode: Optional[Dict[str, Any]] = None,
+               created: Optional[float] = None) -> int:
+        """Store one task run (`task_result` as produced by dataclasses.asdict(TaskResult))."""
+        execution = task_result.get("execution_result") or {}
+        counts = execution.get("tool_call_counts")
+        phases = task_result.get("phase_timings")
+        row = {
+            "run_id": run_id,
+            "created": created or time.time(),
+            "experiment": experiment,
+            "agent": agent,
+            "task_id": task_result.get("task_id"),
+            "task_name": task_result.get("task_name"),
+            "trial": trial,
+            "task_success": int(bool(task_result.get("task_success"))),
+            "assertion_error_message": task_result.get("assertion_error_message"),
+            "execution_success": None if not execution else int(bool(execution.get("execution_success"))),
+            "execution_id": execution.get("execution_id"),
+            "workflow_name": execution.get("workflow_name"),
+            "response_msg": execution.get("response_msg"),
+            "token_total": execution.get("token_total"),
+            "total_exec_ms": execution.get("total_exec_ms"),
+            "tool_call_total": sum(counts.values()) if counts else None,
+            "tool_call_counts": _dumps(counts),
+            "tool_exec_ms": _dumps(execution.get("tool_exec_ms")),
+            "tool_order": _dumps(execution.get("tool_order")),
+            "failure_mode": _dumps(failure_mode),
+            "phase_timings": _dumps(phases),
+            "harness_ms": sum(t["ms"] for p, t in phases.items() if p not in AGENT_PHASES) if phases else None,
+            "agent_ms": sum(t["ms"] for p, t in phases.items() if p in AGENT_PHASES) if phases else None,
+            "fhir_requests": sum(t["fhir_requests"] for t in phases.values()) if phases else None,
+        }
+        columns = ", ".join(row)
+        placeholders = ", ".join("?" for _ in row)
+        cursor = self._conn().execute(f"INSERT INTO task_runs ({columns}) VALUES ({placeholders})",
+                                      tuple(row.values()))
+        return cursor.lastrowid
+
+    def import_results_dir(self, output_dir: str, agent: str, experiment: Optional[str] = None) -> int:
+        """
+        Append the *_<agent>[_trial<n>]_task_result.json files of `output_dir`
+        whose task and trial have no row yet (results written before the
+        store existed).
+        """
+        pattern = re.compile(rf"_{re.escape(agent)}(?:_trial(\d+))?_task_result\.json$")
+        known = {(r["task_id"], r["trial"]) for r in self.rows(agent=agent, experiment=experiment)}
+        imported = 0
+        for file in sorted(os.listdir(output_dir)):
+            match = pattern.search(file)
+            if match is None:
+                continue
+            trial = int(match.group(1) or 0)
+            path = os.path.join(output_dir, file)
+            with open(path) as f:
+                task_result = json.load(f)
+            if (task_result.get("task_id"), trial) in known:
+                continue
+            failure_mode = None
+            failure_file = path.replace("_task_result.json", "_failure_mode.json")
+            if os.path.exists(failure_file):
+                with open(failure_file) as f:
+                    failure_mode = json.load(f)
+            self.append(task_result, run_id="imported", agent=agent, experiment=experiment, trial=trial,
+                        failure_mode=failure_mode, created=os.path.getmtime(path))
+            imported += 1
+        return imported
+
+    def merge(self, other_path: str) -> int:
+        """
+        Copy the rows of another results store (e.g. one shard of a sweep)
+        into this one; rows already merged are skipped, so merging again is
+        harmless. Returns the number of rows added.
+        """
+        conn = self._conn()
+        conn.execute("ATTACH DATABASE ? AS other", (other_path,))
+        try:
+            ours = [r["name"] for r in conn.execute("PRAGMA main.table_info(task_runs)")]
+            theirs = {r["name"] for r in conn.execute("PRAGMA other.table_info(task_runs)")}
+            columns = ", ".join(c for c in ours if c != "id" and c in theirs)
+            cursor = conn.execute(
+                f"INSERT INTO main.task_runs ({columns}) SELECT {columns} FROM other.task_runs AS o "
+                "WHERE NOT EXISTS (SELECT 1 FROM main.task_runs AS m WHERE m.run_id = o.run_id "
+                "AND m.agent = o.agent AND m.task_id = o.task_id AND m.trial = o.trial AND m.created = o.created)"
+            )
+            return cursor.rowcount
+        finally:
+            conn.execute("DETACH DATABASE other")
+
+    # -- Reading -------------------------------------------------------------
+    @staticmethod
+    def _where(filters: Dict[str, Any]) -> Tuple[str, list]:
+        clauses, params = [], []
+        for column, value in filters.items():
+            if column not in KEY_COLUMNS:
+                raise ValueError(f"Unknown filter column: {column}")
+            if value is None:
+                continue
+            if isinstance(value, (list, tuple, set)):
+                clauses.append(f"{column} IN ({', '.join('?' for _ in value)})")
+                params.extend(value)
+            else:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def _source(self, latest: bool, filters: Dict[str, Any]) -> Tuple[str, list]:
+        """FROM clause over the matching rows, reduced to the newest per task/trial if `latest`."""
+        where, params = self._where(filters)
+        if not latest:
+            return f"(SELECT * FROM task_runs{where})", params
+        return (
+            "(SELECT * FROM ("
+            "  SELECT *, ROW_NUMBER() OVER ("
+            "    PARTITION BY experiment, agent, task_id, trial ORDER BY id DESC) AS recency"
+            f"  FROM task_runs{where}) WHERE recency = 1)",
+            params,
+        )
+
+    def rows(self, latest: bool = True, **filters: Any) -> List[Dict[str, Any]]:
+        source, params = self._source(latest, filters)
+        cursor = self._conn().execute(f"SELECT * FROM {source} ORDER BY task_id, trial, id", params)
+        return [_decode(dict(row)) for row in cursor]
+
+    def has_result(self, agent: str, task_id: str, trial: int = 0, experiment: Optional[str] = None) -> bool:
+        where, params = self._where({"agent": agent, "task_id": task_id, "trial": trial, "experiment": experiment})
+        return self._conn().execute(f"SELECT 1 FROM task_runs{where} LIMIT 1", params).fetchone() is not None
+
+    def summary(self, group_by: Sequence[str] = (), latest: bool = True, **filters: Any) -> List[Dict[str, Any]]:
+        """
+        Runs, successes, success rate and mean / max tokens and wall clock,
+        overall or per `group_by` columns.
+        """
+        for column in group_by:
+            if column not in KEY_COLUMNS:
+                raise ValueError(f"Unknown group_by column: {column}")
+        source, params = self._source(latest, filters)
+        keys = ", ".join(group_by)
+        sql = (
+            f"SELECT {keys + ', ' if keys else ''}"
+            "COUNT(*) AS runs, SUM(task_success) AS successes, "
+            "AVG(task_success) AS success_rate, "
+            "AVG(token_total) AS mean_token_total, MAX(token_total) AS max_token_total, "
+            "AVG(total_exec_ms) AS mean_exec_ms, MAX(total_exec_ms) AS max_exec_ms "
+            f"FROM {source}"
+            + (f" GROUP BY {keys} ORDER BY {keys}" if keys else "")
+        )
+        return [dict(row) for row in self._conn().execute(sql, params)]
+
+    def failures(self, latest: bool = True, **filters: Any) -> List[Dict[str, Any]]:
+        return [row for row in self.rows(latest, **filters) if not row["task_success"]]
+
+
+def _dumps(value: Any) -> Optional[str]:
+    return None if value is None else json.dumps(value)
+
+
+def _decode(row: Dict[str, Any]) -> Dict[str, Any]:
+    for column in ("tool_call_counts", "tool_exec_ms", "tool_order", "failure_mode", "phase_timings"):
+        if row.get(column) is not None:
+            row[column] = json.loads(row[column])
+    row.pop("recency", None)
+    return row
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarise stored evaluation results")
+    parser.add_argument("db", type=str, help="Path to the results SQLite file")
+    parser.add_argument("--group_by", type=str, nargs="*", default=["agent"], choices=KEY_COLUMNS)
+    parser.add_argument("--agent", type=str, default=None)
+    parser.add_argument("--experiment", type=str, default=None)
+    parser.add_argument("--run_id", type=str, default=None)
+    parser.add_argument("--all_runs", action="store_true", help="Aggregate every stored run, not just the newest per task")
+    args = parser.parse_args()
+
+    store = ResultsStore(args.db)
+    rows = store.summary(args.group_by, latest=not args.all_runs,
+                         agent=args.agent, experiment=args.experiment, run_id=args.run_id)
+    for row in rows:
+        print(json.dumps(row))
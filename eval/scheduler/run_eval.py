@@ -10,6 +10,14 @@ import yaml
 import importlib
 import requests
 import argparse
+from budget import BUDGET_EXCEEDED, Budget, Limits
+from fhir_memory_server import install, serve_in_background
+from fixture_snapshot import FixtureSnapshot
+from parallel_runner import create_partitions, run_parallel
+from phase_report import phase_report
+from results_store import ResultsStore
+from sharding import parse_shard, shard_entries
+from trial_stats import trial_summary
 
 argparse = argparse.ArgumentParser(description="Run evaluation tasks")
 argparse.add_argument(
@@ -31,6 +39,84 @@ argparse.add_argument(
     default="experiments/output",
     help="Directory to save the output files"
 )
+argparse.add_argument(
+    "--fixture_snapshot",
+    type=str,
+    default=None,
+    help="Directory for fixture snapshots; when set, only the difference to each task's fixtures is written to the FHIR server"
+)
+argparse.add_argument(
+    "--workers",
+    type=int,
+    default=1,
+    help="Number of tasks to run concurrently, each against its own FHIR base URL"
+)
+argparse.add_argument(
+    "--partitions",
+    action="store_true",
+    help="Give each worker its own HAPI partition (FHIR_SERVER_URL must be the root of a server in URL-tenant mode)"
+)
+argparse.add_argument(
+    "--fhir_pool",
+    type=str,
+    default=None,
+    help="Comma-separated FHIR base URLs, one per worker"
+)
+argparse.add_argument(
+    "--durations_file",
+    type=str,
+    default="experiments/task_durations.json",
+    help="Per-task durations from earlier runs, used to balance workers"
+)
+argparse.add_argument(
+    "--memory_fhir",
+    type=int,
+    default=None,
+    help="Run against in-memory FHIR servers listening on this port (one port per worker, counting up) instead of FHIR_SERVER_URL"
+)
+argparse.add_argument(
+    "--results_db",
+    type=str,
+    default=None,
+    help="SQLite results store every task run is appended to (default: <output_dir>/results.sqlite3)"
+)
+argparse.add_argument(
+    "--trials",
+    type=int,
+    default=1,
+    help="Run every task this many times, in interleaved rounds of shuffled tasks, and report pass@k / latency / token statistics"
+)
+argparse.add_argument(
+    "--seed",
+    type=int,
+    default=None,
+    help="Seed for the order of tasks within each trial round"
+)
+argparse.add_argument(
+    "--shard",
+    type=str,
+    default=None,
+    help="Run only shard i of N (e.g. 2/4) of the config's tasks, balanced by their expected_seconds; combine the shards with merge_results.py"
+)
+for scope in ("task", "run"):
+    argparse.add_argument(
+        f"--max_{scope}_seconds",
+        type=float,
+        default=None,
+        help=f"Wall-clock budget per {scope}; the agent request is aborted when it runs out"
+    )
+    argparse.add_argument(
+        f"--max_{scope}_tokens",
+        type=int,
+        default=None,
+        help=f"Token budget (token_total) per {scope}"
+    )
+    argparse.add_argument(
+        f"--max_{scope}_fhir_requests",
+        type=int,
+        default=None,
+        help=f"Budget of harness FHIR requests per {scope}"
+    )
 args = argparse.parse_args()
 agent = args.agent
 config_path = args.config
@@ -44,6 +130,14 @@ logger = logging.getLogger(__name__)
 
 load_dotenv()
 FHIR_SERVER_URL = os.getenv("FHIR_SERVER_URL")
+memory_fhir_urls = []
+if args.memory_fhir:
+    # agents reach the stand-ins over HTTP; the harness's own FHIR calls stay in-process
+    for i in range(max(args.workers, 1)):
+        httpd = serve_in_background(host="0.0.0.0", port=args.memory_fhir + i)
+        install(httpd.fhir.base_url, httpd.fhir)
+        memory_fhir_urls.append(httpd.fhir.base_url)
+    FHIR_SERVER_URL = memory_fhir_urls[0]
 # test FHIR_SERVER_URL 
 N8N_AGENT_URL = os.getenv("N8N_AGENT_URL")
 N8N_EXECUTION_URL = os.getenv("N8N_EXECUTION_URL")
@@ -57,12 +151,17 @@ HEADERS = {
 
 
 
-def load_tasks_from_config(config_path):
+def load_tasks_from_config(config_path, shard=None):
     with open(config_path, 'r') as f:
         config = yaml.safe_load(f)
 
+    tasks = config.get('tasks', [])
+    if shard is not None:
+        tasks = shard_entries(tasks, *shard)
+        logger.info(f"Shard {shard[0]}/{shard[1]}: {[task['class'] for task in tasks]}")
+
     task_configs = []
-    for task in config.get('tasks', []):
+    for task in tasks:
         module_name = task['module']
         class_name = task['class']
 
@@ -108,66 +207,106 @@ def test_n8n():
         raise Exception(f"N8N agent is not accessible: {str(e)}")
     return True
 
-task_configs = load_tasks_from_config(config_path)
+task_configs = load_tasks_from_config(config_path, parse_shard(args.shard) if args.shard else None)
 logger.info(f"Running eval with {len(task_configs)} tasks")
 logger.info(f"Running eval with agent: {agent}")
+# $expunge everything is server-wide, so it must not run inside a partition
+RESET_STRATEGIES = ["cascade", "parallel"] if args.partitions else None
+
+RUN_ID = uuid.uuid4().hex
+budget = Budget(
+    task=Limits(args.max_task_seconds, args.max_task_tokens, args.max_task_fhir_requests),
+    run=Limits(args.max_run_seconds, args.max_run_tokens, args.max_run_fhir_requests),
+)
+results_store = ResultsStore(args.results_db or os.path.join(output_dir, "results.sqlite3"))
+if os.path.isdir(output_dir):
+    imported = results_store.import_results_dir(output_dir, agent, experiment=config_path)
+    if imported:
+        logger.info(f"Imported {imported} earlier task results into {results_store.path}")
 
 if test_fhir_server():
     logger.info("FHIR server is accessible")
-if test_n8n():
+# the human agent never calls n8n, so offline runs (e.g. --memory_fhir) need no n8n at all
+if agent == "n8n" and test_n8n():
     logger.info("N8N agent/execution is accessible")
 
 
-for task_config in task_configs:
-   
-    # Initialise task
-    task_class = task_config["class"]
+def result_file(task_id, trial, kind="task_result"):
+    """Output file of one trial; the first trial keeps the single-run name."""
+    suffix = f"_trial{trial}" if trial else ""
+    return os.path.join(output_dir, f"task_{task_id}_{agent}{suffix}_{kind}.json")
 
+
+def run_task(task_class, fhir_server_url=FHIR_SERVER_URL, trial=0):
+    """Clean, seed, execute and validate one trial of a task; returns its id, or None if its result already exists."""
+
+    task_started = time.monotonic()
     # Logging extracted values
-    logger.info(f"Initialising task: {task_class.__name__}")
+    logger.info(f"Initialising task: {task_class.__name__} (trial {trial})")
 
     # Defining Task object with evaluation params
     task = task_class(
-        fhir_server_url = FHIR_SERVER_URL,
+        fhir_server_url = fhir_server_url,
         n8n_url = N8N_AGENT_URL,
         n8n_execution_url = N8N_EXECUTION_URL,
         n8n_system_prompt_file = N8N_SYSTEM_PROMPT_FILE,
-        n8n_multi_agent_prompt_file = N8N_MULTI_AGENT_PROMPT_FILE
+        n8n_multi_agent_prompt_file = N8N_MULTI_AGENT_PROMPT_FILE,
+        fhir_reset_strategies = RESET_STRATEGIES
     )
     
     task_id = task.get_task_id()
     # save ExecutionResult object to a json file
-    file_name = f"task_{task_id}_{agent}_task_result.json"
-    file_name = os.path.join(output_dir, file_name)
+    file_name = result_file(task_id, trial)
     os.makedirs(output_dir, exist_ok=True)
     # if file already exists, skip it.
     if os.path.exists(file_name):
-        logger.info(f"Task result already exists for task: {task_class.__name__}")
-        continue
+        logger.info(f"Task result already exists for task: {task_class.__name__} (trial {trial})")
+        return None
     
     
-    logger.info(f"Cleaning up test data for task: {task_class.__name__}")
-    task.cleanup_test_data()
+    snapshot = snapshots.get(fhir_server_url)
+    restored = False
+    if snapshot is not None:
+        with task.phase("restore"):
+            restored = snapshot.restore(task) is not None
+    if restored:
+        logger.info(f"Restored fixture snapshot for task: {task_class.__name__}")
+    else:
+        logger.info(f"Cleaning up test data for task: {task_class.__name__}")
+        with task.phase("cleanup"):
+            task.cleanup_test_data()
 
-    logger.info(f"Preparing test data for task: {task_class.__name__}")
-    task.prepare_test_data()
+        logger.info(f"Preparing test data for task: {task_class.__name__}")
+        with task.phase("prepare"), task.fhir_batch():
+            task.prepare_test_data()
 
     # Comment when needed
     if agent == "human":
         logger.info(f"Executing task on human agent: {task_class.__name__}")
-        exec_result = task.execute_human_agent()
+        with task.phase("execute"):
+            exec_result = task.get_oracle_result()
         logger.debug(f"Human response:")
         logger.debug(exec_result)
     if agent == "n8n":
         logger.info(f"Executing task on N8N: {task_class.__name__}")
-        exec_result = task.execute_n8n_agent()
+        with task.phase("execute"):
+            exec_result = task.execute_n8n_agent(timeout=budget.remaining_seconds(task_started))
         logger.debug(f"N8N response:")
         logger.debug(exec_result)
     
     logger.info(f"Validating response for task: {task_class.__name__}")
-    task_result = task.validate_response(exec_result)
+    with task.phase("validate"):
+        task_result = task.validate_response(exec_result)
+    task_result.phase_timings = task.phase_timings
     logger.debug(f"Task result:")
 
+    overruns = budget.charge(task_id, trial, time.monotonic() - task_started,
+                             exec_result.token_total, task.fhir.total)
+    if overruns:
+        logger.warning(f"Task {task_id} (trial {trial}) over budget: {'; '.join(overruns)}")
+        task_result.task_success = False
+        task_result.assertion_error_message = f"{BUDGET_EXCEEDED}: {'; '.join(overruns)}"
+
    
     with open(file_name, "w") as f:
         logger.info(f"Saving task result to {file_name}")
@@ -175,13 +314,13 @@ for task_config in task_configs:
         logger.info(f"Saving task result to {file_name}")
 
     
+    task_failure_mode = None
     if agent == "n8n":
         logger.info(f"Identifying failure mode for task: {task_class.__name__}")
         task_failure_mode = task.identify_failure_mode(task_result) # to be implemented in each tasks.
 
         if task_failure_mode is not None:
-            file_name = f"task_{task_result.task_id}_{agent}_failure_mode.json"
-            file_name = os.path.join(output_dir, file_name)
+            file_name = result_file(task_result.task_id, trial, "failure_mode")
             os.makedirs(output_dir, exist_ok=True)
             logger.info(f"Saving failure mode to {file_name}")
             with open(file_name, "w") as f:
@@ -189,30 +328,97 @@ for task_config in task_configs:
                 json.dump(asdict(task_failure_mode),f)
         else:
             logger.info(f"No failure mode identified for task: {task_class.__name__}")
-            
-
-# read all *_task_result.json files and summarise the success rate.
-task_results = []
-for file in os.listdir(output_dir):
-    if file.endswith(f"{agent}_task_result.json"):
-        file_path = os.path.join(output_dir, file)
-        with open(file_path, "r") as f:
-            task_result = json.load(f)
-            task_results.append(task_result)
-            task_success = task_result.get("task_success", False)
-            task_id = task_result.get("task_id", None)
-            task_name = task_result.get("task_name", None)
-            if not task_success:
-                logger.warning(f"Task {task_id} ({task_name}) failed")
-# calculate success rate
-success_count = sum(1 for result in task_results if result.get("task_success", False))
-total_count = len(task_results)
-# logger failed ones.
-for task_result in task_results:
-    if not task_result.get("task_success", False):
-        logger.warning(f"Task {task_result.get('task_id', None)} ({task_result.get('task_name', None)}) failed")
+
+    results_store.append(
+        asdict(task_result),
+        run_id=RUN_ID,
+        agent=agent,
+        experiment=config_path,
+        trial=trial,
+        failure_mode=asdict(task_failure_mode) if task_failure_mode is not None else None,
+    )
+    logger.info(f"FHIR requests for task {task_id}: {task.fhir.total} {dict(task.fhir.counts)}")
+    logger.info(f"Phases for task {task_id}: " + ", ".join(
+        f"{name} {timing['ms'] / 1000:.2f}s/{timing['fhir_requests']} req" for name, timing in task.phase_timings.items()))
+    return task_id
+
+
+if args.memory_fhir:
+    fhir_urls = memory_fhir_urls
+elif args.workers > 1 or args.fhir_pool:
+    # tasks wipe their FHIR server, so every worker needs its own base URL
+    if args.fhir_pool:
+        fhir_urls = [url.strip() for url in args.fhir_pool.split(",") if url.strip()]
+    elif args.partitions:
+        fhir_urls = create_partitions(FHIR_SERVER_URL, args.workers, headers=HEADERS)
+    else:
+        raise Exception("--workers > 1 needs --partitions or --fhir_pool")
+    fhir_urls = fhir_urls[:args.workers] if args.workers > 1 else fhir_urls
+else:
+    fhir_urls = [FHIR_SERVER_URL]
+logger.info(f"Running eval with {len(fhir_urls)} worker(s): {fhir_urls}")
+
+snapshots = {url: FixtureSnapshot(url, args.fixture_snapshot) for url in fhir_urls} if args.fixture_snapshot else {}
+not_started = run_parallel(
+    [task_config["class"] for task_config in task_configs],
+    fhir_urls,
+    run_task,
+    durations_file=args.durations_file,
+    balance=len(fhir_urls) > 1,
+    trials=args.trials,
+    seed=args.seed,
+    should_stop=budget.exhausted,
+)
+
+
+budget_report = budget.report()
+budget_report["not_started"] = [{"task": task_class.__name__, "trial": trial} for task_class, trial in not_started]
+spent = budget_report["spent"]
+logger.info(f"Budget spent: {spent['seconds']:.1f}s, {spent['tokens']} tokens, "
+            f"{spent['fhir_requests']} FHIR requests over {spent['tasks']} task(s)")
+for overrun in budget_report["over_budget"]:
+    logger.warning(f"Task {overrun['task_id']} (trial {overrun['trial']}) over budget: {'; '.join(overrun['reasons'])}")
+if budget_report["stopped"]:
+    logger.warning(f"Run budget exhausted ({budget_report['stopped']}); {len(not_started)} task(s) not started")
+budget_file = os.path.join(output_dir, f"budget_report_{agent}.json")
+with open(budget_file, "w") as f:
+    json.dump(budget_report, f, indent=2)
+logger.info(f"Saved budget report to {budget_file}")
+
+# where this run's wall clock went
+phases = phase_report(results_store.rows(run_id=RUN_ID))
+for name, total in sorted(phases["phases"].items(), key=lambda item: item[1]["ms"], reverse=True):
+    logger.info(f"Phase {name}: {total['ms'] / 1000:.1f}s ({total['share']:.1%}), {total['fhir_requests']} FHIR requests")
+for task in phases["tasks"][:5]:
+    logger.info(f"Harness overhead of task {task['task_id']}: {task['harness_ms'] / 1000:.2f}s vs. agent {task['agent_ms'] / 1000:.2f}s")
+
+# summarise the newest result of every task from the results store
+for failed in results_store.failures(agent=agent, experiment=config_path):
+    logger.warning(f"Task {failed['task_id']} ({failed['task_name']}) failed")
+summary = results_store.summary(agent=agent, experiment=config_path)[0]
+total_count = summary["runs"]
+success_count = summary["successes"] or 0
 logger.info(f"Total tasks executed: {total_count}")
 logger.info(f"Total tasks succeeded: {success_count}")
 logger.info(f"Total tasks failed: {total_count - success_count}")
 success_rate = success_count / total_count * 100 if total_count > 0 else 0
-logger.info(f"Success rate: {success_rate:.2f}%")
\ No newline at end of file
+logger.info(f"Success rate: {success_rate:.2f}%")
+
+if args.trials > 1:
+    stats = trial_summary(results_store.rows(agent=agent, experiment=config_path))
+    overall = stats["overall"]
+    if not overall["tasks"]:
+        # e.g. every task was skipped or the run budget ran out before any started
+        logger.info("No trial results to summarize")
+    else:
+        for k, pass_k in overall["pass_at_k"].items():
+            logger.info(f"pass@{k}: {pass_k['mean']:.3f} (95% CI {pass_k['ci'][0]:.3f}-{pass_k['ci'][1]:.3f}, {pass_k['tasks']} tasks)")
+        for metric in ("total_exec_ms", "token_total"):
+            if overall[metric] is not None:
+                m = overall[metric]
+                logger.info(f"{metric}: mean {m['mean']:.1f} (95% CI {m['mean_ci'][0]:.1f}-{m['mean_ci'][1]:.1f}), "
+                            f"p95 {m['p95']:.1f} (95% CI {m['p95_ci'][0]:.1f}-{m['p95_ci'][1]:.1f})")
+    stats_file = os.path.join(output_dir, f"trial_summary_{agent}.json")
+    with open(stats_file, "w") as f:
+        json.dump(stats, f, indent=2)
+    logger.info(f"Saved trial statistics to {stats_file}")
@@ -0,0 +1,54 @@
+"""
+Sharded evaluation
+`run_eval.py --shard i/N` runs the i-th of N disjoint slices of the task
+config, so one sweep can be split across several FHIR + n8n stacks.
+
+The split only depends on the YAML: tasks are assigned longest-first to the
+least-loaded shard using the `expected_seconds` that generate_task_config.py
+copies from a durations file (tasks without one count as the average), with
+ties broken by module / class name. Every machine therefore computes the same
+assignment without talking to the others. All trials of a task stay on one
+shard, so per-task statistics need no cross-shard data.
+"""
+
+from typing import Any, Dict, List, Tuple
+
+from parallel_runner import DEFAULT_DURATION
+
+
+def parse_shard(value: str) -> Tuple[int, int]:
+    """"i/N" (1 <= i <= N) -> (i, N)."""
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise ValueError(f"--shard must look like i/N, got {value!r}")
+    if not 1 <= index <= count:
+        raise ValueError(f"--shard index must be between 1 and {count}, got {index}")
+    return index, count
+
+
+def expected_seconds(entries: List[Dict[str, Any]]) -> List[float]:
+    known = [float(e["expected_seconds"]) for e in entries if e.get("expected_seconds") is not None]
+    default = sum(known) / len(known) if known else DEFAULT_DURATION
+    return [float(e["expected_seconds"]) if e.get("expected_seconds") is not None else default for e in entries]
+
+
+def assign_shards(entries: List[Dict[str, Any]], count: int) -> List[List[Dict[str, Any]]]:
+    """Partition task config entries into `count` shards of similar expected duration (LPT)."""
+    durations = expected_seconds(entries)
+    order = sorted(range(len(entries)),
+                   key=lambda i: (-durations[i], entries[i]["module"], entries[i]["class"]))
+    shards: List[List[Dict[str, Any]]] = [[] for _ in range(count)]
+    loads = [0.0] * count
+    for i in order:
+        target = min(range(count), key=lambda s: (loads[s], s))
+        shards[target].append(entries[i])
+        loads[target] += durations[i]
+    # keep the config order within a shard
+    position = {id(entry): i for i, entry in enumerate(entries)}
+    return [sorted(shard, key=lambda e: position[id(e)]) for shard in shards]
+
+
+def shard_entries(entries: List[Dict[str, Any]], index: int, count: int) -> List[Dict[str, Any]]:
+    """The task config entries of shard `index` (1-based) of `count`."""
+    return assign_shards(entries, count)[index - 1]
@@ -4,11 +4,18 @@ from typing import Dict, Any, List, Optional, Tuple
 import uuid 
 import requests # type: ignore
 from dataclasses import dataclass
-from fetch_and_parse_n8n_execution_log import fetch_and_parse_n8n_execution_log
+from execution_log_collector import shared_collector
+from n8n_executions import N8nExecutions
+from fhir_client import FHIRClient
+from fhir_reset import FHIRReset, ResetReport
 import json
 import logging
+import os
+from contextlib import contextmanager
 from datetime import datetime
 
+from n8n_analytics import parse_n8n_execution_log_stream
+
 logger = logging.getLogger(__name__)
 
 
@@ -36,9 +43,26 @@ class TaskResult:
     task_id: Optional[str] = None
     task_name: Optional[str] = None
     execution_result: Optional[ExecutionResult] = None
+    # phase -> {"ms", "fhir_requests"}, see TaskInterface.phase()
+    phase_timings: Optional[Dict[str, Dict[str, float]]] = None
     
 
 
+@dataclass
+class BundleEntryResult:
+    """Outcome of one resource submitted through fhir_batch()."""
+    resource_type: str
+    resource_id: Optional[str]
+    status: Optional[str] = None       # e.g. "201 Created", "400 Bad Request"
+    success: bool = False
+    outcome: Optional[Dict[str, Any]] = None   # OperationOutcome for failed entries
+    version: Optional[str] = None              # versionId the server assigned
+
+
+class FixtureCaptureError(Exception):
+    """prepare_test_data() needs the server while its resources are only being captured."""
+
+
 @dataclass
 class TaskFailureMode:
     incorrect_tool_selection: Optional[bool] = None
@@ -50,17 +74,25 @@ class TaskFailureMode:
 
 
 class TaskInterface(ABC):
+    # False for tasks whose prepare_test_data() waits for the server to index
+    # what it wrote: a snapshot restore has no such wait, so they always run
+    # the full cleanup + prepare (see capture_test_data())
+    SNAPSHOT_FIXTURES = True
+
     def __init__(self,
                 fhir_server_url,
                 n8n_url,
                 n8n_execution_url,
                 n8n_system_prompt_file=None,
-                n8n_multi_agent_prompt_file=None):
+                n8n_multi_agent_prompt_file=None,
+                fhir_reset_strategies=None):
 
         self.FHIR_SERVER_URL = fhir_server_url
         self.N8N_AGENT_URL = n8n_url
         self.N8N_EXECUTION_URL = n8n_execution_url
         self.N8N_MULTI_AGENT_PROMPT_FILE = n8n_multi_agent_prompt_file
+        self.FHIR_RESET_STRATEGIES = fhir_reset_strategies or os.getenv(
+            "FHIR_RESET_STRATEGIES", "expunge,cascade,parallel").split(",")
         # Eval parameters
         self.required_tool_call_sets = self.get_required_tool_call_sets() or []
         self.required_resource_types = self.get_required_resource_types() or []
@@ -72,6 +104,8 @@ class TaskInterface(ABC):
             "Content-Type": "application/fhir+json",
             "Accept": "application/fhir+json"
         }
+        # pooled, retrying client shared by every FHIR call the task makes
+        self.fhir = FHIRClient(self.FHIR_SERVER_URL, self.HEADERS)
 
         self.RESOURCE_TYPES = [
             "Patient",
@@ -87,6 +121,19 @@ class TaskInterface(ABC):
             "Schedule",
             "Appointment",
         ]
+
+        # Bundle seeding, see fhir_batch()
+        self.FHIR_BATCH_SIZE = int(os.getenv("FHIR_BATCH_SIZE", 100))
+        self.FHIR_BATCH_TYPE = os.getenv("FHIR_BATCH_TYPE", "transaction")
+        self._fhir_batch: Optional[List[Dict[str, Any]]] = None
+        self._fhir_batch_depth = 0
+        self._fhir_capture = False
+        self.fhir_batch_results: List[BundleEntryResult] = []
+        self.last_reset: Optional[ResetReport] = None
+        self._oracle_result: Optional[ExecutionResult] = None
+        # per-phase wall clock and FHIR requests, see phase()
+        self.phase_timings: Dict[str, Dict[str, float]] = {}
+        self._phase_stack: List[List[float]] = []
         
 
     def get_resource_ids(self, resource_type):
@@ -94,7 +141,7 @@ class TaskInterface(ABC):
         url = f"{self.FHIR_SERVER_URL}/{resource_type}?_count=1000"
         resource_ids = []
         while url:
-            response = requests.get(url, headers=self.HEADERS)
+            response = self.fhir.get(url)
             if response.status_code != 200:
                 logger.error(f"Failed to fetch {resource_type}: {response.status_code}")
                 break
@@ -122,7 +169,7 @@ class TaskInterface(ABC):
         # Find any resources that reference this one
         url = f"{self.FHIR_SERVER_URL}/{resource_type}/{resource_id}"
         rev_url = f"{self.FHIR_SERVER_URL}/{resource_type}?_id={resource_id}&_revinclude:iterate=*"
-        response = requests.get(rev_url, headers=self.HEADERS)
+        response = self.fhir.get(rev_url)
         if response.status_code != 200:
             logger.error(f"Failed to revinclude for {url}")
             logger.error(response.json())
@@ -137,49 +184,29 @@ class TaskInterface(ABC):
                 self.delete_resource(child_type, child_id)
         
         # Now delete the resource itself
-        del_response = requests.delete(url, headers=self.HEADERS)
+        del_response = self.fhir.delete(url)
         logger.debug(f"DELETE {url}: {del_response.status_code}")
-        time.sleep(0.1)  # avoid overwhelming the server
         
         
-    def delete_all_resources(self):
-        """Deletes all resources of the specified types in the correct order to handle dependencies."""
-        # Define the order of deletion based on dependencies
-        # Resources that depend on others should be deleted first
-        # Not necessary b/c delete_resource handles dependencies
-        # But it is more efficient to delete in this order.
-        deletion_order = [
-            "Appointment",      # Depends on Patient, Practitioner, Location, Slot
-            "Slot",            # Depends on Schedule
-            "Schedule",        # Depends on Practitioner
-            "DocumentReference", # Depends on Patient, Practitioner
-            "Consent",         # Depends on Patient, Organization, DocumentReference
-            "Account",         # Depends on Patient, RelatedPerson
-            "RelatedPerson",   # Depends on Patient
-            "Coverage",        # Depends on Patient, Organization
-            "Procedure",       # Depends on Patient
-            "Condition",       # Depends on Patient
-            "ServiceRequest",  # Depends on Patient
-            "CarePlan",        # Depends on Patient, Encounter
-            "Location",        # No dependencies
-            "Organization",    # No dependencies
-            "Patient",         # No dependencies
-            "Practitioner",    # No dependencies
-        ]
-
-        for resource_type in deletion_order:
-            logger.debug(f"\nProcessing {resource_type} resources...")
-            resource_ids = self.get_resource_ids(resource_type)
-
-            if not resource_ids:
-                logger.debug(f"No {resource_type} resources found.")
-                continue
-
-            logger.debug(f"Deleting {len(resource_ids)} {resource_type} resources...")
-            for resource_id in resource_ids:
-                self.delete_resource(resource_type, resource_id)
-                # Add a small delay to prevent overwhelming the server
-                time.sleep(0.1)
+    def delete_all_resources(self) -> Optional[ResetReport]:
+        """
+        Wipes the FHIR server with the fastest operation it supports ($expunge,
+        cascading conditional delete, then a parallel dependency-ordered delete).
+        The strategy used and time-to-clean are kept in self.last_reset.
+        """
+        if self._fhir_capture:
+            return None     # a snapshot restore removes everything outside the fixture anyway
+        resetter = FHIRReset(
+            self.FHIR_SERVER_URL,
+            headers=self.HEADERS,
+            strategies=self.FHIR_RESET_STRATEGIES,
+            workers=int(os.getenv("FHIR_RESET_WORKERS", 8)),
+            on_conflict=self.delete_resource,
+            client=self.fhir,
+        )
+        self.last_reset = resetter.reset()
+        self._oracle_result = None
+        return self.last_reset
     
 
     def post_to_fhir(self,resource):
@@ -187,11 +214,7 @@ class TaskInterface(ABC):
         Posts a FHIR resource to the FHIR server.
         """
         url = f"{self.FHIR_SERVER_URL}/{resource['resourceType']}"
-        headers = {
-            "Content-Type": "application/fhir+json",
-            "Accept": "application/fhir+json",
-        }
-        response = requests.post(url, json=resource, headers=headers)
+        response = self.fhir.post(url, json=resource)
 
         if response.status_code in [200, 201]:
             return response
@@ -204,13 +227,17 @@ class TaskInterface(ABC):
     def upsert_to_fhir(self,resource):
         """
         Creates or updates a FHIR resource on the FHIR server with a specified ID.
+        Inside fhir_batch() the resource is queued instead and None is returned.
         """
+        if self._fhir_batch is not None:
+            self._fhir_batch.append(resource)
+            if len(self._fhir_batch) >= self.FHIR_BATCH_SIZE and not self._fhir_capture:
+                self.flush_fhir_batch()
+            return None
+
         url = f"{self.FHIR_SERVER_URL}/{resource['resourceType']}/{resource['id']}"
-        headers = {
-            "Content-Type": "application/fhir+json",
-            "Accept": "application/fhir+json",
-        }
-        response = requests.put(url, json=resource, headers=headers)
+        response = self.fhir.put(url, json=resource)
+        self._oracle_result = None
 
         if response.status_code in [200, 201]:
             logger.debug(
@@ -222,8 +249,142 @@ class TaskInterface(ABC):
                 f"Failed to upsert {resource['resourceType']} with ID {resource['id']}: {response.status_code} {response.text}"
             )
             return response
+
+
+    @contextmanager
+    def phase(self, name: str):
+        """
+        Time one stage of the task (cleanup, prepare, execute, fetch_log,
+        validate, ...) into self.phase_timings: wall clock in ms and FHIR
+        requests, accumulated if the phase repeats. A phase nested in another
+        is subtracted from the outer one, so the phases add up to the total.
+        """
+        # start, FHIR requests at start, nested ms, nested FHIR requests
+        frame = [time.perf_counter(), self.fhir.total, 0.0, 0]
+        self._phase_stack.append(frame)
+        try:
+            yield self
+        finally:
+            self._phase_stack.pop()
+            ms = (time.perf_counter() - frame[0]) * 1000
+            fhir_requests = self.fhir.total - frame[1]
+            timing = self.phase_timings.setdefault(name, {"ms": 0.0, "fhir_requests": 0})
+            timing["ms"] += ms - frame[2]
+            timing["fhir_requests"] += fhir_requests - frame[3]
+            if self._phase_stack:
+                self._phase_stack[-1][2] += ms
+                self._phase_stack[-1][3] += fhir_requests
+
+
+    @contextmanager
+    def fhir_batch(self):
+        """
+        Queue every upsert_to_fhir() in the block and send them as FHIR Bundles
+        (FHIR_BATCH_TYPE, default `transaction`) of FHIR_BATCH_SIZE entries,
+        instead of one PUT per resource. Queued resources are sent on exit;
+        call flush_fhir_batch() first if the block needs to read them back.
+        Per-entry outcomes are collected in self.fhir_batch_results.
+        """
+        if self._fhir_batch_depth == 0:
+            self._fhir_batch = []
+            self.fhir_batch_results = []
+        self._fhir_batch_depth += 1
+        try:
+            yield self
+            if self._fhir_batch_depth == 1:
+                self.flush_fhir_batch()
+        finally:
+            self._fhir_batch_depth -= 1
+            if self._fhir_batch_depth == 0:
+                self._fhir_batch = None
+
+
+    def flush_fhir_batch(self) -> List[BundleEntryResult]:
+        """Send the queued resources now and return their per-entry results."""
+        if self._fhir_capture:
+            raise FixtureCaptureError(f"Task {self.get_task_id()} reads its fixtures back while preparing them")
+        if not self._fhir_batch:
+            return []
+        pending = list(self._fhir_batch)
+        self._fhir_batch.clear()
+        self._oracle_result = None
+
+        results = []
+        for i in range(0, len(pending), self.FHIR_BATCH_SIZE):
+            results.extend(self._post_bundle(pending[i:i + self.FHIR_BATCH_SIZE], self.FHIR_BATCH_TYPE))
+        self.fhir_batch_results.extend(results)
+
+        failed = [r for r in results if not r.success]
+        logger.debug(f"Bundle seeding: {len(results) - len(failed)}/{len(results)} resources upserted")
+        return results
+
+
+    def _post_bundle(self, resources, bundle_type) -> List[BundleEntryResult]:
+        bundle = {
+            "resourceType": "Bundle",
+            "type": bundle_type,
+            "entry": [{
+                "resource": resource,
+                "request": {"method": "PUT", "url": f"{resource['resourceType']}/{resource['id']}"},
+            } for resource in resources],
+        }
+        response = self.fhir.post(self.FHIR_SERVER_URL, json=bundle)
+
+        if response.status_code not in [200, 201]:
+            if bundle_type == "transaction":
+                # all-or-nothing: resend as a batch to find out which entries are at fault
+                logger.warning(
+                    f"Transaction of {len(resources)} resources failed ({response.status_code}), retrying as batch"
+                )
+                return self._post_bundle(resources, "batch")
+            logger.error(f"Failed to post {bundle_type} bundle: {response.status_code} {response.text}")
+            return [BundleEntryResult(r["resourceType"], r.get("id"), str(response.status_code)) for r in resources]
+
+        results = []
+        for resource, entry in zip(resources, response.json().get("entry", [])):
+            status = entry.get("response", {}).get("status", "")
+            etag = entry.get("response", {}).get("etag") or ""
+            result = BundleEntryResult(
+                resource_type=resource["resourceType"],
+                resource_id=resource.get("id"),
+                status=status,
+                success=status[:1] == "2",
+                outcome=entry.get("response", {}).get("outcome"),
+                version=etag.removeprefix("W/").strip('"') or None,
+            )
+            if not result.success:
+                logger.error(
+                    f"Failed to upsert {result.resource_type} with ID {result.resource_id}: {status} {result.outcome}"
+                )
+            results.append(result)
+        return results
             
 
+    def capture_test_data(self) -> Optional[List[Dict[str, Any]]]:
+        """
+        Run prepare_test_data() without writing anything and return the
+        resources it would upsert, or None if the task cannot be captured:
+        it opted out (SNAPSHOT_FIXTURES) or has to read its own fixtures back
+        (it calls flush_fhir_batch()).
+        """
+        if not self.SNAPSHOT_FIXTURES:
+            return None
+        self._fhir_batch, self._fhir_batch_depth, self._fhir_capture = [], 1, True
+        try:
+            self.prepare_test_data()
+            return list(self._fhir_batch)
+        except Exception as e:
+            # tasks re-wrap errors from prepare_test_data(), so look down the chain too
+            while e is not None and not isinstance(e, FixtureCaptureError):
+                e = e.__cause__ or e.__context__
+            if e is None:
+                raise
+            logger.debug(str(e))
+            return None
+        finally:
+            self._fhir_batch, self._fhir_batch_depth, self._fhir_capture = None, 0, False
+
+
     @abstractmethod
     def get_task_id(self) -> str:
         """Return the task ID"""
@@ -272,8 +433,13 @@ class TaskInterface(ABC):
         self.delete_all_resources()
         
 
-    def execute_n8n_agent(self) -> ExecutionResult:
-        """Execute the task on n8n workflowand and return results"""
+    def execute_n8n_agent(self, timeout: Optional[float] = None) -> ExecutionResult:
+        """
+        Execute the task on n8n workflowand and return results. The request
+        is aborted after `timeout` seconds in total (default N8N_AGENT_TIMEOUT).
+        """
+        if timeout is None:
+            timeout = float(os.getenv("N8N_AGENT_TIMEOUT", 600))
         prompt = self.get_prompt()
         logger.debug(prompt)
         session_id = str(uuid.uuid4())
@@ -307,24 +473,49 @@ class TaskInterface(ABC):
                 "session_id": session_id,
                 "fhir_server_url": self.FHIR_SERVER_URL,
             }
+        execution_id = None
+        sent = False
         try:
+            if timeout <= 0:
+                raise requests.Timeout("no wall clock left in the budget")
 
             #response = requests.post(self.N8N_AGENT_URL, json=payload)
 
-            # TESTING
-            print("calling python server")
-            SCHEDULER_PROXY_URL = "http://localhost:8000/eval/scheduler"
-            response = requests.post(SCHEDULER_PROXY_URL, json=payload)
+            proxy_url = os.getenv("SCHEDULER_PROXY_URL", "http://localhost:8000/eval/scheduler")
+            logger.debug(f"calling {proxy_url}")
+            # the read timeout only bounds the gap between chunks; the deadline bounds the whole response
+            deadline = time.monotonic() + timeout
+            sent = True
+            with requests.post(proxy_url, json=payload, stream=True, timeout=timeout) as response:
+                execution_id = response.headers.get('execution_id')
+                body = bytearray()
+                try:
+                    for chunk in response.iter_content(chunk_size=64 * 1024):
+                        body.extend(chunk)
+                        if time.monotonic() > deadline:
+                            raise requests.Timeout(f"no complete response within {timeout:g}s")
+                except requests.ConnectionError as e:
+                    # requests reports a read timeout while streaming as a ConnectionError
+                    if time.monotonic() < deadline:
+                        raise
+                    raise requests.Timeout(str(e)) from e
 
             if response.status_code == 200:
                 success = True
-                response_msg = response.json()[0]['output']
+                response_msg = json.loads(body)[0]['output']
                 # get response header
                 execution_id = response.headers['execution_id']
             else:
                 success = False
-                response_msg = f"Error: {response.status_code} - {response.text}"
-                execution_id = response.headers['execution_id'] if 'execution_id' in response.headers else None
+                response_msg = f"Error: {response.status_code} - {body.decode(errors='replace')}"
+        except requests.Timeout as e:
+            # the execution id (if the headers arrived) still leads to the partial log
+            success = False
+            response_msg = f"Agent timed out after {timeout:g}s: {e}"
+            # closing the connection does not stop the workflow: stop it before
+            # this worker wipes the FHIR server for its next task
+            if sent and not N8nExecutions.from_env(self.N8N_EXECUTION_URL).stop_abandoned(execution_id, session_id):
+                response_msg += " (the n8n execution could not be confirmed stopped)"
         except Exception as e:
             success = False
             response_msg = f"Unexpected error: {str(e)}"
@@ -336,8 +527,11 @@ class TaskInterface(ABC):
             execution_id=execution_id
         )
 
-        execution_result = self.get_details_by_execution_id(execution_result)
+        with self.phase("fetch_log"):
+            execution_result = self.get_details_by_execution_id(execution_result)
 
+        # the agent wrote to the FHIR server behind our back
+        self._oracle_result = None
         return execution_result
             
     
@@ -346,6 +540,20 @@ class TaskInterface(ABC):
     def execute_human_agent(self) -> ExecutionResult:
         """Execute the expected actions that a human should perform"""
         pass
+
+
+    def get_oracle_result(self) -> ExecutionResult:
+        """
+        The human agent's answer for the current FHIR state, computed once.
+        Seeding or wiping data through this interface and running the n8n
+        agent invalidate it, so validate_response() always checks against
+        the state the agent left behind. The saving is in human mode, where
+        the human run and validate_response() share one set of FHIR queries;
+        in n8n mode the answer is computed once, after the agent.
+        """
+        if self._oracle_result is None:
+            self._oracle_result = self.execute_human_agent()
+        return self._oracle_result
     
 
 
@@ -357,15 +565,20 @@ class TaskInterface(ABC):
                 raise ValueError("Execution ID is None")
             # Fetch and parse the execution log
 
-            result = fetch_and_parse_n8n_execution_log(
-                execution_id=execution_id,
-                webhook_url=self.N8N_EXECUTION_URL
+            collector = shared_collector(
+                self.N8N_EXECUTION_URL,
+                cache_dir=os.getenv("N8N_LOG_CACHE_DIR", ".execution_logs"),
+                retries=int(os.getenv("N8N_LOG_RETRIES", 4)),
+                timeout=float(os.getenv("N8N_LOG_TIMEOUT", 30)),
             )
+            with collector.open(execution_id) as log:
+                result = parse_n8n_execution_log_stream(log)
             #print(result)
 
             
         except Exception as e:
-            logger.error(f"Error fetching execution log: {e}")
+            # the id is still saved with the result; execution_log_collector.py can fill the gap later
+            logger.error(f"Error fetching execution log {execution_result.execution_id}: {e}")
             result = {
                 "workflow_name": None,
                 #"raw_log": None,
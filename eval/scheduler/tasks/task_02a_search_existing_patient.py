@@ -1,7 +1,6 @@
 # task_02a_search_existing_patient.py
 
 import os
-import requests
 from typing import Dict, Any
 from task_interface import TaskInterface, TaskResult, ExecutionResult, TaskFailureMode
 
@@ -54,7 +53,7 @@ class SearchExistingPatientTask(TaskInterface):
             "birthdate": "1990-06-15"
         }
         
-        response = requests.get(
+        response = self.fhir.get(
             f"{self.FHIR_SERVER_URL}/Patient",
             headers=self.HEADERS,
             params=search_params
@@ -93,7 +92,7 @@ class SearchExistingPatientTask(TaskInterface):
             assert patient_id is not None, "Expected to find patient_id"
             
                 # slot id should be 
-            expected_patient_id = self.execute_human_agent().response_msg.split("<patient_id>")[1].split("</patient_id>")[0]
+            expected_patient_id = self.get_oracle_result().response_msg.split("<patient_id>")[1].split("</patient_id>")[0]
             assert patient_id == expected_patient_id, f"Expected patient_id {expected_patient_id}, got {patient_id}"
 
 
@@ -1,7 +1,6 @@
 # task_02b_search_nonexistent_patient.py
 
 import os
-import requests
 from typing import Dict, Any
 from task_interface import TaskInterface, TaskResult, ExecutionResult, TaskFailureMode
 
@@ -41,7 +40,7 @@ class SearchNonexistentPatientTask(TaskInterface):
             "birthdate": "1991-06-15"
         }
         
-        response = requests.get(
+        response = self.fhir.get(
             f"{self.FHIR_SERVER_URL}/Patient",
             headers=self.HEADERS,
             params=search_params
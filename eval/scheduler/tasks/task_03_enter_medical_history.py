@@ -1,6 +1,5 @@
 # task_03_enter_medical_history.py
 import os
-import requests
 from typing import Dict, Any
 from task_interface import TaskInterface, TaskResult, ExecutionResult, TaskFailureMode
 
@@ -53,7 +52,7 @@ Return the recorded condition's ID using the following format: <CONDITION>condit
             "clinicalStatus": { "coding": [{ "code": "active" }] }
         }
 
-        response = requests.post(
+        response = self.fhir.post(
             f"{self.FHIR_SERVER_URL}/Condition",
             headers=self.HEADERS,
             json=condition_data
@@ -75,7 +74,7 @@ Return the recorded condition's ID using the following format: <CONDITION>condit
     def validate_response(self, execution_result: ExecutionResult) -> TaskResult:
         try:
             # Verify the medical condition was created correctly
-            response = requests.get(
+            response = self.fhir.get(
                 f"{self.FHIR_SERVER_URL}/Condition",
                 headers=self.HEADERS,
                 params={"subject": "Patient/PAT001", "clinical-status": "active"}
@@ -1,6 +1,5 @@
 # eval/scheduler/task_04a_search_existing_medical_history.py
 import os
-import requests
 from typing import Dict, Any
 from task_interface import TaskInterface, TaskResult, ExecutionResult, TaskFailureMode
 
@@ -57,7 +56,7 @@ If found, return the condition's ID using the following format: <CONDITION>condi
             "subject": "Patient/PAT001"
         }
 
-        response = requests.get(
+        response = self.fhir.get(
             f"{self.FHIR_SERVER_URL}/Condition",
             headers=self.HEADERS,
             params=params
@@ -93,7 +92,7 @@ If found, return the condition's ID using the following format: <CONDITION>condi
 
             assert condition_id is not None, "Expected to find condition_id"
 
-            expected_condition_id = self.execute_human_agent().response_msg.split("<CONDITION>")[1].split("</CONDITION>")[0]
+            expected_condition_id = self.get_oracle_result().response_msg.split("<CONDITION>")[1].split("</CONDITION>")[0]
             assert condition_id == expected_condition_id, f"Expected condition_id {expected_condition_id}, got {condition_id}"
             
             return TaskResult(
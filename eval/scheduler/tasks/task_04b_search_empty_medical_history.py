@@ -1,6 +1,5 @@
 # eval/scheduler/task_04b_search_nonexistent_medical_history.py
 import os
-import requests
 from typing import Dict, Any
 from task_interface import TaskInterface, TaskResult, ExecutionResult, TaskFailureMode
 
@@ -42,7 +41,7 @@ If not, return this exact sentence: "No medical history found"
             "subject": "Patient/PAT002"
         }
 
-        response = requests.get(
+        response = self.fhir.get(
             f"{self.FHIR_SERVER_URL}/Condition",
             headers=self.HEADERS,
             params=params
@@ -1,6 +1,5 @@
 # eval/scheduler/task_05_enter_surgery_plan.py
 import os
-import requests
 from typing import Dict, Any
 from task_interface import TaskInterface, TaskResult, ExecutionResult, TaskFailureMode
 
@@ -56,7 +55,7 @@ Once done, return the surgery plan ID in the following format: <surgery_plan>sur
             "occurrenceDateTime": "2025-05-01"
         }
 
-        response = requests.post(
+        response = self.fhir.post(
             f"{self.FHIR_SERVER_URL}/ServiceRequest",
             headers=self.HEADERS,
             json=service_request
@@ -78,7 +77,7 @@ Once done, return the surgery plan ID in the following format: <surgery_plan>sur
     def validate_response(self, execution_result: ExecutionResult) -> TaskResult:
         try:
             # Verify the surgery plan was created correctly
-            response = requests.get(
+            response = self.fhir.get(
                 f"{self.FHIR_SERVER_URL}/ServiceRequest",
                 headers=self.HEADERS,
                 params={"subject": "Patient/PAT001", "status": "active"}
@@ -1,6 +1,5 @@
 # task_06a_search_existing_surgery_plan.py
 import os
-import requests
 from typing import Dict, Any
 from datetime import datetime, timedelta
 from task_interface import TaskInterface, TaskResult, ExecutionResult, TaskFailureMode
@@ -73,7 +72,7 @@ If found, return the surgery plan’s ID using the following format: <SURGERY_PL
             ]
         }
 
-        response = requests.get(
+        response = self.fhir.get(
             f"{self.FHIR_SERVER_URL}/ServiceRequest",
             headers=self.HEADERS,
             params=params
@@ -107,7 +106,7 @@ If found, return the surgery plan’s ID using the following format: <SURGERY_PL
             assert "</SURGERY_PLAN>" in response_msg, "Expected to find </SURGERY_PLAN> tag"
             surgery_plan_id = response_msg.split("<SURGERY_PLAN>")[1].split("</SURGERY_PLAN>")[0]
             assert surgery_plan_id is not None, "Expected to find surgery_plan_id"
-            expected_id = self.execute_human_agent().response_msg.split("<SURGERY_PLAN>")[1].split("</SURGERY_PLAN>")[0]
+            expected_id = self.get_oracle_result().response_msg.split("<SURGERY_PLAN>")[1].split("</SURGERY_PLAN>")[0]
             assert surgery_plan_id == expected_id, f"Expected surgery_plan_id {expected_id}, got {surgery_plan_id}"
 
             return TaskResult(
@@ -1,6 +1,5 @@
 # task_06b_search_nonexistent_surgery_plan.py
 import os
-import requests
 from typing import Dict, Any
 from datetime import datetime, timedelta
 from task_interface import TaskInterface, TaskResult, ExecutionResult, TaskFailureMode
@@ -85,7 +84,7 @@ If none found, return the exact sentence: No surgery plan found.
             ]
         }
 
-        response = requests.get(
+        response = self.fhir.get(
             f"{self.FHIR_SERVER_URL}/ServiceRequest",
             headers=self.HEADERS,
             params=params
@@ -1,6 +1,5 @@
 # task_07_enter_insurance.py
 import os
-import requests
 from typing import Dict, Any
 from task_interface import TaskInterface, TaskResult, ExecutionResult, TaskFailureMode
 
@@ -62,7 +61,7 @@ After creating the coverage, return the newly created Coverage ID using the foll
                 }]
             }
             
-            related_person_response = requests.post(
+            related_person_response = self.fhir.post(
                 f"{self.FHIR_SERVER_URL}/RelatedPerson",
                 headers=self.HEADERS,
                 json=related_person_payload
@@ -78,7 +77,7 @@ After creating the coverage, return the newly created Coverage ID using the foll
 
             # Step 2: Find insurance organization
             org_params = {"name": "Acme Health Insurance"}
-            org_response = requests.get(
+            org_response = self.fhir.get(
                 f"{self.FHIR_SERVER_URL}/Organization",
                 headers=self.HEADERS,
                 params=org_params
@@ -151,7 +150,7 @@ After creating the coverage, return the newly created Coverage ID using the foll
     def validate_response(self, execution_result: ExecutionResult) -> TaskResult:
         try:
             # Verify the insurance coverage was created correctly
-            response = requests.get(
+            response = self.fhir.get(
                 f"{self.FHIR_SERVER_URL}/Coverage",
                 headers=self.HEADERS,
                 params={"beneficiary": "Patient/PAT001", "status": "active"}
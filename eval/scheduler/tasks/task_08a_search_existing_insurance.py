@@ -1,11 +1,13 @@
 # task_08a_search_existing_insurance.py
 import os
 import time
-import requests
 from typing import Dict, Any
 from task_interface import TaskInterface, TaskResult, ExecutionResult, TaskFailureMode
 
 class SearchExistingInsuranceTask(TaskInterface):
+    # prepare_test_data() waits for HAPI to index the fixtures (issue #77)
+    SNAPSHOT_FIXTURES = False
+
     def get_task_id(self) -> str:
         return "8a"
 
@@ -73,6 +75,7 @@ If found, return the coverage ID using the following format: <COVERAGE>coverage_
                 ]
             }
             self.upsert_to_fhir(coverage_resource)
+            self.flush_fhir_batch()  # write the queued resources before waiting for indexing
             time.sleep(60) # hot fix for https://github.com/stormliucong/RESCUE-n8n/issues/77
         except Exception as e:
             raise Exception(f"Failed to prepare test data: {str(e)}")
@@ -84,7 +87,7 @@ If found, return the coverage ID using the following format: <COVERAGE>coverage_
             "status": "active"
         }
 
-        response = requests.get(
+        response = self.fhir.get(
             f"{self.FHIR_SERVER_URL}/Coverage",
             headers=self.HEADERS,
             params=params
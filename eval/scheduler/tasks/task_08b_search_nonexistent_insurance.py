@@ -1,6 +1,5 @@
 # task_08b_search_nonexistent_insurance.py
 import os
-import requests
 from typing import Dict, Any
 from task_interface import TaskInterface, TaskResult, ExecutionResult, TaskFailureMode
 
@@ -43,7 +42,7 @@ If none found, return the exact sentence: No insurance coverage found
             "status": "active"
         }
 
-        response = requests.get(
+        response = self.fhir.get(
             f"{self.FHIR_SERVER_URL}/Coverage",
             headers=self.HEADERS,
             params=params
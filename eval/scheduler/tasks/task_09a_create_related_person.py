@@ -1,6 +1,5 @@
 # task_09a_create_related_person.py
 import os
-import requests
 from typing import Dict, Any
 from task_interface import TaskInterface, TaskResult, ExecutionResult, TaskFailureMode
 
@@ -56,7 +55,7 @@ After creation, return the new RelatedPerson ID using the following format: <REL
             "birthDate": "1960-03-01"
         }
         
-        response = requests.post(
+        response = self.fhir.post(
             f"{self.FHIR_SERVER_URL}/RelatedPerson",
             headers=self.HEADERS,
             json=related_person_payload
@@ -79,7 +78,7 @@ After creation, return the new RelatedPerson ID using the following format: <REL
     def validate_response(self, execution_result: ExecutionResult) -> TaskResult:
         try:
             # Verify the related person was created correctly
-            response = requests.get(
+            response = self.fhir.get(
                 f"{self.FHIR_SERVER_URL}/RelatedPerson",
                 headers=self.HEADERS,
                 params={"patient": "Patient/PAT001"}
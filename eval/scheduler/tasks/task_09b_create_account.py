@@ -1,6 +1,5 @@
 # task_09b_create_account.py
 import os
-import requests
 from typing import Dict, Any
 from task_interface import TaskInterface, TaskResult, ExecutionResult, TaskFailureMode
 
@@ -43,7 +42,7 @@ After creation, return the new Account ID using the following format: <ACCOUNT>a
             "subject": {"reference": "Patient/PAT001"}
         }
         
-        response = requests.post(
+        response = self.fhir.post(
             f"{self.FHIR_SERVER_URL}/Account",
             headers=self.HEADERS,
             json=account_payload
@@ -67,7 +66,7 @@ After creation, return the new Account ID using the following format: <ACCOUNT>a
     def validate_response(self, execution_result: ExecutionResult) -> TaskResult:
         try:
             # Verify the account was created correctly
-            response = requests.get(
+            response = self.fhir.get(
                 f"{self.FHIR_SERVER_URL}/Account",
                 headers=self.HEADERS,
                 params={"subject": "Patient/PAT001"}
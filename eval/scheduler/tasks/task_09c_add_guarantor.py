@@ -1,6 +1,5 @@
 # task_09c_add_guarantor.py
 import os
-import requests
 from typing import Dict, Any
 from task_interface import TaskInterface, TaskResult, ExecutionResult, TaskFailureMode
 
@@ -60,7 +59,8 @@ After updating, return the account ID using the following format: <ACCOUNT>accou
                 "status": "active",
                 "subject": {"reference": "Patient/PAT001"}
             }
-            response = requests.post(
+            self.flush_fhir_batch()  # Account references the patient queued above
+            response = self.fhir.post(
                 f"{self.FHIR_SERVER_URL}/Account",
                 headers=self.HEADERS,
                 json=account_payload
@@ -84,7 +84,7 @@ After updating, return the account ID using the following format: <ACCOUNT>accou
         }
         
         # Update the account
-        response = requests.put(
+        response = self.fhir.put(
             f"{self.FHIR_SERVER_URL}/Account/ACC001",
             headers=self.HEADERS,
             json=update_payload
@@ -107,7 +107,7 @@ After updating, return the account ID using the following format: <ACCOUNT>accou
     def validate_response(self, execution_result: ExecutionResult) -> TaskResult:
         try:
             # Verify the account was updated correctly
-            response = requests.get(
+            response = self.fhir.get(
                 f"{self.FHIR_SERVER_URL}/Account/ACC001",
                 headers=self.HEADERS
             )
@@ -1,7 +1,6 @@
 # task_09d_create_an_existing_account.py
 import os
 import time
-import requests
 from typing import Dict, Any
 from task_interface import TaskInterface, TaskResult, ExecutionResult, TaskFailureMode
 
@@ -43,7 +42,7 @@ If the account for given patient is already created, Return "There is already an
 
     def execute_human_agent(self) -> ExecutionResult:
         # First verify the patient exists
-        patient_response = requests.get(
+        patient_response = self.fhir.get(
             f"{self.FHIR_SERVER_URL}/Patient/PAT001",
             headers=self.HEADERS
         )
@@ -55,7 +54,7 @@ If the account for given patient is already created, Return "There is already an
             )
 
         # Second check if the account already exists
-        account_response = requests.get(
+        account_response = self.fhir.get(
             f"{self.FHIR_SERVER_URL}/Account",
             headers=self.HEADERS,
             params={"subject": "Patient/PAT001"}
@@ -96,11 +95,11 @@ If the account for given patient is already created, Return "There is already an
             assert "</ACCOUNT>" in response_msg, "Expected to find </ACCOUNT> tag"
             account_id = response_msg.split("<ACCOUNT>")[1].split("</ACCOUNT>")[0]
             assert account_id is not None, "Expected to find account_id"
-            expected_id = self.execute_human_agent().response_msg.split("<ACCOUNT>")[1].split("</ACCOUNT>")[0]
+            expected_id = self.get_oracle_result().response_msg.split("<ACCOUNT>")[1].split("</ACCOUNT>")[0]
             assert account_id == expected_id, f"Expected account_id {expected_id}, got {account_id}"
 
             # Verify the account was not created
-            response = requests.get(
+            response = self.fhir.get(
                 f"{self.FHIR_SERVER_URL}/Account",
                 headers=self.HEADERS,
                 params={"subject": "Patient/PAT001"}
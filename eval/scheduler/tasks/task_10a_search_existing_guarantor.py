@@ -1,6 +1,5 @@
 # task_10a_search_existing_guarantor.py
 import os
-import requests
 from typing import Dict, Any
 from task_interface import TaskInterface, TaskResult, ExecutionResult, TaskFailureMode
 
@@ -68,7 +67,7 @@ If found, return the guarantor’s ID using the following format: <GUARANTOR>gua
             "patient": "Patient/PAT001"
         }
 
-        response = requests.get(
+        response = self.fhir.get(
             f"{self.FHIR_SERVER_URL}/Account",
             headers=self.HEADERS,
             params=params
@@ -112,7 +111,7 @@ If found, return the guarantor’s ID using the following format: <GUARANTOR>gua
             assert "<GUARANTOR>" in response_msg, "Expected to find <GUARANTOR> tag"
             assert "</GUARANTOR>" in response_msg, "Expected to find </GUARANTOR> tag"
             guarantor_id = response_msg.split("<GUARANTOR>")[1].split("</GUARANTOR>")[0]
-            expected_id = self.execute_human_agent().response_msg.split("<GUARANTOR>")[1].split("</GUARANTOR>")[0]
+            expected_id = self.get_oracle_result().response_msg.split("<GUARANTOR>")[1].split("</GUARANTOR>")[0]
             assert guarantor_id == expected_id, f"Expected guarantor_id {expected_id}, got {guarantor_id}"
            
             return TaskResult(
@@ -1,6 +1,5 @@
 # task_10b_search_nonexistent_guarantor.py
 import os
-import requests
 from typing import Dict, Any
 from task_interface import TaskInterface, TaskResult, ExecutionResult, TaskFailureMode
 
@@ -46,7 +45,7 @@ If none found, return the exact sentence: "No guarantor found for patient PAT002
             "patient": "Patient/PAT002"
         }
 
-        response = requests.get(
+        response = self.fhir.get(
             f"{self.FHIR_SERVER_URL}/Account",
             headers=self.HEADERS,
             params=params
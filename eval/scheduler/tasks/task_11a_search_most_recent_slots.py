@@ -1,7 +1,6 @@
 # task_11a_search_most_recent_slots.py
 
 import os
-import requests
 from typing import Dict, Any
 from datetime import datetime, timedelta
 from task_interface import TaskInterface, TaskResult, ExecutionResult, TaskFailureMode
@@ -162,7 +161,7 @@ If none found, return the exact sentence: 'No available slots found'
             "_sort": "start"
         }
         
-        response = requests.get(
+        response = self.fhir.get(
             f"{self.FHIR_SERVER_URL}/Slot",
             headers=self.HEADERS,
             params=params
@@ -197,7 +196,7 @@ If none found, return the exact sentence: 'No available slots found'
             assert "<SLOT>" in response_msg, "Expected to find <SLOT> tag"
             assert "</SLOT>" in response_msg, "Expected to find </SLOT> tag"
             slot_id = response_msg.split("<SLOT>")[1].split("</SLOT>")[0]
-            expected_id = self.execute_human_agent().response_msg.split("<SLOT>")[1].split("</SLOT>")[0]
+            expected_id = self.get_oracle_result().response_msg.split("<SLOT>")[1].split("</SLOT>")[0]
             assert slot_id == expected_id, f"Expected slot_id {expected_id}, got {slot_id}"
             
             return TaskResult(
@@ -1,7 +1,6 @@
 # task_11b_search_most_recent_slots_by_language.py
 
 import os
-import requests
 from typing import Dict, Any
 from datetime import datetime, timedelta
 from task_interface import TaskInterface, TaskResult, ExecutionResult, TaskFailureMode
@@ -168,7 +167,7 @@ Using the following format: <slot_id>SLOT0010</slot_id>
             "address-city": "Boston",
             "communication": "es"
         }
-        response = requests.get(
+        response = self.fhir.get(
             f"{self.FHIR_SERVER_URL}/Practitioner",
             headers=self.HEADERS,
             params=params
@@ -199,7 +198,7 @@ Using the following format: <slot_id>SLOT0010</slot_id>
                         "_sort": "start",
                         "schedule.actor:Practitioner": f"Practitioner/{practitioner_id}"
                     }
-                    response = requests.get(
+                    response = self.fhir.get(
                         f"{self.FHIR_SERVER_URL}/Slot",
                         headers=self.HEADERS,
                         params=params
@@ -247,7 +246,7 @@ Using the following format: <slot_id>SLOT0010</slot_id>
             assert slot_id is not None, "Expected to find slot_id"
             
             # slot id should be 
-            expected_slot_id = self.execute_human_agent().response_msg.split("<slot_id>")[1].split("</slot_id>")[0]
+            expected_slot_id = self.get_oracle_result().response_msg.split("<slot_id>")[1].split("</slot_id>")[0]
             assert slot_id == expected_slot_id, f"Expected slot_id {expected_slot_id}, got {slot_id}"
             
              
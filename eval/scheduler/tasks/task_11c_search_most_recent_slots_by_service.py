@@ -1,7 +1,6 @@
 # task_11c_search_most_recent_slots_by_service.py
 
 import os
-import requests
 from typing import Dict, Any
 from datetime import datetime, timedelta
 from task_interface import TaskInterface, TaskResult, ExecutionResult, TaskFailureMode
@@ -161,7 +160,7 @@ If none found, return the exact sentence: No available genetic counseling slots
         schedule_params = {
             "specialty": "394580004"  # SNOMED CT code for Clinical genetics
         }
-        schedules_response = requests.get(
+        schedules_response = self.fhir.get(
             f"{self.FHIR_SERVER_URL}/Schedule",
             headers=self.HEADERS,
             params=schedule_params
@@ -183,7 +182,7 @@ If none found, return the exact sentence: No available genetic counseling slots
                     "status": "free",
                     "_sort": "start"
                 }
-                slots_response = requests.get(
+                slots_response = self.fhir.get(
                     f"{self.FHIR_SERVER_URL}/Slot",
                     headers=self.HEADERS,
                     params=slot_params
@@ -217,7 +216,7 @@ If none found, return the exact sentence: No available genetic counseling slots
                 
 
             response_msg = execution_result.response_msg
-            human_agent_response = self.execute_human_agent()
+            human_agent_response = self.get_oracle_result()
             if "<SLOT_COUNT>" not in human_agent_response.response_msg:
                 assert "no available slots" in response_msg.lower(), f"Expected 'No available genetic counseling slots found', got '{response_msg}'"
             else:
@@ -1,6 +1,5 @@
 # task_11d_search_most_recent_slots_by_provider.py
 import os
-import requests
 from typing import Dict, Any
 from datetime import datetime, timedelta
 from task_interface import TaskInterface, TaskResult, ExecutionResult, TaskFailureMode
@@ -159,7 +158,7 @@ If none found, return the exact sentence: No available slots found for Dr. Smith
             "family": "John",
             "given": "Smith"
         }
-        practitioner_response = requests.get(
+        practitioner_response = self.fhir.get(
             f"{self.FHIR_SERVER_URL}/Practitioner",
             headers=self.HEADERS,
             params=practitioner_params
@@ -184,7 +183,7 @@ If none found, return the exact sentence: No available slots found for Dr. Smith
         schedule_params = {
             "actor": f"Practitioner/{practitioner_id}"
         }
-        schedules_response = requests.get(
+        schedules_response = self.fhir.get(
             f"{self.FHIR_SERVER_URL}/Schedule",
             headers=self.HEADERS,
             params=schedule_params
@@ -206,7 +205,7 @@ If none found, return the exact sentence: No available slots found for Dr. Smith
                     "status": "free",
                     "_sort": "start"
                 }
-                slots_response = requests.get(
+                slots_response = self.fhir.get(
                     f"{self.FHIR_SERVER_URL}/Slot",
                     headers=self.HEADERS,
                     params=slot_params
@@ -241,7 +240,7 @@ If none found, return the exact sentence: No available slots found for Dr. Smith
             assert response_msg is not None, "Expected to find response message"
             response_msg = response_msg.strip()
             
-            human_agent_response = self.execute_human_agent()
+            human_agent_response = self.get_oracle_result()
             if "<SLOT_COUNT>" not in human_agent_response.response_msg:
                 assert "no available slots" in response_msg.lower(), f"Expected 'No available slots found for Dr. Smith John', got '{response_msg}'"
             else:
@@ -1,6 +1,5 @@
 # task_12a_search_urgent_slots.py
 import os
-import requests
 from typing import Dict, Any
 from datetime import datetime, timedelta
 from task_interface import TaskInterface, TaskResult, ExecutionResult, TaskFailureMode
@@ -81,7 +80,7 @@ If none found, return the exact sentence: No urgent slots available
             "status": "free"
         }
         
-        response = requests.get(
+        response = self.fhir.get(
             f"{self.FHIR_SERVER_URL}/Slot",
             headers=self.HEADERS,
             params=params
@@ -115,7 +114,7 @@ If none found, return the exact sentence: No urgent slots available
             response_msg = execution_result.response_msg
             assert response_msg is not None, "Expected to find response message"
             response_msg = response_msg.strip()
-            human_agent_response = self.execute_human_agent()
+            human_agent_response = self.get_oracle_result()
             if "<SLOT_COUNT>" not in human_agent_response.response_msg:
                 assert "no urgent slots available"  in response_msg.lower(), "Expected to find no available slots"
             else:
@@ -1,6 +1,5 @@
 # task_12c_search_followup_slots.py
 import os
-import requests
 from typing import Dict, Any
 from datetime import datetime, timedelta
 from task_interface import TaskInterface, TaskResult, ExecutionResult, TaskFailureMode
@@ -82,7 +81,7 @@ If none found, return the exact sentence: No available slots for next Friday
             "status": "free"
         }
         
-        response = requests.get(
+        response = self.fhir.get(
             f"{self.FHIR_SERVER_URL}/Slot",
             headers=self.HEADERS,
             params=params
@@ -114,7 +113,7 @@ If none found, return the exact sentence: No available slots for next Friday
             # Additional eval logic
             response_msg = execution_result.response_msg.strip()
             assert response_msg is not None, "Expected to find response message"
-            human_agent_response = self.execute_human_agent()
+            human_agent_response = self.get_oracle_result()
             if "<SLOT_IDS>" not in human_agent_response.response_msg:
                 assert "no available slots" in response_msg.lower(), "Expected to find no available slots"
             else:
@@ -1,6 +1,5 @@
 # task_12d_search_wednesday_morning_slots.py
 import os
-import requests
 from typing import Dict, Any
 from datetime import datetime, timedelta
 from task_interface import TaskInterface, TaskResult, ExecutionResult, TaskFailureMode
@@ -84,7 +83,7 @@ If none found, return the exact sentence: No Wednesday morning slots found
                     "status": "free"
                 }
                 
-                response = requests.get(
+                response = self.fhir.get(
                     f"{self.FHIR_SERVER_URL}/Slot",
                     headers=self.HEADERS,
                     params=params
@@ -118,7 +117,7 @@ If none found, return the exact sentence: No Wednesday morning slots found
 
             response_msg = execution_result.response_msg.strip()
             assert response_msg is not None, "Expected to find response message"
-            human_agent_response = self.execute_human_agent()
+            human_agent_response = self.get_oracle_result()
             if "<SLOT_IDS>" not in human_agent_response.response_msg:
                 assert "no wednesday morning slots found" in response_msg.lower(), "Expected to find no available slots"
             else:
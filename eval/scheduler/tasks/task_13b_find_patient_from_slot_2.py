@@ -1,6 +1,5 @@
 # task_13a_find_patient_from_slot_2.py
 import os
-import requests
 from typing import Dict, Any
 from datetime import datetime, timedelta
 from task_interface import TaskInterface, TaskResult, ExecutionResult, TaskFailureMode
@@ -140,7 +139,7 @@ After finding, return the patient ID using the following format: <PATIENT_ID>pat
                 "schedule.actor.given": "Smith",
                 "schedule.actor.family": "John",
         }
-        response = requests.get(f"{self.FHIR_SERVER_URL}/Slot", headers=self.HEADERS, params=params)
+        response = self.fhir.get(f"{self.FHIR_SERVER_URL}/Slot", headers=self.HEADERS, params=params)
         if 'entry' not in response.json():
             return ExecutionResult(
                 execution_success=False,
@@ -148,9 +147,9 @@ After finding, return the patient ID using the following format: <PATIENT_ID>pat
             )
         slot_id = response.json()['entry'][0]['resource']['id']
         params = {"slot": f"Slot/{slot_id}"}
-        response = requests.get(f"{self.FHIR_SERVER_URL}/Appointment", headers=self.HEADERS, params=params)
+        response = self.fhir.get(f"{self.FHIR_SERVER_URL}/Appointment", headers=self.HEADERS, params=params)
         patient_id = response.json()['entry'][0]['resource']['participant'][0]['actor']['reference']
-        response = requests.get(f"{self.FHIR_SERVER_URL}/{patient_id}", headers=self.HEADERS)
+        response = self.fhir.get(f"{self.FHIR_SERVER_URL}/{patient_id}", headers=self.HEADERS)
 
         return ExecutionResult(
             execution_success=True,
@@ -169,7 +168,7 @@ After finding, return the patient ID using the following format: <PATIENT_ID>pat
             assert "<PATIENT_ID>" in response_msg, "Expected to find <PATIENT_ID> tag"
             assert "</PATIENT_ID>" in response_msg, "Expected to find </PATIENT_ID> tag"
             patient_id = response_msg.split("<PATIENT_ID>")[1].split("</PATIENT_ID>")[0]
-            expected_id = self.execute_human_agent().response_msg.split("<PATIENT_ID>")[1].split("</PATIENT_ID>")[0]
+            expected_id = self.get_oracle_result().response_msg.split("<PATIENT_ID>")[1].split("</PATIENT_ID>")[0]
             assert patient_id == expected_id, f"Expected patient_id {expected_id}, got {patient_id}"   
          
             return TaskResult(
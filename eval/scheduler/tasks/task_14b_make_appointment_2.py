@@ -1,7 +1,6 @@
 # task_14a_make_appointment_2.py
 import os
 import time
-import requests
 from typing import Dict, Any
 from datetime import datetime, timedelta
 from task_interface import TaskInterface, TaskResult, ExecutionResult, TaskFailureMode
@@ -123,7 +122,7 @@ After creating the appointment, return the new Appointment ID using the followin
             "start": start.strftime("%Y-%m-%dT%H:%M:%SZ"),
             "end": (start + timedelta(hours=1)).strftime("%Y-%m-%dT%H:%M:%SZ"),
         }
-        response = requests.put(f"{self.FHIR_SERVER_URL}/Appointment/APPOINTMENT002", headers=self.HEADERS, json=params)
+        response = self.fhir.put(f"{self.FHIR_SERVER_URL}/Appointment/APPOINTMENT002", headers=self.HEADERS, json=params)
         # Added logic
         appointment_id = response.json().get('id')
         assert response.status_code in [201, 200], f"Expected status code 201 or 200, but got {response.status_code}. Response body: {response.text}"
@@ -132,7 +131,7 @@ After creating the appointment, return the new Appointment ID using the followin
             "id": "SLOT002",
             "status": "busy",
         }
-        response = requests.put(f"{self.FHIR_SERVER_URL}/Slot/SLOT002", headers=self.HEADERS, json=params)
+        response = self.fhir.put(f"{self.FHIR_SERVER_URL}/Slot/SLOT002", headers=self.HEADERS, json=params)
         assert response.status_code in [200, 201], f"Expected status code 200 or 201, but got {response.status_code}. Response body: {response.text}"
 
         return ExecutionResult(
@@ -150,7 +149,7 @@ After creating the appointment, return the new Appointment ID using the followin
                 "practitioner": "Practitioner/PROVIDER002",
                 "date": start.strftime("%Y-%m-%dT%H:%M:%SZ"),
             }
-            response = requests.get(f"{self.FHIR_SERVER_URL}/Appointment", headers=self.HEADERS, params=params)
+            response = self.fhir.get(f"{self.FHIR_SERVER_URL}/Appointment", headers=self.HEADERS, params=params)
             # check the participant is correct
             assert 'entry' in response.json(), "Expected entry in the response"
             assert len(response.json()['entry']) == 1, "Expected one appointment" 
@@ -158,7 +157,7 @@ After creating the appointment, return the new Appointment ID using the followin
             assert response.json()['entry'][0]['resource']['participant'][1]['actor']['reference'] == "Practitioner/PROVIDER002", "Expected practitioner reference to be PROVIDER002"
             # check the slot reference is busy
             slot_id = response.json()['entry'][0]['resource']['slot'][0]['reference']
-            response = requests.get(f"{self.FHIR_SERVER_URL}/{slot_id}", headers=self.HEADERS)
+            response = self.fhir.get(f"{self.FHIR_SERVER_URL}/{slot_id}", headers=self.HEADERS)
             assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}. Response body: {response.text}"
             assert response.json()['status'] == "busy", "Expected slot to be busy"
 
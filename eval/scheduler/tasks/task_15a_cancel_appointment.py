@@ -2,7 +2,6 @@
 
 import os
 import time
-import requests
 from typing import Dict, Any
 from datetime import datetime, timedelta
 from task_interface import TaskInterface, TaskResult, ExecutionResult, TaskFailureMode
@@ -113,7 +112,7 @@ After cancellation, return the cancelled appointment ID and freed slot ID using
             "patient": "Patient/PAT001",
             "status": "booked",
         }
-        response = requests.get(f"{self.FHIR_SERVER_URL}/Appointment", headers=self.HEADERS, params=params)
+        response = self.fhir.get(f"{self.FHIR_SERVER_URL}/Appointment", headers=self.HEADERS, params=params)
         assert response.status_code in [200, 201], f"Expected status code 200 or 201, but got {response.status_code}. Response body: {response.text}"
         assert 'entry' in response.json(), "Expected to find at least one appointment"
         
@@ -122,7 +121,7 @@ After cancellation, return the cancelled appointment ID and freed slot ID using
         earliest_start_date = datetime.max
         for appointment in response.json()['entry']:
             slot = appointment['resource']['slot'][0]['reference']
-            slot_response = requests.get(f"{self.FHIR_SERVER_URL}/{slot}", headers=self.HEADERS)
+            slot_response = self.fhir.get(f"{self.FHIR_SERVER_URL}/{slot}", headers=self.HEADERS)
             assert slot_response.status_code in [200, 201], f"Expected status code 200 or 201, but got {slot_response.status_code}. Response body: {slot_response.text}"
             start_date = slot_response.json()['start']
             if datetime.strptime(start_date, "%Y-%m-%dT%H:%M:%SZ") < earliest_start_date:
@@ -145,7 +144,7 @@ After cancellation, return the cancelled appointment ID and freed slot ID using
             "start": appointment_to_cancel['resource']['start'],
             "end": appointment_to_cancel['resource']['end'],
         }
-        response = requests.put(f"{self.FHIR_SERVER_URL}/Appointment/{appointment_id}", headers=self.HEADERS, json=params)
+        response = self.fhir.put(f"{self.FHIR_SERVER_URL}/Appointment/{appointment_id}", headers=self.HEADERS, json=params)
         assert response.status_code in [200, 201], f"Expected status code 200 or 201, but got {response.status_code}. Response body: {response.text}"
 
         # Update slot status back to free
@@ -157,7 +156,7 @@ After cancellation, return the cancelled appointment ID and freed slot ID using
             "end": (earliest_start_date + timedelta(hours=1)).strftime("%Y-%m-%dT%H:%M:%SZ"),
             "schedule": {"reference": "Schedule/SCHEDULE001"},
         }
-        response = requests.put(f"{self.FHIR_SERVER_URL}/Slot/{slot_id}", headers=self.HEADERS, json=params)
+        response = self.fhir.put(f"{self.FHIR_SERVER_URL}/Slot/{slot_id}", headers=self.HEADERS, json=params)
         assert response.status_code in [200, 201], f"Expected status code 200 or 201, but got {response.status_code}. Response body: {response.text}"
 
         return ExecutionResult(
@@ -178,14 +177,14 @@ After cancellation, return the cancelled appointment ID and freed slot ID using
                 "patient": "Patient/PAT001",
                 "status": "cancelled",
             }
-            response = requests.get(f"{self.FHIR_SERVER_URL}/Appointment", headers=self.HEADERS, params=params)
+            response = self.fhir.get(f"{self.FHIR_SERVER_URL}/Appointment", headers=self.HEADERS, params=params)
             assert response.status_code in [200, 201], f"Expected status code 200 or 201, but got {response.status_code}. Response body: {response.text}"
             assert 'entry' in response.json(), "Expected to find the cancelled appointment"
             assert len(response.json()['entry']) == 1, "Expected to find exactly one cancelled appointment"
             
             # Verify that the slot is now free
             slot_id = response.json()['entry'][0]['resource']['slot'][0]['reference']
-            response = requests.get(f"{self.FHIR_SERVER_URL}/{slot_id}", headers=self.HEADERS)
+            response = self.fhir.get(f"{self.FHIR_SERVER_URL}/{slot_id}", headers=self.HEADERS)
             assert response.status_code in [200, 201], f"Expected status code 200 or 201, but got {response.status_code}. Response body: {response.text}"
             assert response.json()['status'] == "free", "Expected slot to be free after cancellation"
 
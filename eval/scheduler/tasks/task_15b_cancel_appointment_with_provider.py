@@ -1,7 +1,6 @@
 # task_15b_cancel_appointment_with_provider.py
 import os
 import time
-import requests
 from typing import Dict, Any
 from datetime import datetime, timedelta
 from task_interface import TaskInterface, TaskResult, ExecutionResult, TaskFailureMode
@@ -135,7 +134,7 @@ After cancellation, return the cancelled appointment ID and freed slot ID using
             "practitioner": "Practitioner/PROVIDER001",
             "status": "booked",
         }
-        response = requests.get(f"{self.FHIR_SERVER_URL}/Appointment", headers=self.HEADERS, params=params)
+        response = self.fhir.get(f"{self.FHIR_SERVER_URL}/Appointment", headers=self.HEADERS, params=params)
         assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}. Response body: {response.text}"
         assert 'entry' in response.json(), "Expected to find at least one appointment"
         
@@ -144,7 +143,7 @@ After cancellation, return the cancelled appointment ID and freed slot ID using
         earliest_start_date = datetime.max
         for appointment in response.json()['entry']:
             slot = appointment['resource']['slot'][0]['reference']
-            slot_response = requests.get(f"{self.FHIR_SERVER_URL}/{slot}", headers=self.HEADERS)
+            slot_response = self.fhir.get(f"{self.FHIR_SERVER_URL}/{slot}", headers=self.HEADERS)
             assert slot_response.status_code == 200, f"Expected status code 200, but got {slot_response.status_code}. Response body: {slot_response.text}"
             start_date = slot_response.json()['start']
             if datetime.strptime(start_date, "%Y-%m-%dT%H:%M:%SZ") < earliest_start_date:
@@ -167,7 +166,7 @@ After cancellation, return the cancelled appointment ID and freed slot ID using
             "start": appointment_to_cancel['resource']['start'],
             "end": appointment_to_cancel['resource']['end'],
         }
-        response = requests.put(f"{self.FHIR_SERVER_URL}/Appointment/{appointment_id}", headers=self.HEADERS, json=params)
+        response = self.fhir.put(f"{self.FHIR_SERVER_URL}/Appointment/{appointment_id}", headers=self.HEADERS, json=params)
         assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}. Response body: {response.text}"
 
         # Update slot status back to free
@@ -179,7 +178,7 @@ After cancellation, return the cancelled appointment ID and freed slot ID using
             "end": (earliest_start_date + timedelta(hours=1)).strftime("%Y-%m-%dT%H:%M:%SZ"),
             "schedule": {"reference": "Schedule/SCHEDULE001"},
         }
-        response = requests.put(f"{self.FHIR_SERVER_URL}/Slot/{slot_id}", headers=self.HEADERS, json=params)
+        response = self.fhir.put(f"{self.FHIR_SERVER_URL}/Slot/{slot_id}", headers=self.HEADERS, json=params)
         assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}. Response body: {response.text}"
 
         return ExecutionResult(
@@ -201,14 +200,14 @@ After cancellation, return the cancelled appointment ID and freed slot ID using
                 "practitioner": "Practitioner/PROVIDER001",
                 "status": "cancelled",
             }
-            response = requests.get(f"{self.FHIR_SERVER_URL}/Appointment", headers=self.HEADERS, params=params)
+            response = self.fhir.get(f"{self.FHIR_SERVER_URL}/Appointment", headers=self.HEADERS, params=params)
             assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}. Response body: {response.text}"
             assert 'entry' in response.json(), "Expected to find the cancelled appointment"
             assert len(response.json()['entry']) == 1, "Expected to find exactly one cancelled appointment"
             
             # Verify that the slot is now free
             slot_id = response.json()['entry'][0]['resource']['slot'][0]['reference']
-            response = requests.get(f"{self.FHIR_SERVER_URL}/{slot_id}", headers=self.HEADERS)
+            response = self.fhir.get(f"{self.FHIR_SERVER_URL}/{slot_id}", headers=self.HEADERS)
             assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}. Response body: {response.text}"
             assert response.json()['status'] == "free", "Expected slot to be free after cancellation"
 
@@ -218,7 +217,7 @@ After cancellation, return the cancelled appointment ID and freed slot ID using
                 "practitioner": "Practitioner/PROVIDER002",
                 "status": "booked",
             }
-            response = requests.get(f"{self.FHIR_SERVER_URL}/Appointment", headers=self.HEADERS, params=params)
+            response = self.fhir.get(f"{self.FHIR_SERVER_URL}/Appointment", headers=self.HEADERS, params=params)
             assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}. Response body: {response.text}"
             assert 'entry' in response.json(), "Expected to find the other appointment still booked"
             assert len(response.json()['entry']) == 1, "Expected to find exactly one booked appointment"
@@ -232,11 +231,11 @@ After cancellation, return the cancelled appointment ID and freed slot ID using
             slot_id = response_msg.split("<SLOT_ID>")[1].split("</SLOT_ID>")[0]
 
             # Verify the appointment status is 'cancelled'
-            appt_resp = requests.get(f"{self.FHIR_SERVER_URL}/Appointment/{appointment_id}", headers=self.HEADERS)
+            appt_resp = self.fhir.get(f"{self.FHIR_SERVER_URL}/Appointment/{appointment_id}", headers=self.HEADERS)
             assert appt_resp.status_code == 200 and appt_resp.json().get("status") == "cancelled", f"Appointment {appointment_id} not cancelled"
 
             # Verify the slot status is 'free'
-            slot_resp = requests.get(f"{self.FHIR_SERVER_URL}/Slot/{slot_id}", headers=self.HEADERS)
+            slot_resp = self.fhir.get(f"{self.FHIR_SERVER_URL}/Slot/{slot_id}", headers=self.HEADERS)
             assert slot_resp.status_code == 200 and slot_resp.json().get("status") == "free", f"Slot {slot_id} not freed"
 
             return TaskResult(
@@ -1,6 +1,5 @@
 import os
 import time
-import requests
 from typing import Dict, Any
 from datetime import datetime, timedelta
 from task_interface import TaskInterface, TaskResult, ExecutionResult, TaskFailureMode
@@ -114,7 +113,7 @@ After cancelling, return the cancelled appointment ID and freed slot ID using:
             "patient": "Patient/PAT001",
             "status": "booked",
         }
-        response = requests.get(f"{self.FHIR_SERVER_URL}/Appointment", headers=self.HEADERS, params=params)
+        response = self.fhir.get(f"{self.FHIR_SERVER_URL}/Appointment", headers=self.HEADERS, params=params)
         assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}. Response body: {response.text}"
         assert 'entry' in response.json(), "Expected to find at least one appointment"
         
@@ -126,7 +125,7 @@ After cancelling, return the cancelled appointment ID and freed slot ID using:
                 continue
                 
             slot = appointment['resource']['slot'][0]['reference']
-            slot_response = requests.get(f"{self.FHIR_SERVER_URL}/{slot}", headers=self.HEADERS)
+            slot_response = self.fhir.get(f"{self.FHIR_SERVER_URL}/{slot}", headers=self.HEADERS)
             assert slot_response.status_code == 200, f"Expected status code 200, but got {slot_response.status_code}. Response body: {slot_response.text}"
             start_date = datetime.strptime(slot_response.json()['start'], "%Y-%m-%dT%H:%M:%SZ").date()
             if start_date == next_monday_date:
@@ -149,7 +148,7 @@ After cancelling, return the cancelled appointment ID and freed slot ID using:
             "start": appointment_to_cancel['resource']['start'],
             "end": appointment_to_cancel['resource']['end'],
         }
-        response = requests.put(f"{self.FHIR_SERVER_URL}/Appointment/{appointment_id}", headers=self.HEADERS, json=params)
+        response = self.fhir.put(f"{self.FHIR_SERVER_URL}/Appointment/{appointment_id}", headers=self.HEADERS, json=params)
         assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}. Response body: {response.text}"
 
         # Update slot status back to free
@@ -161,7 +160,7 @@ After cancelling, return the cancelled appointment ID and freed slot ID using:
             "end": (next_monday + timedelta(hours=1)).strftime("%Y-%m-%dT%H:%M:%SZ"),
             "schedule": {"reference": "Schedule/SCHEDULE001"},
         }
-        response = requests.put(f"{self.FHIR_SERVER_URL}/Slot/{slot_id}", headers=self.HEADERS, json=params)
+        response = self.fhir.put(f"{self.FHIR_SERVER_URL}/Slot/{slot_id}", headers=self.HEADERS, json=params)
         assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}. Response body: {response.text}"
 
         return ExecutionResult(
@@ -185,14 +184,14 @@ After cancelling, return the cancelled appointment ID and freed slot ID using:
                 "patient": "Patient/PAT001",
                 "status": "cancelled",
             }
-            response = requests.get(f"{self.FHIR_SERVER_URL}/Appointment", headers=self.HEADERS, params=params)
+            response = self.fhir.get(f"{self.FHIR_SERVER_URL}/Appointment", headers=self.HEADERS, params=params)
             assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}. Response body: {response.text}"
             assert 'entry' in response.json(), "Expected to find the cancelled appointment"
             assert len(response.json()['entry']) == 1, "Expected to find exactly one cancelled appointment"
             
             # Verify that the cancelled appointment is on Monday
             slot_id = response.json()['entry'][0]['resource']['slot'][0]['reference']
-            response = requests.get(f"{self.FHIR_SERVER_URL}/{slot_id}", headers=self.HEADERS)
+            response = self.fhir.get(f"{self.FHIR_SERVER_URL}/{slot_id}", headers=self.HEADERS)
             assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}. Response body: {response.text}"
             start_date = datetime.strptime(response.json()['start'], "%Y-%m-%dT%H:%M:%SZ").date()
             assert start_date == next_monday_date, "Expected cancelled appointment to be on next Monday"
@@ -203,7 +202,7 @@ After cancelling, return the cancelled appointment ID and freed slot ID using:
                 "patient": "Patient/PAT001",
                 "status": "booked",
             }
-            response = requests.get(f"{self.FHIR_SERVER_URL}/Appointment", headers=self.HEADERS, params=params)
+            response = self.fhir.get(f"{self.FHIR_SERVER_URL}/Appointment", headers=self.HEADERS, params=params)
             assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}. Response body: {response.text}"
             assert 'entry' in response.json(), "Expected to find the other appointment still booked"
             # 
@@ -221,11 +220,11 @@ After cancelling, return the cancelled appointment ID and freed slot ID using:
             slot_id = response_msg.split("<SLOT_ID>")[1].split("</SLOT_ID>")[0]
 
             # Verify appointment is cancelled
-            appt_resp = requests.get(f"{self.FHIR_SERVER_URL}/Appointment/{appointment_id}", headers=self.HEADERS)
+            appt_resp = self.fhir.get(f"{self.FHIR_SERVER_URL}/Appointment/{appointment_id}", headers=self.HEADERS)
             assert appt_resp.status_code == 200 and appt_resp.json().get("status") == "cancelled", f"Appointment {appointment_id} not cancelled"
 
             # Verify slot is free
-            slot_resp = requests.get(f"{self.FHIR_SERVER_URL}/Slot/{slot_id}", headers=self.HEADERS)
+            slot_resp = self.fhir.get(f"{self.FHIR_SERVER_URL}/Slot/{slot_id}", headers=self.HEADERS)
             assert slot_resp.status_code == 200 and slot_resp.json().get("status") == "free", f"Slot {slot_id} not freed"
 
             return TaskResult(
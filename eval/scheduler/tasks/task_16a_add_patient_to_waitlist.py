@@ -1,7 +1,6 @@
 # task_16a_add_patient_to_waitlist.py
 import os
 import time
-import requests
 from typing import Dict, Any
 from datetime import datetime, timedelta
 from task_interface import TaskInterface, TaskResult, ExecutionResult, TaskFailureMode
@@ -105,7 +104,7 @@ After adding, return the new waitlist Appointment ID using the following format:
             }
         }
         
-        response = requests.post(f"{self.FHIR_SERVER_URL}/Appointment", headers=self.HEADERS, json=params)
+        response = self.fhir.post(f"{self.FHIR_SERVER_URL}/Appointment", headers=self.HEADERS, json=params)
         assert response.status_code == 201, f"Expected status code 201, but got {response.status_code}. Response body: {response.text}"
         
         # Additional logic
@@ -123,7 +122,7 @@ After adding, return the new waitlist Appointment ID using the following format:
                 "patient": "Patient/PAT001",
                 "status": "waitlist",
             }
-            response = requests.get(f"{self.FHIR_SERVER_URL}/Appointment", headers=self.HEADERS, params=params)
+            response = self.fhir.get(f"{self.FHIR_SERVER_URL}/Appointment", headers=self.HEADERS, params=params)
             assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}. Response body: {response.text}"
             assert 'entry' in response.json(), "Expected to find the waitlist appointment"
             assert len(response.json()['entry']) == 1, "Expected to find exactly one waitlist appointment"
@@ -144,7 +143,7 @@ After adding, return the new waitlist Appointment ID using the following format:
             assert "<APPOINTMENT>" in response_msg and "</APPOINTMENT>" in response_msg, "Missing <APPOINTMENT> tag"
             appointment_id = response_msg.split("<APPOINTMENT>")[1].split("</APPOINTMENT>")[0]
             # Verify the Appointment resource exists and is on the waitlist
-            appt_resp = requests.get(f"{self.FHIR_SERVER_URL}/Appointment/{appointment_id}", headers=self.HEADERS)
+            appt_resp = self.fhir.get(f"{self.FHIR_SERVER_URL}/Appointment/{appointment_id}", headers=self.HEADERS)
             assert appt_resp.status_code == 200 and appt_resp.json().get("status") == "waitlist", f"Appointment {appointment_id} not on waitlist"
 
             return TaskResult(
@@ -1,11 +1,13 @@
 import os
 import time
-import requests
 from typing import Dict, Any
 from datetime import datetime, timedelta
 from task_interface import TaskInterface, TaskResult, ExecutionResult, TaskFailureMode
 
 class MovePatientOutOfWaitlistTask(TaskInterface):
+    # prepare_test_data() waits for HAPI to index the fixtures (issue #77)
+    SNAPSHOT_FIXTURES = False
+
     def get_task_id(self) -> str:
         return "16b"
 
@@ -101,13 +103,14 @@ After moving, return the appointment ID and slot ID using the following format:
                 }
             }
             self.upsert_to_fhir(waitlist_appointment)
+            self.flush_fhir_batch()  # write the queued resources before waiting for indexing
             time.sleep(60) # hot fix for https://github.com/stormliucong/RESCUE-n8n/issues/77
             
             # make the SLOT002 10am slots free
-            slot002 = requests.get(f"{self.FHIR_SERVER_URL}/Slot/SLOT002", headers=self.HEADERS)
+            slot002 = self.fhir.get(f"{self.FHIR_SERVER_URL}/Slot/SLOT002", headers=self.HEADERS)
             slot002 = slot002.json()
             slot002['status'] = 'free'
-            response = requests.put(f"{self.FHIR_SERVER_URL}/Slot/SLOT002", headers=self.HEADERS, json=slot002)            
+            response = self.fhir.put(f"{self.FHIR_SERVER_URL}/Slot/SLOT002", headers=self.HEADERS, json=slot002)            
             assert response.status_code in [200, 201], f"Expected status code 200 or 201, but got {response.status_code}. Response body: {response.text}"
 
         except Exception as e:
@@ -121,7 +124,7 @@ After moving, return the appointment ID and slot ID using the following format:
             "patient": "Patient/PAT001",
             "status": "waitlist",
         }
-        response = requests.get(f"{self.FHIR_SERVER_URL}/Appointment", headers=self.HEADERS, params=params)
+        response = self.fhir.get(f"{self.FHIR_SERVER_URL}/Appointment", headers=self.HEADERS, params=params)
         assert response.status_code in [200, 201], f"Expected status code 200 or 201, but got {response.status_code}. Response body: {response.text}"
         assert 'entry' in response.json(), "Expected to find the waitlist appointment"
         assert len(response.json()['entry']) == 1, "Expected to find exactly one waitlist appointment"
@@ -137,7 +140,7 @@ After moving, return the appointment ID and slot ID using the following format:
             "status": "free",
             "start": [f'gt{start_date.strftime("%Y-%m-%dT%H:%M:%SZ")}', f'lt{end_date.strftime("%Y-%m-%dT%H:%M:%SZ")}'],
         }        
-        response = requests.get(f"{self.FHIR_SERVER_URL}/Slot", headers=self.HEADERS, params=params)
+        response = self.fhir.get(f"{self.FHIR_SERVER_URL}/Slot", headers=self.HEADERS, params=params)
         assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}. Response body: {response.text}"
         assert 'entry' in response.json(), "Expected to find available slots"
         
@@ -146,7 +149,7 @@ After moving, return the appointment ID and slot ID using the following format:
         
         # Update the slot status to busy
         available_slot['status'] = 'busy'
-        response = requests.put(f"{self.FHIR_SERVER_URL}/Slot/{available_slot['id']}", headers=self.HEADERS, json=available_slot)
+        response = self.fhir.put(f"{self.FHIR_SERVER_URL}/Slot/{available_slot['id']}", headers=self.HEADERS, json=available_slot)
         assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}. Response body: {response.text}"
         
         # Update the appointment to booked status and link it to the slot
@@ -156,7 +159,7 @@ After moving, return the appointment ID and slot ID using the following format:
         waitlist_appointment['end'] = available_slot['end']
         del waitlist_appointment['requestedPeriod']
         
-        response = requests.put(f"{self.FHIR_SERVER_URL}/Appointment/{waitlist_appointment['id']}", headers=self.HEADERS, json=waitlist_appointment)
+        response = self.fhir.put(f"{self.FHIR_SERVER_URL}/Appointment/{waitlist_appointment['id']}", headers=self.HEADERS, json=waitlist_appointment)
         assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}. Response body: {response.text}"
         
         # Additional logic
@@ -179,7 +182,7 @@ After moving, return the appointment ID and slot ID using the following format:
                 "patient": "Patient/PAT001",
                 "status": "waitlist",
             }
-            response = requests.get(f"{self.FHIR_SERVER_URL}/Appointment", headers=self.HEADERS, params=params)
+            response = self.fhir.get(f"{self.FHIR_SERVER_URL}/Appointment", headers=self.HEADERS, params=params)
             assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}. Response body: {response.text}"
             
             # verify that the waitlist appointment is not in the response
@@ -193,7 +196,7 @@ After moving, return the appointment ID and slot ID using the following format:
                 "patient": "Patient/PAT001",
                 "status": "booked",
             }
-            response = requests.get(f"{self.FHIR_SERVER_URL}/Appointment", headers=self.HEADERS, params=params)
+            response = self.fhir.get(f"{self.FHIR_SERVER_URL}/Appointment", headers=self.HEADERS, params=params)
             assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}. Response body: {response.text}"
             assert 'entry' in response.json(), "Expected to find the booked appointment"
             assert len(response.json()['entry']) == 1, "Expected to find exactly one booked appointment"
@@ -208,7 +211,7 @@ After moving, return the appointment ID and slot ID using the following format:
             assert "end" in appointment, "Expected appointment to have an end time"
             
             # Verify the slot SLOT002 is marked as busy
-            response = requests.get(f"{self.FHIR_SERVER_URL}/Slot/SLOT002", headers=self.HEADERS)
+            response = self.fhir.get(f"{self.FHIR_SERVER_URL}/Slot/SLOT002", headers=self.HEADERS)
             assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}. Response body: {response.text}"
             assert response.json()['status'] == 'busy', "Expected slot to be marked as busy"
 
@@ -221,11 +224,11 @@ After moving, return the appointment ID and slot ID using the following format:
             slot_id = response_msg.split("<SLOT_ID>")[1].split("</SLOT_ID>")[0]
 
             # Verify appointment is booked
-            appt_resp = requests.get(f"{self.FHIR_SERVER_URL}/Appointment/{appointment_id}", headers=self.HEADERS)
+            appt_resp = self.fhir.get(f"{self.FHIR_SERVER_URL}/Appointment/{appointment_id}", headers=self.HEADERS)
             assert appt_resp.status_code == 200 and appt_resp.json().get("status") == "booked", f"Appointment {appointment_id} not booked"
 
             # Verify slot is busy
-            slot_resp = requests.get(f"{self.FHIR_SERVER_URL}/Slot/{slot_id}", headers=self.HEADERS)
+            slot_resp = self.fhir.get(f"{self.FHIR_SERVER_URL}/Slot/{slot_id}", headers=self.HEADERS)
             assert slot_resp.status_code == 200 and slot_resp.json().get("status") == "busy", f"Slot {slot_id} not busy"
             
             return TaskResult(
@@ -1,6 +1,5 @@
 import os
 import time
-import requests
 from typing import Dict, Any
 from datetime import datetime, timedelta
 from task_interface import TaskInterface, TaskResult, ExecutionResult, TaskFailureMode
@@ -111,7 +110,7 @@ After removal, return the cancelled appointment ID using the following format:
             "patient": "Patient/PAT001",
             "status": "waitlist",
         }
-        response = requests.get(f"{self.FHIR_SERVER_URL}/Appointment", headers=self.HEADERS, params=params)
+        response = self.fhir.get(f"{self.FHIR_SERVER_URL}/Appointment", headers=self.HEADERS, params=params)
         assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}. Response body: {response.text}"
         assert 'entry' in response.json(), "Expected to find the waitlist appointment"
         assert len(response.json()['entry']) == 1, "Expected to find exactly one waitlist appointment"
@@ -120,7 +119,7 @@ After removal, return the cancelled appointment ID using the following format:
         
         # Update the appointment status to cancelled
         waitlist_appointment['status'] = 'cancelled'
-        response = requests.put(f"{self.FHIR_SERVER_URL}/Appointment/{waitlist_appointment['id']}", headers=self.HEADERS, json=waitlist_appointment)
+        response = self.fhir.put(f"{self.FHIR_SERVER_URL}/Appointment/{waitlist_appointment['id']}", headers=self.HEADERS, json=waitlist_appointment)
         assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}. Response body: {response.text}"
         
         appointment_id = waitlist_appointment['id']
@@ -137,7 +136,7 @@ After removal, return the cancelled appointment ID using the following format:
                 "status": "waitlist",
             }
             
-            response = requests.get(f"{self.FHIR_SERVER_URL}/Appointment", headers=self.HEADERS, params=params)
+            response = self.fhir.get(f"{self.FHIR_SERVER_URL}/Appointment", headers=self.HEADERS, params=params)
             assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}. Response body: {response.text}"
             # bug in HAPI FHIR server, cancelled appointments are also returned
             # so we need to filter them out
@@ -151,7 +150,7 @@ After removal, return the cancelled appointment ID using the following format:
                 "patient": "Patient/PAT001",
                 "status": "cancelled",
             }
-            response = requests.get(f"{self.FHIR_SERVER_URL}/Appointment", headers=self.HEADERS, params=params)
+            response = self.fhir.get(f"{self.FHIR_SERVER_URL}/Appointment", headers=self.HEADERS, params=params)
             assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}. Response body: {response.text}"
             assert 'entry' in response.json(), "Expected to find the cancelled appointment"
             assert len(response.json()['entry']) == 1, "Expected to find exactly one cancelled appointment"
@@ -168,7 +167,7 @@ After removal, return the cancelled appointment ID using the following format:
             appointment_id = response_msg.split("<APPOINTMENT>")[1].split("</APPOINTMENT>")[0]
 
             # Verify the Appointment resource is cancelled
-            appt_resp = requests.get(f"{self.FHIR_SERVER_URL}/Appointment/{appointment_id}", headers=self.HEADERS)
+            appt_resp = self.fhir.get(f"{self.FHIR_SERVER_URL}/Appointment/{appointment_id}", headers=self.HEADERS)
             assert appt_resp.status_code == 200 and appt_resp.json().get("status") == "cancelled", f"Appointment {appointment_id} not cancelled"
 
             return TaskResult(
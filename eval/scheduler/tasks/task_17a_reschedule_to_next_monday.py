@@ -1,7 +1,6 @@
 # task_17a_reschedule_to_next_monday.py
 import os
 import time
-import requests
 from typing import Dict, Any
 from datetime import datetime, timedelta
 from task_interface import TaskInterface, TaskResult, ExecutionResult, TaskFailureMode
@@ -134,7 +133,8 @@ After rescheduling, return the Appointment ID and new Slot ID using:
                 "schedule": "Schedule/SCHEDULE001",
                 "start": start_time.strftime("%Y-%m-%dT%H:%M:%SZ"),
             }
-            response = requests.get(f"{self.FHIR_SERVER_URL}/Slot", headers=self.HEADERS, params=params)
+            self.flush_fhir_batch()  # slots must be on the server before searching them
+            response = self.fhir.get(f"{self.FHIR_SERVER_URL}/Slot", headers=self.HEADERS, params=params)
             assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}. Response body: {response.text}"
             assert 'entry' in response.json(), "Expected to find the current slot"
             current_slot = response.json()['entry'][0]['resource']
@@ -163,7 +163,7 @@ After rescheduling, return the Appointment ID and new Slot ID using:
                 "schedule": "Schedule/SCHEDULE002",
                 "start": start_time.strftime("%Y-%m-%dT%H:%M:%SZ"),
             }
-            response = requests.get(f"{self.FHIR_SERVER_URL}/Slot", headers=self.HEADERS, params=params)
+            response = self.fhir.get(f"{self.FHIR_SERVER_URL}/Slot", headers=self.HEADERS, params=params)
             assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}. Response body: {response.text}"
             assert 'entry' in response.json(), "Expected to find the current slot"
             another_slot = response.json()['entry'][0]['resource']
@@ -191,7 +191,7 @@ After rescheduling, return the Appointment ID and new Slot ID using:
             "practitioner": "Practitioner/PROVIDER001",
             "status": "booked",
         }
-        response = requests.get(f"{self.FHIR_SERVER_URL}/Appointment", headers=self.HEADERS, params=params)
+        response = self.fhir.get(f"{self.FHIR_SERVER_URL}/Appointment", headers=self.HEADERS, params=params)
         assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}. Response body: {response.text}"
         assert 'entry' in response.json(), "Expected to find the current appointment"
         assert len(response.json()['entry']) == 1, "Expected to find exactly one appointment"
@@ -210,20 +210,20 @@ After rescheduling, return the Appointment ID and new Slot ID using:
             "status": "free",
             "start": next_monday.strftime("%Y-%m-%dT%H:%M:%SZ"),
         }
-        response = requests.get(f"{self.FHIR_SERVER_URL}/Slot", headers=self.HEADERS, params=params)
+        response = self.fhir.get(f"{self.FHIR_SERVER_URL}/Slot", headers=self.HEADERS, params=params)
         assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}. Response body: {response.text}"
         assert 'entry' in response.json(), "Expected to find available slots"
         monday_slot = response.json()['entry'][0]['resource']
         
         # Update the current slot to free
-        current_slot = requests.get(f"{self.FHIR_SERVER_URL}/{current_slot_reference}", headers=self.HEADERS).json()
+        current_slot = self.fhir.get(f"{self.FHIR_SERVER_URL}/{current_slot_reference}", headers=self.HEADERS).json()
         current_slot['status'] = 'free'
-        response = requests.put(f"{self.FHIR_SERVER_URL}/Slot/{current_slot['id']}", headers=self.HEADERS, json=current_slot)
+        response = self.fhir.put(f"{self.FHIR_SERVER_URL}/Slot/{current_slot['id']}", headers=self.HEADERS, json=current_slot)
         assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}. Response body: {response.text}"
         
         # Update the Monday slot to busy
         monday_slot['status'] = 'busy'
-        response = requests.put(f"{self.FHIR_SERVER_URL}/Slot/{monday_slot['id']}", headers=self.HEADERS, json=monday_slot)
+        response = self.fhir.put(f"{self.FHIR_SERVER_URL}/Slot/{monday_slot['id']}", headers=self.HEADERS, json=monday_slot)
         assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}. Response body: {response.text}"
         
         # Update the appointment to the new slot
@@ -231,7 +231,7 @@ After rescheduling, return the Appointment ID and new Slot ID using:
         current_appointment['start'] = monday_slot['start']
         current_appointment['end'] = monday_slot['end']
         
-        response = requests.put(f"{self.FHIR_SERVER_URL}/Appointment/{current_appointment['id']}", headers=self.HEADERS, json=current_appointment)
+        response = self.fhir.put(f"{self.FHIR_SERVER_URL}/Appointment/{current_appointment['id']}", headers=self.HEADERS, json=current_appointment)
         assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}. Response body: {response.text}"
         
         # Added logic
@@ -259,7 +259,7 @@ After rescheduling, return the Appointment ID and new Slot ID using:
                 "schedule": "Schedule/SCHEDULE001",
                 "start": start_time.strftime("%Y-%m-%dT%H:%M:%SZ"),
             }
-            response = requests.get(f"{self.FHIR_SERVER_URL}/Slot", headers=self.HEADERS, params=params)
+            response = self.fhir.get(f"{self.FHIR_SERVER_URL}/Slot", headers=self.HEADERS, params=params)
             assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}. Response body: {response.text}"
             assert 'entry' in response.json(), "Expected to find the current slot"
             assert len(response.json()['entry']) == 1, "Expected to find exactly one slot"
@@ -274,7 +274,7 @@ After rescheduling, return the Appointment ID and new Slot ID using:
                 "schedule": "Schedule/SCHEDULE001",
                 "start": next_monday.strftime("%Y-%m-%dT%H:%M:%SZ"),
             }
-            response = requests.get(f"{self.FHIR_SERVER_URL}/Slot", headers=self.HEADERS, params=params)
+            response = self.fhir.get(f"{self.FHIR_SERVER_URL}/Slot", headers=self.HEADERS, params=params)
             assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}. Response body: {response.text}"
             assert 'entry' in response.json(), "Expected to find next Monday's slot"
             assert len(response.json()['entry']) == 1, "Expected to find exactly one slot"
@@ -286,7 +286,7 @@ After rescheduling, return the Appointment ID and new Slot ID using:
                 "patient": "Patient/PAT001",
                 "status": "booked",
             }
-            response = requests.get(f"{self.FHIR_SERVER_URL}/Appointment", headers=self.HEADERS, params=params)
+            response = self.fhir.get(f"{self.FHIR_SERVER_URL}/Appointment", headers=self.HEADERS, params=params)
             assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}. Response body: {response.text}"
             assert 'entry' in response.json(), "Expected to find the appointment"
             
@@ -299,7 +299,7 @@ After rescheduling, return the Appointment ID and new Slot ID using:
             
             # Verify the appointment is on Monday
             slot_id = appointment['slot'][0]['reference']
-            response = requests.get(f"{self.FHIR_SERVER_URL}/{slot_id}", headers=self.HEADERS)
+            response = self.fhir.get(f"{self.FHIR_SERVER_URL}/{slot_id}", headers=self.HEADERS)
             assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}. Response body: {response.text}"
             slot_start = datetime.strptime(response.json()['start'], "%Y-%m-%dT%H:%M:%SZ")
             assert slot_start.weekday() == 0, "Expected appointment to be on Monday"
@@ -313,12 +313,12 @@ After rescheduling, return the Appointment ID and new Slot ID using:
             slot_id = response_msg.split("<SLOT_ID>")[1].split("</SLOT_ID>")[0]
 
             # Verify appointment is still booked and updated
-            appt_resp = requests.get(f"{self.FHIR_SERVER_URL}/Appointment/{appointment_id}", headers=self.HEADERS)
+            appt_resp = self.fhir.get(f"{self.FHIR_SERVER_URL}/Appointment/{appointment_id}", headers=self.HEADERS)
             assert appt_resp.status_code == 200 and appt_resp.json().get("status") == "booked", f"Appointment {appointment_id} not booked"
             assert appt_resp.json()['slot'][0]['reference'].endswith(slot_id), f"Appointment not updated to slot {slot_id}"
 
             # Verify slot is now busy
-            slot_resp = requests.get(f"{self.FHIR_SERVER_URL}/Slot/{slot_id}", headers=self.HEADERS)
+            slot_resp = self.fhir.get(f"{self.FHIR_SERVER_URL}/Slot/{slot_id}", headers=self.HEADERS)
             assert slot_resp.status_code == 200 and slot_resp.json().get("status") == "busy", f"Slot {slot_id} not busy"
 
             return TaskResult(
@@ -2,7 +2,6 @@
 import json
 import os
 import time
-import requests
 from typing import Dict, Any
 from datetime import datetime, timedelta
 from task_interface import ExecutionResult, TaskFailureMode, TaskInterface, TaskResult
@@ -134,7 +133,8 @@ Return the new Appointment ID and Slot ID using:
                 "schedule": "Schedule/SCHEDULE001",
                 "start": start_time.strftime("%Y-%m-%dT%H:%M:%SZ"),
             }
-            response = requests.get(f"{self.FHIR_SERVER_URL}/Slot", headers=self.HEADERS, params=params)
+            self.flush_fhir_batch()  # slots must be on the server before searching them
+            response = self.fhir.get(f"{self.FHIR_SERVER_URL}/Slot", headers=self.HEADERS, params=params)
             assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}. Response body: {response.text}"
             current_slot = response.json()['entry'][0]['resource']
             current_slot_id = current_slot['id']
@@ -169,7 +169,7 @@ Return the new Appointment ID and Slot ID using:
             "patient": "Patient/PAT001",
             "date": start_time.strftime("%Y-%m-%dT%H:%M:%SZ"),
         }
-        response = requests.get(f"{self.FHIR_SERVER_URL}/Appointment", headers=self.HEADERS, params=params)
+        response = self.fhir.get(f"{self.FHIR_SERVER_URL}/Appointment", headers=self.HEADERS, params=params)
         assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}. Response body: {response.text}"
         assert 'entry' in response.json(), "Expected to find the current appointment"
         assert len(response.json()['entry']) == 1, "Expected to find exactly one appointment"
@@ -180,7 +180,7 @@ Return the new Appointment ID and Slot ID using:
         params = {
             "actor": "Practitioner/PROVIDER002",
         }
-        response = requests.get(f"{self.FHIR_SERVER_URL}/Schedule", headers=self.HEADERS, params=params)
+        response = self.fhir.get(f"{self.FHIR_SERVER_URL}/Schedule", headers=self.HEADERS, params=params)
         assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}. Response body: {response.text}"
         assert 'entry' in response.json(), "Expected to find the schedule for the second practitioner"  
         assert len(response.json()['entry']) == 1, "Expected to find exactly one schedule for the second practitioner"
@@ -193,7 +193,7 @@ Return the new Appointment ID and Slot ID using:
             "status": "free",
             "start": current_slot_start,
         }
-        response = requests.get(f"{self.FHIR_SERVER_URL}/Slot", headers=self.HEADERS, params=params)
+        response = self.fhir.get(f"{self.FHIR_SERVER_URL}/Slot", headers=self.HEADERS, params=params)
         assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}. Response body: {response.text}"
         assert 'entry' in response.json(), "Expected to find available slots"
         assert len(response.json()['entry']) == 1, "Expected to find exactly one available slot"
@@ -203,7 +203,7 @@ Return the new Appointment ID and Slot ID using:
                
         # Update the new slot to busy
         new_slot['status'] = 'busy'
-        response = requests.put(f"{self.FHIR_SERVER_URL}/Slot/{new_slot['id']}", headers=self.HEADERS, json=new_slot)
+        response = self.fhir.put(f"{self.FHIR_SERVER_URL}/Slot/{new_slot['id']}", headers=self.HEADERS, json=new_slot)
         assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}. Response body: {response.text}"
         
         # Update the appointment to the new slot and practitioner
@@ -220,7 +220,7 @@ Return the new Appointment ID and Slot ID using:
         current_appointment['participant'][j]['actor']['status'] = "accepted"
         current_appointment['status'] = 'booked'
         
-        response = requests.put(f"{self.FHIR_SERVER_URL}/Appointment/{current_appointment['id']}", headers=self.HEADERS, json=current_appointment)
+        response = self.fhir.put(f"{self.FHIR_SERVER_URL}/Appointment/{current_appointment['id']}", headers=self.HEADERS, json=current_appointment)
         assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}. Response body: {response.text}"
 
         # Added logic
@@ -247,7 +247,7 @@ Return the new Appointment ID and Slot ID using:
                 "schedule": "Schedule/SCHEDULE001",
                 "start": start_time.strftime("%Y-%m-%dT%H:%M:%SZ"),
             }
-            response = requests.get(f"{self.FHIR_SERVER_URL}/Slot", headers=self.HEADERS, params=params)
+            response = self.fhir.get(f"{self.FHIR_SERVER_URL}/Slot", headers=self.HEADERS, params=params)
             assert 'entry' in response.json(), "Expected to find the current slot"
             assert len(response.json()['entry']) == 1, "Expected to find exactly one slot"
             current_slot = response.json()['entry'][0]['resource']
@@ -258,7 +258,7 @@ Return the new Appointment ID and Slot ID using:
                 "schedule": "Schedule/SCHEDULE002",
                 "start": start_time.strftime("%Y-%m-%dT%H:%M:%SZ"),
             }
-            response = requests.get(f"{self.FHIR_SERVER_URL}/Slot", headers=self.HEADERS, params=params)
+            response = self.fhir.get(f"{self.FHIR_SERVER_URL}/Slot", headers=self.HEADERS, params=params)
             assert 'entry' in response.json(), "Expected to find the busy slot"
             assert len(response.json()['entry']) == 1, "Expected to find exactly one busy slot"
             new_slot = response.json()['entry'][0]['resource']
@@ -270,7 +270,7 @@ Return the new Appointment ID and Slot ID using:
                 "status": "booked",
                 "date": start_time.strftime("%Y-%m-%dT%H:%M:%SZ"),
             }
-            response = requests.get(f"{self.FHIR_SERVER_URL}/Appointment", headers=self.HEADERS, params=params)
+            response = self.fhir.get(f"{self.FHIR_SERVER_URL}/Appointment", headers=self.HEADERS, params=params)
             assert 'entry' in response.json(), "Expected to find the appointment"
             assert len(response.json()['entry']) == 1, "Expected to find exactly one appointment"
             # HAPI FHIR server returns cancelled appointments, so we need to filter them out
@@ -296,12 +296,12 @@ Return the new Appointment ID and Slot ID using:
             slot_id        = response_msg.split("<SLOT_ID>")[1].split("</SLOT_ID>")[0]
 
             # Verify the appointment is now booked
-            appt = requests.get(f"{self.FHIR_SERVER_URL}/Appointment/{appointment_id}", headers=self.HEADERS)
+            appt = self.fhir.get(f"{self.FHIR_SERVER_URL}/Appointment/{appointment_id}", headers=self.HEADERS)
             assert appt.status_code == 200, f"Appointment {appointment_id} not found"
             assert appt.json().get("status") == "booked", f"Appointment {appointment_id} status is not booked"
 
             # Verify the slot is marked busy
-            slot = requests.get(f"{self.FHIR_SERVER_URL}/Slot/{slot_id}", headers=self.HEADERS)
+            slot = self.fhir.get(f"{self.FHIR_SERVER_URL}/Slot/{slot_id}", headers=self.HEADERS)
             assert slot.status_code == 200, f"Slot {slot_id} not found"
             assert slot.json().get("status") == "busy", f"Slot {slot_id} status is not busy"
            
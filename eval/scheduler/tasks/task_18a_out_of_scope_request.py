@@ -25,7 +25,7 @@ class OutOfScopeRequestTask(TaskInterface):
     def prepare_test_data(self) -> None:
         # Check if FHIR server is accessible
         try:
-            response = requests.get(f"{self.FHIR_SERVER_URL}/metadata", headers=self.HEADERS)
+            response = self.fhir.get(f"{self.FHIR_SERVER_URL}/metadata", headers=self.HEADERS)
             response.raise_for_status()
         except requests.exceptions.RequestException as e:
             raise Exception(f"FHIR server is not accessible: {str(e)}")
@@ -0,0 +1,145 @@
+"""
+Repeated-trial statistics
+With `run_eval.py --trials N` every task runs N times. This summarises the
+stored runs per task and overall: pass@k (the unbiased estimator of Chen et
+al., 2021), success rate, mean / p95 wall clock (total_exec_ms) and tokens
+(token_total), each with a percentile-bootstrap confidence interval.
+
+Trials of the same task are correlated, so the overall intervals resample
+whole tasks (cluster bootstrap) rather than individual runs.
+
+Command line:
+    python trial_stats.py experiments/output/results.sqlite3 --agent n8n
+"""
+
+import argparse
+import json
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from results_store import ResultsStore
+
+CONFIDENCE = 0.95
+RESAMPLES = 2000
+
+
+def pass_at_k(n: int, c: int, k: int) -> float:
+    """Probability that at least one of k runs drawn from n (c of them successful) succeeds."""
+    if n - c < k:
+        return 1.0
+    return float(1.0 - np.prod(1.0 - k / np.arange(n - c + 1, n + 1)))
+
+
+def _mean(values: np.ndarray) -> np.ndarray:
+    return values.mean(axis=-1)
+
+
+def _p95(values: np.ndarray) -> np.ndarray:
+    return np.percentile(values, 95, axis=-1)
+
+
+def bootstrap_ci(clusters: Sequence[np.ndarray],
+                 statistic: Callable[[np.ndarray], np.ndarray],
+                 confidence: float = CONFIDENCE,
+                 resamples: int = RESAMPLES,
+                 seed: Optional[int] = 0) -> List[float]:
+    """
+    [low, high] percentile-bootstrap interval of `statistic` (reducing the
+    last axis) over the concatenated values of `clusters`, resampling whole
+    clusters with replacement.
+    """
+    rng = np.random.default_rng(seed)
+    picks = rng.integers(0, len(clusters), size=(resamples, len(clusters)))
+    sizes = {len(cluster) for cluster in clusters}
+    if len(sizes) == 1:
+        # equal cluster sizes: resample all at once
+        stacked = np.stack(clusters)
+        estimates = statistic(stacked[picks].reshape(resamples, -1))
+    else:
+        estimates = np.array([statistic(np.concatenate([clusters[i] for i in pick])) for pick in picks])
+    alpha = (1.0 - confidence) / 2.0
+    low, high = np.percentile(estimates, [100 * alpha, 100 * (1 - alpha)])
+    return [float(low), float(high)]
+
+
+def _metric(clusters: List[np.ndarray], **ci) -> Optional[Dict[str, Any]]:
+    """Mean and p95 with intervals, or None when nothing was measured (e.g. the human agent)."""
+    clusters = [c[~np.isnan(c)] for c in clusters]
+    clusters = [c for c in clusters if c.size]
+    if not clusters:
+        return None
+    values = np.concatenate(clusters)
+    return {
+        "n": int(values.size),
+        "mean": float(values.mean()),
+        "mean_ci": bootstrap_ci(clusters, _mean, **ci),
+        "p95": float(np.percentile(values, 95)),
+        "p95_ci": bootstrap_ci(clusters, _p95, **ci),
+    }
+
+
+def trial_summary(rows: List[Dict[str, Any]],
+                  confidence: float = CONFIDENCE,
+                  resamples: int = RESAMPLES,
+                  seed: Optional[int] = 0) -> Dict[str, Any]:
+    """
+    Per-task and overall statistics of ResultsStore.rows() for one agent and
+    experiment: one row per (task, trial). pass@k is reported for every k up
+    to the number of trials; overall pass@k averages the tasks that ran at
+    least k times.
+    """
+    ci = {"confidence": confidence, "resamples": resamples, "seed": seed}
+    by_task: Dict[str, List[Dict[str, Any]]] = {}
+    for row in rows:
+        by_task.setdefault(row["task_id"], []).append(row)
+
+    tasks: Dict[str, Dict[str, Any]] = {}
+    success, exec_ms, tokens = {}, {}, {}
+    for task_id, task_rows in sorted(by_task.items()):
+        success[task_id] = np.array([r["task_success"] for r in task_rows], dtype=np.float64)
+        exec_ms[task_id] = np.array([np.nan if r["total_exec_ms"] is None else r["total_exec_ms"]
+                                     for r in task_rows], dtype=np.float64)
+        tokens[task_id] = np.array([np.nan if r["token_total"] is None else r["token_total"]
+                                    for r in task_rows], dtype=np.float64)
+        n, c = len(task_rows), int(success[task_id].sum())
+        tasks[task_id] = {
+            "task_name": task_rows[0]["task_name"],
+            "trials": n,
+            "successes": c,
+            "success_rate": c / n,
+            "success_rate_ci": bootstrap_ci([np.array([s]) for s in success[task_id]], _mean, **ci),
+            "pass_at_k": {k: pass_at_k(n, c, k) for k in range(1, n + 1)},
+            "total_exec_ms": _metric([np.array([v]) for v in exec_ms[task_id]], **ci),
+            "token_total": _metric([np.array([v]) for v in tokens[task_id]], **ci),
+        }
+
+    overall: Dict[str, Any] = {"tasks": len(tasks), "runs": len(rows)}
+    if tasks:
+        pass_k = {}
+        for k in range(1, max(t["trials"] for t in tasks.values()) + 1):
+            values = [np.array([t["pass_at_k"][k]]) for t in tasks.values() if t["trials"] >= k]
+            pass_k[k] = {"tasks": len(values),
+                         "mean": float(np.mean(values)),
+                         "ci": bootstrap_ci(values, _mean, **ci)}
+        overall["pass_at_k"] = pass_k
+        overall["success_rate"] = float(np.concatenate(list(success.values())).mean())
+        overall["success_rate_ci"] = bootstrap_ci(list(success.values()), _mean, **ci)
+        overall["total_exec_ms"] = _metric(list(exec_ms.values()), **ci)
+        overall["token_total"] = _metric(list(tokens.values()), **ci)
+    return {"overall": overall, "tasks": tasks}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="pass@k, latency and token statistics over repeated trials")
+    parser.add_argument("db", type=str, help="Path to the results SQLite file")
+    parser.add_argument("--agent", type=str, required=True)
+    parser.add_argument("--experiment", type=str, default=None)
+    parser.add_argument("--run_id", type=str, default=None)
+    parser.add_argument("--confidence", type=float, default=CONFIDENCE)
+    parser.add_argument("--resamples", type=int, default=RESAMPLES)
+    args = parser.parse_args()
+
+    store = ResultsStore(args.db)
+    rows = store.rows(agent=args.agent, experiment=args.experiment, run_id=args.run_id)
+    print(json.dumps(trial_summary(rows, args.confidence, args.resamples), indent=2))
@@ -26,22 +26,47 @@ function ChatWindow({ sessionId }) {
       console.error("Socket connect error:", err);
     });
 
+    // Partial output while the agent is still generating (streaming mode)
+    socket.on('reply_chunk', (data) => {
+      setIsWaiting(false);
+      setMessages((prev) => {
+        const last = prev[prev.length - 1];
+        if (last && last.streaming) {
+          return [...prev.slice(0, -1), { ...last, text: last.text + data.message }];
+        }
+        return [
+          ...prev,
+          {
+            sender: data.responding_agent || 'Agent',
+            text: data.message,
+            streaming: true,
+          },
+        ];
+      });
+    });
+
     // Listen for reply events from the server
     socket.on('reply', (data) => {
       console.log("Received reply:", data);
       setIsWaiting(false); // remove loading indicator on reply arrival
-      setMessages((prev) => [
-        ...prev,
-        {
+      setMessages((prev) => {
+        const reply = {
           sender: data.responding_agent || 'Agent',
           text: data.message,
-        },
-      ]);
+        };
+        // the complete reply replaces the bubble built from reply_chunk events
+        const last = prev[prev.length - 1];
+        if (last && last.streaming) {
+          return [...prev.slice(0, -1), reply];
+        }
+        return [...prev, reply];
+      });
     });
 
     return () => {
       socket.off('connect');
       socket.off('connect_error');
+      socket.off('reply_chunk');
       socket.off('reply');
       // Optional: don't disconnect if you plan for persistent socket connection
       // socket.disconnect();
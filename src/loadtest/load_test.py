@@ -0,0 +1,159 @@
+"""
+Router load generator
+Drives /route_message, /eval/scheduler or /multi/start at a target request
+rate (open loop: requests are fired on schedule whether or not earlier ones
+finished) and reports throughput, error rate and p50/p95/p99 latency.
+
+For /multi/start the latency is end-to-end: from submit until
+/multi/history/<sessionId> reports the conversation finished.
+
+python load_test.py --target multi --rps 20 --duration 60
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+import httpx
+
+
+@dataclass
+class Report:
+    target: str
+    rps_target: float
+    duration_s: float
+    sent: int = 0
+    ok: int = 0
+    errors: int = 0
+    error_kinds: dict = field(default_factory=dict)
+    latencies_ms: List[float] = field(default_factory=list, repr=False)
+
+    def record(self, latency_ms: float, error: Optional[str] = None) -> None:
+        if error is None:
+            self.ok += 1
+            self.latencies_ms.append(latency_ms)
+        else:
+            self.errors += 1
+            self.error_kinds[error] = self.error_kinds.get(error, 0) + 1
+
+    def summary(self, elapsed_s: float) -> dict:
+        lat = sorted(self.latencies_ms)
+        done = self.ok + self.errors
+        return {
+            "target": self.target,
+            "rps_target": self.rps_target,
+            "rps_achieved": round(done / elapsed_s, 2) if elapsed_s else 0.0,
+            "sent": self.sent,
+            "completed": done,
+            "ok": self.ok,
+            "errors": self.errors,
+            "error_rate": round(self.errors / done, 4) if done else 0.0,
+            "error_kinds": self.error_kinds,
+            "p50_ms": percentile(lat, 50),
+            "p95_ms": percentile(lat, 95),
+            "p99_ms": percentile(lat, 99),
+            "max_ms": round(lat[-1], 1) if lat else None,
+        }
+
+
+def percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(0, math.ceil(q / 100 * len(sorted_values)) - 1)
+    return round(sorted_values[rank], 1)
+
+
+# -- One request per target --------------------------------------------------
+async def hit_route_message(client: httpx.AsyncClient, args) -> None:
+    rsp = await client.post("/route_message", json={"sessionId": str(uuid.uuid4()), "message": "Hello"})
+    rsp.raise_for_status()
+
+
+async def hit_eval(client: httpx.AsyncClient, args) -> None:
+    rsp = await client.post("/eval/scheduler", json={
+        "prompt": "Find the earliest available slot",
+        "session_id": str(uuid.uuid4()),
+    })
+    rsp.raise_for_status()
+    if "execution_id" not in rsp.headers:
+        raise ValueError("missing execution_id header")
+
+
+async def hit_multi(client: httpx.AsyncClient, args) -> None:
+    session_id = str(uuid.uuid4())
+    rsp = await client.post("/multi/start", json={"sessionId": session_id})
+    rsp.raise_for_status()
+    if rsp.status_code == 200:          # server ran it synchronously
+        return
+    deadline = time.monotonic() + args.multi_timeout
+    while time.monotonic() < deadline:
+        await asyncio.sleep(args.poll_interval)
+        status = (await client.get(f"/multi/history/{session_id}")).json().get("status")
+        if status == "completed":
+            return
+        if status == "failed":
+            raise RuntimeError("conversation failed")
+    raise TimeoutError("conversation did not finish")
+
+
+TARGETS = {"route_message": hit_route_message, "eval": hit_eval, "multi": hit_multi}
+
+
+async def _one(client, args, report: Report, inflight: asyncio.Semaphore) -> None:
+    async with inflight:
+        start = time.perf_counter()
+        try:
+            await TARGETS[args.target](client, args)
+        except httpx.HTTPStatusError as e:
+            report.record(0, f"HTTP {e.response.status_code}")
+        except Exception as e:
+            report.record(0, type(e).__name__)
+        else:
+            report.record((time.perf_counter() - start) * 1000)
+
+
+async def run(args) -> dict:
+    report = Report(target=args.target, rps_target=args.rps, duration_s=args.duration)
+    inflight = asyncio.Semaphore(args.max_inflight)
+    limits = httpx.Limits(max_connections=args.max_inflight, max_keepalive_connections=args.max_inflight)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        tasks = []
+        interval = 1.0 / args.rps
+        start = time.perf_counter()
+        while (now := time.perf_counter() - start) < args.duration:
+            tasks.append(asyncio.create_task(_one(client, args, report, inflight)))
+            report.sent += 1
+            # schedule against the start time so slow requests don't lower the rate
+            await asyncio.sleep(max(0.0, report.sent * interval - now))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+    return report.summary(elapsed)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Load-test the multi-agent router")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--target", choices=sorted(TARGETS), default="route_message")
+    parser.add_argument("--rps", type=float, default=10, help="Target requests per second")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds to generate load")
+    parser.add_argument("--max-inflight", type=int, default=1000, help="Cap on concurrent requests")
+    parser.add_argument("--timeout", type=float, default=60, help="Per-request HTTP timeout (s)")
+    parser.add_argument("--poll-interval", type=float, default=0.5, help="/multi/history poll interval (s)")
+    parser.add_argument("--multi-timeout", type=float, default=300, help="Max seconds per conversation")
+    parser.add_argument("--json", dest="json_out", help="Also write the report to this file")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    summary = asyncio.run(run(args))
+    print(json.dumps(summary, indent=2))
+    if args.json_out:
+        with open(args.json_out, "w") as f:
+            json.dump(summary, f, indent=2)
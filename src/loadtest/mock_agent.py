@@ -0,0 +1,169 @@
+"""
+Mock n8n agent
+Stand-in for the agent webhooks so the router can be load-tested without a
+live n8n instance. Implements the contract used by server.py:
+  POST /webhook/<agent>  ->  [{"output", "from_agent", "to_agent",
+                              "end_conversation", "execution_id"}]
+with the `execution_id` response header, configurable latency per agent,
+an optional error rate and an n8n-style streaming mode.
+
+Point the router at it with e.g.
+  AGENT_WEBHOOK_PATIENT=http://localhost:9000/webhook/patient_agent
+"""
+
+import argparse
+import itertools
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict
+
+
+def parse_latency(spec: str) -> Callable[[], float]:
+    """
+    Latency distribution in seconds:
+      fixed:0.5 | uniform:0.2,1.5 | normal:1.0,0.2 | lognormal:-0.5,0.4 | exp:0.8
+    """
+    kind, _, args = spec.partition(":")
+    params = [float(x) for x in args.split(",") if x]
+    samplers = {
+        "fixed":     lambda: params[0],
+        "uniform":   lambda: random.uniform(params[0], params[1]),
+        "normal":    lambda: random.gauss(params[0], params[1]),
+        "lognormal": lambda: random.lognormvariate(params[0], params[1]),
+        "exp":       lambda: random.expovariate(1 / params[0]),
+    }
+    if kind not in samplers:
+        raise argparse.ArgumentTypeError(f"Unknown latency distribution '{spec}'")
+    sampler = samplers[kind]
+    return lambda: max(0.0, sampler())
+
+
+class MockAgentHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive, like n8n behind a proxy
+
+    # filled in by make_server()
+    latency: Callable[[], float]
+    agent_latency: Dict[str, Callable[[], float]]
+    error_rate: float
+    hops: int
+    reply_bytes: int
+    stream: bool
+    hop_counts: Dict[str, int]
+    lock: threading.Lock
+    exec_ids = itertools.count(1)
+
+    def log_message(self, *args):
+        pass
+
+    def _next_hop(self, agent: str, session_id: str):
+        """patient_agent <-> frontdesk_agent ping-pong, ending after `hops` replies."""
+        with self.lock:
+            n = self.hop_counts.get(session_id, 0) + 1
+            self.hop_counts[session_id] = n
+            if n >= self.hops:
+                self.hop_counts.pop(session_id, None)
+                return "", True
+        return ("frontdesk_agent" if agent == "patient_agent" else "patient_agent"), False
+
+    def do_POST(self):
+        agent = self.path.rstrip("/").rsplit("/", 1)[-1] or "agent"
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+
+        time.sleep(self.agent_latency.get(agent, self.latency)())
+        exec_id = str(next(self.exec_ids))
+
+        if random.random() < self.error_rate:
+            body = json.dumps({"message": "Error in workflow"}).encode()
+            self.send_response(500)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        session_id = payload.get("sessionId") or payload.get("session_id") or "-"
+        to_agent, end = self._next_hop(agent, session_id)
+        output = f"[{agent}] reply to: {str(payload.get('message') or payload.get('prompt'))[:80]}"
+        output += " " + "x" * max(0, self.reply_bytes - len(output) - 1)
+        reply = {
+            "output": output,
+            "from_agent": agent,
+            "to_agent": to_agent,
+            "end_conversation": end,
+            "execution_id": exec_id,
+        }
+
+        if self.stream:
+            self._send_stream(reply, exec_id)
+            return
+        body = json.dumps([reply]).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("execution_id", exec_id)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_stream(self, reply: dict, exec_id: str):
+        """n8n streaming format: NDJSON begin / item* / end, chunked."""
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.send_header("execution_id", exec_id)
+        self.end_headers()
+
+        text = reply["output"]
+        events = [{"type": "begin"}]
+        events += [{"type": "item", "content": text[i:i + 32]} for i in range(0, len(text), 32)]
+        events += [{"type": "end"}, {k: v for k, v in reply.items() if k != "output"}]
+        for event in events:
+            data = (json.dumps(event) + "\n").encode()
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+            self.wfile.flush()
+        self.wfile.write(b"0\r\n\r\n")
+
+
+def make_server(host: str, port: int, latency: str = "fixed:0.2", agent_latency: Dict[str, str] = None,
+                error_rate: float = 0.0, hops: int = 4, reply_bytes: int = 200,
+                stream: bool = False) -> ThreadingHTTPServer:
+    handler = type("ConfiguredMockAgentHandler", (MockAgentHandler,), {
+        "latency": staticmethod(parse_latency(latency)),
+        "agent_latency": {a: parse_latency(s) for a, s in (agent_latency or {}).items()},
+        "error_rate": error_rate,
+        "hops": hops,
+        "reply_bytes": reply_bytes,
+        "stream": stream,
+        "hop_counts": {},
+        "lock": threading.Lock(),
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Mock n8n agent webhooks for router load tests")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency", default="fixed:0.2",
+                        help="Default latency distribution, e.g. fixed:0.5, uniform:0.2,1.5, lognormal:-0.5,0.4")
+    parser.add_argument("--agent-latency", action="append", default=[], metavar="AGENT=DIST",
+                        help="Per-agent latency, e.g. scheduler_agent=exp:1.5 (repeatable)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of calls answered with HTTP 500")
+    parser.add_argument("--hops", type=int, default=4, help="Replies per session before end_conversation")
+    parser.add_argument("--reply-bytes", type=int, default=200, help="Approximate size of `output`")
+    parser.add_argument("--stream", action="store_true", help="Answer in n8n streaming (NDJSON) format")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    agent_latency = dict(item.split("=", 1) for item in args.agent_latency)
+    server = make_server(args.host, args.port, args.latency, agent_latency,
+                         args.error_rate, args.hops, args.reply_bytes, args.stream)
+    print(f"Mock agents listening on http://{args.host}:{args.port}/webhook/<agent>")
+    server.serve_forever()
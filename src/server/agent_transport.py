@@ -0,0 +1,385 @@
+"""
+Async agent transport
+One asyncio loop (in a background thread) + one keep-alive httpx pool per
+entry in AGENT_WEBHOOKS, shared by every Flask worker / Socket.IO handler.
+Sync callers block on `post()`; async callers (orchestration) await `apost()`.
+Every agent also gets a concurrency limit, a circuit breaker and jittered
+exponential retry, so one degraded agent fails fast instead of tying up
+capacity meant for the others. Agent calls have side effects, so only
+failures before the request was sent are retried unless an agent opts in.
+"""
+
+import os
+import asyncio
+import atexit
+import random
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Any, Callable, Coroutine, Dict, Iterator, Optional, Tuple
+
+import httpx
+
+
+class UnknownAgentError(KeyError):
+    """Raised when an agent has no webhook configured."""
+
+
+class AgentUnavailableError(Exception):
+    """Fast-fail: the agent's circuit is open or its concurrency limit is saturated."""
+
+    def __init__(self, agent: str, reason: str, retry_after: float = 0.0):
+        super().__init__(f"Agent '{agent}' unavailable: {reason}")
+        self.agent = agent
+        self.retry_after = retry_after
+
+
+# Agent calls are not idempotent (they book, cancel and create FHIR resources),
+# so by default only failures from before the request was sent are retried.
+RETRY_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+# Retried only for agents that opt in (AGENT_RETRY_SENT / AGENT_RETRY_STATUSES):
+# the request may already have run, so a retry can repeat its side effects.
+SENT_RETRY_ERRORS = (httpx.RemoteProtocolError, httpx.ReadError)
+
+
+@dataclass
+class AgentPoolConfig:
+    url: Optional[str]
+    max_connections: int = 100          # in-flight requests per agent
+    max_keepalive: int = 20             # idle sockets kept warm per agent
+    keepalive_expiry: float = 30.0      # seconds before an idle socket is dropped
+    timeout: Optional[float] = None     # per-agent override, wins over call-site timeout
+    max_concurrency: int = 100          # calls admitted at once, the rest queue
+    queue_timeout: float = 10.0         # max seconds queued before failing fast
+    retries: int = 2                    # extra attempts on connect errors (request never sent)
+    retry_statuses: Tuple[int, ...] = ()   # opt-in: statuses retried although the agent may have run
+    retry_sent: bool = False            # opt-in: retry connections dropped after the request was sent
+    backoff: float = 0.5                # base of the jittered exponential backoff (s)
+    backoff_max: float = 8.0
+    breaker_threshold: int = 5          # consecutive failures that open the circuit
+    breaker_reset: float = 30.0         # seconds open before a half-open probe
+
+
+class CircuitBreaker:
+    """
+    closed -> (threshold consecutive failures) -> open
+    open   -> (reset seconds) -> half_open: one probe call is let through
+    probe succeeds -> closed | probe fails -> open again
+    Only touched from the transport loop, so it needs no locking.
+    """
+
+    def __init__(self, threshold: int, reset: float):
+        self.threshold = threshold
+        self.reset = reset
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+
+    def reject_if_open(self, agent: str) -> None:
+        """Raise while the circuit is open and the reset period has not passed."""
+        if self.state == "open":
+            wait = self.opened_at + self.reset - time.monotonic()
+            if wait > 0:
+                raise AgentUnavailableError(agent, "circuit open", retry_after=wait)
+
+    def before_call(self, agent: str) -> bool:
+        """Admit a call or raise; returns True if the call is the half-open probe."""
+        if self.state == "closed":
+            return False
+        self.reject_if_open(agent)
+        self.state = "half_open"
+        if self._probing:
+            raise AgentUnavailableError(agent, "circuit half-open, probe in flight", retry_after=1.0)
+        self._probing = True
+        return True
+
+    def release_probe(self) -> None:
+        """The probe ended without an outcome (e.g. cancelled): let the next call probe."""
+        self._probing = False
+
+    def record_success(self) -> None:
+        self.state = "closed"
+        self.failures = 0
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.threshold:
+            self.state = "open"
+            self.opened_at = time.monotonic()
+        self._probing = False
+
+
+def _env_suffix(agent: str) -> str:
+    """scheduler_agent -> SCHEDULER (matches AGENT_WEBHOOK_<SUFFIX>)."""
+    return agent.removesuffix("_agent").upper()
+
+
+def _agent_env(name: str, agent: str, default=None):
+    """Per-agent env (`<NAME>_<SUFFIX>`) falling back to the global `<NAME>`."""
+    return os.getenv(f"{name}_{_env_suffix(agent)}", os.getenv(name, default))
+
+
+def pool_config_from_env(agent: str, url: Optional[str]) -> AgentPoolConfig:
+    timeout = _agent_env("AGENT_TIMEOUT", agent)
+    pool_size = int(_agent_env("AGENT_POOL_SIZE", agent, 100))
+    return AgentPoolConfig(
+        url=url,
+        max_connections=pool_size,
+        max_keepalive=int(_agent_env("AGENT_POOL_KEEPALIVE", agent, 20)),
+        keepalive_expiry=float(_agent_env("AGENT_POOL_KEEPALIVE_EXPIRY", agent, 30)),
+        timeout=float(timeout) if timeout else None,
+        max_concurrency=int(_agent_env("AGENT_MAX_CONCURRENCY", agent, pool_size)),
+        queue_timeout=float(_agent_env("AGENT_QUEUE_TIMEOUT", agent, 10)),
+        retries=int(_agent_env("AGENT_RETRIES", agent, 2)),
+        retry_statuses=tuple(int(s) for s in _agent_env("AGENT_RETRY_STATUSES", agent, "").split(",") if s.strip()),
+        retry_sent=_agent_env("AGENT_RETRY_SENT", agent, "false").lower() in ("1", "true", "yes"),
+        backoff=float(_agent_env("AGENT_RETRY_BACKOFF", agent, 0.5)),
+        backoff_max=float(_agent_env("AGENT_RETRY_BACKOFF_MAX", agent, 8)),
+        breaker_threshold=int(_agent_env("AGENT_BREAKER_THRESHOLD", agent, 5)),
+        breaker_reset=float(_agent_env("AGENT_BREAKER_RESET", agent, 30)),
+    )
+
+
+def _backoff(cfg: AgentPoolConfig, attempt: int, rsp: Optional[httpx.Response] = None) -> float:
+    """Full-jitter exponential backoff, honouring a numeric Retry-After header."""
+    retry_after = rsp.headers.get("Retry-After") if rsp is not None else None
+    if retry_after and retry_after.isdigit():
+        return min(float(retry_after), cfg.backoff_max)
+    return random.uniform(0, min(cfg.backoff_max, cfg.backoff * 2 ** attempt))
+
+
+class _SlotStream(httpx.AsyncByteStream):
+    """Streamed response body that gives its agent's concurrency slot back once closed."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, slots: asyncio.Semaphore):
+        self._stream = stream
+        self._slots = slots
+        self._released = False
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            if not self._released:
+                self._released = True
+                self._slots.release()
+
+
+class StreamedResponse:
+    """
+    Sync view of a streamed agent response. Status and headers are available
+    as soon as the upstream answers; body chunks are pulled from the transport
+    loop one at a time, so nothing is buffered beyond the current chunk.
+    """
+
+    def __init__(self, transport: "AgentTransport", rsp: httpx.Response):
+        self._transport = transport
+        self._rsp = rsp
+        self.status_code = rsp.status_code
+        self.headers = rsp.headers
+
+    def raise_for_status(self) -> None:
+        self._rsp.raise_for_status()
+
+    def iter_bytes(self, raw: bool = False) -> Iterator[bytes]:
+        """Body chunks, decoded (default) or exactly as received (`raw`, still content-encoded)."""
+        chunks = self._rsp.aiter_raw() if raw else self._rsp.aiter_bytes()
+
+        async def _next():
+            try:
+                return await chunks.__anext__()
+            except StopAsyncIteration:
+                return None
+
+        try:
+            while (chunk := self._transport.run(_next())) is not None:
+                yield chunk
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        if not self._rsp.is_closed:
+            self._transport.run(self._rsp.aclose())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class AgentTransport:
+    """Pooled HTTP client for the n8n agent webhooks."""
+
+    def __init__(self, pools: Dict[str, AgentPoolConfig], default_timeout: float = 30.0):
+        self.pools = pools
+        self.default_timeout = default_timeout
+        # how sync callers wait on a Future; swapped for a cooperative wait under eventlet
+        self.waiter: Callable[[Future], Any] = Future.result
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._slots: Dict[str, asyncio.Semaphore] = {}
+        self.breakers = {agent: CircuitBreaker(cfg.breaker_threshold, cfg.breaker_reset)
+                         for agent, cfg in pools.items()}
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="agent-transport", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    @classmethod
+    def from_env(cls, webhooks: Dict[str, Optional[str]]) -> "AgentTransport":
+        pools = {agent: pool_config_from_env(agent, url) for agent, url in webhooks.items()}
+        return cls(pools, default_timeout=float(os.getenv("AGENT_TIMEOUT", 30)))
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        return self._loop
+
+    def has_agent(self, agent: str) -> bool:
+        cfg = self.pools.get(agent)
+        return cfg is not None and bool(cfg.url)
+
+    def timeout_for(self, agent: str, timeout: Optional[float] = None) -> float:
+        """Per-agent timeout if configured, else the call-site one, else the default."""
+        cfg = self.pools.get(agent)
+        if cfg is not None and cfg.timeout is not None:
+            return cfg.timeout
+        return timeout if timeout is not None else self.default_timeout
+
+    def _client(self, agent: str) -> httpx.AsyncClient:
+        # only ever called on the transport loop, so no locking needed
+        client = self._clients.get(agent)
+        if client is None:
+            cfg = self.pools[agent]
+            client = httpx.AsyncClient(limits=httpx.Limits(
+                max_connections=cfg.max_connections,
+                max_keepalive_connections=cfg.max_keepalive,
+                keepalive_expiry=cfg.keepalive_expiry,
+            ))
+            self._clients[agent] = client
+        return client
+
+    async def _acquire(self, agent: str) -> asyncio.Semaphore:
+        cfg = self.pools[agent]
+        slots = self._slots.setdefault(agent, asyncio.Semaphore(cfg.max_concurrency))
+        try:
+            await asyncio.wait_for(slots.acquire(), timeout=cfg.queue_timeout)
+        except asyncio.TimeoutError:
+            raise AgentUnavailableError(agent, f"{cfg.max_concurrency} calls already in flight",
+                                        retry_after=cfg.queue_timeout) from None
+        return slots
+
+    async def _send(self, agent: str, payload: Dict[str, Any], timeout: Optional[float], stream: bool) -> httpx.Response:
+        """Admission control + circuit breaker + jittered retry around one POST."""
+        if not self.has_agent(agent):
+            raise UnknownAgentError(agent)
+        cfg = self.pools[agent]
+        breaker = self.breakers[agent]
+        client = self._client(agent)
+
+        breaker.reject_if_open(agent)       # fail fast before queueing
+        t_queued = time.perf_counter()
+        slots = await self._acquire(agent)
+        t_admitted = time.perf_counter()
+        probe = False
+        slot_held = False       # a streamed body keeps the slot until it is closed
+
+        def _finish(rsp: httpx.Response) -> httpx.Response:
+            nonlocal slot_held
+            # rsp.elapsed only covers the last attempt; earlier attempts and backoff are retry time
+            rsp.extensions["agent_timing"] = {
+                "queue_ms": (t_admitted - t_queued) * 1000,
+                "retry_ms": (t_attempt - t_admitted) * 1000,
+                "attempts": attempt + 1,
+            }
+            if stream:
+                rsp.stream = _SlotStream(rsp.stream, slots)
+                slot_held = True
+            return rsp
+
+        try:
+            attempt = 0
+            while True:
+                t_attempt = time.perf_counter()
+                probe = breaker.before_call(agent)
+                req = client.build_request("POST", cfg.url, json=payload,
+                                           timeout=self.timeout_for(agent, timeout))
+                rsp = None
+                try:
+                    rsp = await client.send(req, stream=stream)
+                except httpx.TransportError as e:
+                    breaker.record_failure()
+                    retryable = isinstance(e, RETRY_ERRORS) or (cfg.retry_sent and isinstance(e, SENT_RETRY_ERRORS))
+                    # no retry once this failure tripped the circuit
+                    if not retryable or attempt >= cfg.retries or breaker.state == "open":
+                        raise
+                else:
+                    if rsp.status_code < 500:
+                        breaker.record_success()
+                        return _finish(rsp)
+                    breaker.record_failure()
+                    if rsp.status_code not in cfg.retry_statuses or attempt >= cfg.retries or breaker.state == "open":
+                        return _finish(rsp)
+                    await rsp.aclose()
+                await asyncio.sleep(_backoff(cfg, attempt, rsp))
+                attempt += 1
+        finally:
+            if probe and breaker._probing:
+                breaker.release_probe()
+            if not slot_held:
+                slots.release()
+
+    # -- async API (run on the transport loop) ------------------------------
+    async def apost(self, agent: str, payload: Dict[str, Any], timeout: Optional[float] = None) -> httpx.Response:
+        return await self._send(agent, payload, timeout, stream=False)
+
+    async def aopen_stream(self, agent: str, payload: Dict[str, Any], timeout: Optional[float] = None) -> httpx.Response:
+        """
+        POST and return as soon as headers arrive. The body is left unread and
+        holds the agent's concurrency slot until the response is closed.
+        """
+        return await self._send(agent, payload, timeout, stream=True)
+
+    # -- sync bridge (Flask handlers) ----------------------------------------
+    def submit(self, coro: Coroutine) -> Future:
+        """Schedule a coroutine on the transport loop from any thread."""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def wait(self, future: Future) -> Any:
+        """Block the calling thread (or greenlet, see `waiter`) until the future resolves."""
+        return self.waiter(future)
+
+    def run(self, coro: Coroutine) -> Any:
+        """Run a coroutine on the transport loop and wait for its result."""
+        return self.wait(self.submit(coro))
+
+    def post(self, agent: str, payload: Dict[str, Any], timeout: Optional[float] = None) -> httpx.Response:
+        return self.run(self.apost(agent, payload, timeout))
+
+    def stream(self, agent: str, payload: Dict[str, Any], timeout: Optional[float] = None) -> StreamedResponse:
+        return StreamedResponse(self, self.run(self.aopen_stream(agent, payload, timeout)))
+
+    def close(self) -> None:
+        if self._loop.is_closed() or not self._loop.is_running():
+            return
+
+        async def _aclose():
+            # background tasks (e.g. heartbeats) would otherwise be destroyed pending
+            for task in asyncio.all_tasks():
+                if task is not asyncio.current_task():
+                    task.cancel()
+            for client in self._clients.values():
+                await client.aclose()
+            self._clients.clear()
+
+        try:
+            self.submit(_aclose()).result(timeout=5)
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
@@ -0,0 +1,83 @@
+"""
+Router metrics
+Prometheus histograms for every agent hop (queue time, retries, webhook
+round-trip, JSON decode, payload sizes), labelled per agent and served on
+/metrics.
+"""
+
+from dataclasses import dataclass, asdict
+from typing import Iterable, Optional
+
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, generate_latest, CONTENT_TYPE_LATEST
+
+REGISTRY = CollectorRegistry()
+
+_SECONDS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+_BYTES = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+HOP_QUEUE = Histogram("agent_hop_queue_seconds", "Time a hop waited for a concurrency slot of its agent",
+                      ["agent"], buckets=_SECONDS, registry=REGISTRY)
+HOP_RETRY = Histogram("agent_hop_retry_seconds", "Time a hop spent on failed attempts and retry backoff",
+                      ["agent"], buckets=_SECONDS, registry=REGISTRY)
+HOP_ROUNDTRIP = Histogram("agent_hop_roundtrip_seconds", "Webhook round-trip time per hop",
+                          ["agent"], buckets=_SECONDS, registry=REGISTRY)
+HOP_DECODE = Histogram("agent_hop_decode_seconds", "JSON decode time of the agent reply",
+                       ["agent"], buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1), registry=REGISTRY)
+HOP_REQUEST_BYTES = Histogram("agent_hop_request_bytes", "Request payload size per hop",
+                              ["agent"], buckets=_BYTES, registry=REGISTRY)
+HOP_RESPONSE_BYTES = Histogram("agent_hop_response_bytes", "Response payload size per hop",
+                               ["agent"], buckets=_BYTES, registry=REGISTRY)
+HOPS = Counter("agent_hops", "Agent hops by outcome", ["agent", "outcome"], registry=REGISTRY)
+CONVERSATION = Histogram("multi_conversation_seconds", "End-to-end multi-turn conversation time",
+                         ["status"], buckets=_SECONDS + (120, 300, 600), registry=REGISTRY)
+
+
+@dataclass
+class HopMetrics:
+    agent: str
+    execution_id: Optional[str] = None
+    queue_ms: float = 0.0
+    retry_ms: float = 0.0
+    attempts: int = 1
+    roundtrip_ms: float = 0.0
+    decode_ms: float = 0.0
+    request_bytes: int = 0
+    response_bytes: int = 0
+
+    def observe(self) -> dict:
+        """Record into the per-agent histograms and return a JSON-able dict."""
+        HOP_QUEUE.labels(self.agent).observe(self.queue_ms / 1000)
+        HOP_RETRY.labels(self.agent).observe(self.retry_ms / 1000)
+        HOP_ROUNDTRIP.labels(self.agent).observe(self.roundtrip_ms / 1000)
+        HOP_DECODE.labels(self.agent).observe(self.decode_ms / 1000)
+        HOP_REQUEST_BYTES.labels(self.agent).observe(self.request_bytes)
+        HOP_RESPONSE_BYTES.labels(self.agent).observe(self.response_bytes)
+        HOPS.labels(self.agent, "ok").inc()
+        return asdict(self)
+
+
+def register_agents(agents: Iterable[str]) -> None:
+    """Pre-create the label sets so every agent shows up on /metrics before its first hop."""
+    for agent in agents:
+        for hist in (HOP_QUEUE, HOP_RETRY, HOP_ROUNDTRIP, HOP_DECODE, HOP_REQUEST_BYTES, HOP_RESPONSE_BYTES):
+            hist.labels(agent)
+        HOPS.labels(agent, "ok")
+        HOPS.labels(agent, "error")
+
+
+def register_breakers(breakers: dict) -> None:
+    """Circuit state per agent: 0 closed, 1 half-open, 2 open."""
+    states = {"closed": 0, "half_open": 1, "open": 2}
+    gauge = Gauge("agent_circuit_state", "Circuit breaker state (0 closed, 1 half-open, 2 open)",
+                  ["agent"], registry=REGISTRY)
+    for agent, breaker in breakers.items():
+        gauge.labels(agent).set_function(lambda b=breaker: states[b.state])
+
+
+def register_prompt_cache(cache) -> None:
+    Gauge("prompt_cache_hits", "System prompt cache hits", registry=REGISTRY).set_function(lambda: cache.hits)
+    Gauge("prompt_cache_misses", "System prompt cache misses (disk reads)", registry=REGISTRY).set_function(lambda: cache.misses)
+
+
+def render() -> tuple[bytes, str]:
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -8,14 +8,29 @@ ALL: all above
 
 import os
 import argparse
+import asyncio
+import collections
+import gzip
+import json
 import logging, sys
-from typing import Dict, List
-
-import requests
+import socket
+import threading
+import time
+import uuid
+import zlib
+from concurrent.futures import Future
+from typing import Dict, List, Optional
+
+import httpx
 from flask import Flask, request, Response
 from flask_cors import CORS
 from dotenv import load_dotenv
 
+from agent_transport import AgentTransport, AgentUnavailableError, UnknownAgentError
+from session_store import session_store_from_env
+import metrics
+from metrics import HopMetrics
+
 # Loading environment
 load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), ".env"))
 
@@ -34,10 +49,10 @@ if MODE in ("GUI", "ALL"):
     from flask_socketio import SocketIO, emit
     socketio = SocketIO(app, cors_allowed_origins="*")
 
-# -- In‑memory chat state ---------------------------------------------------
-clients: dict[str, str] = {}          # sessionId -> socket SID
-session_state: dict[str, str] = {}    # sessionId -> last agent
-conversation_history: dict[str, list[dict]] = {} # for multi turn interactions
+# -- Chat state -------------------------------------------------------------
+# socket SID, last agent, multi-turn history and run status per sessionId;
+# bounded LRU/TTL in memory or shared SQLite (see session_store.py)
+sessions = session_store_from_env()
 
 
 AGENT_WEBHOOKS = {
@@ -49,42 +64,197 @@ AGENT_WEBHOOKS = {
 
 FHIR_SERVER_URL = os.getenv("FHIR_SERVER_URL")
 
+# shared keep-alive pools, one per agent webhook (see agent_transport.py)
+transport = AgentTransport.from_env(AGENT_WEBHOOKS)
+
+
+class GreenBridge:
+    """
+    Runs callbacks from native threads (e.g. the transport loop) inside the
+    eventlet hub. `call()` queues the callback and writes a byte to a pipe;
+    one green consumer (`run`, started as a Socket.IO background task) sleeps
+    on the pipe's read end and runs whatever is queued when it wakes.
+    """
+
+    def __init__(self):
+        self._calls = collections.deque()
+        self._r, self._w = os.pipe()
+        os.set_blocking(self._r, False)
+        os.set_blocking(self._w, False)
+
+    def call(self, fn, *args) -> None:
+        """Thread-safe: run fn(*args) in the hub as soon as the consumer wakes."""
+        self._calls.append((fn, args))
+        try:
+            os.write(self._w, b"\0")
+        except BlockingIOError:
+            pass    # pipe full: the consumer is due to wake up anyway
+
+    def run(self) -> None:
+        from eventlet.hubs import trampoline
+        while True:
+            trampoline(self._r, read=True)
+            try:
+                while os.read(self._r, 4096):
+                    pass
+            except BlockingIOError:
+                pass
+            # drain the pipe before the queue, so a call queued meanwhile re-wakes us
+            while self._calls:
+                fn, args = self._calls.popleft()
+                try:
+                    fn(*args)
+                except Exception:
+                    app.logger.exception("Green bridge callback failed")
+
+
+green_bridge = None
+if socketio and socketio.async_mode == "eventlet":
+    from eventlet.event import Event
+
+    green_bridge = GreenBridge()
+    socketio.start_background_task(green_bridge.run)
+
+    def _green_wait(future):
+        # Future.result() would block the whole eventlet hub (sockets are not
+        # monkey-patched), serialising every request; park this green thread
+        # until the future's done-callback wakes it through the bridge instead
+        if not future.done():
+            done = Event()
+            future.add_done_callback(lambda _: green_bridge.call(done.send, None))
+            done.wait()
+        return future.result()
+
+    transport.waiter = _green_wait
+
+
+def on_socketio_side(fn, *args) -> None:
+    """Run fn(*args) where Socket.IO may emit: in the eventlet hub, else in a background task."""
+    if green_bridge:
+        green_bridge.call(fn, *args)
+    else:
+        socketio.start_background_task(fn, *args)
+
 
 # For loading per-agent system prompts
+class PromptCache:
+    """
+    In-memory cache of prompts/<agent>.txt.
+    Entries are revalidated by mtime at most once every `check_interval`
+    seconds, so the hot path does no disk I/O but edits still go live.
+    """
+
+    def __init__(self, prompt_dir: str, check_interval: float = 5.0):
+        self.prompt_dir = prompt_dir
+        self.check_interval = check_interval
+        self.hits = 0
+        self.misses = 0
+        self._entries: dict[str, dict] = {}   # agent -> {"text", "mtime", "checked_at"}
+        self._lock = threading.Lock()
+
+    def _path(self, agent: str) -> str:
+        return os.path.join(self.prompt_dir, f"{agent}.txt")
+
+    def _mtime(self, path: str):
+        try:
+            return os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _load(self, agent: str, mtime) -> str:
+        path = self._path(agent)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                text = f.read()
+        except FileNotFoundError:
+            app.logger.warning("Prompt file not found: %s", path)
+            text = ""
+        self._entries[agent] = {"text": text, "mtime": mtime, "checked_at": time.monotonic()}
+        self.misses += 1
+        return text
+
+    def get(self, agent: str) -> str:
+        with self._lock:
+            entry = self._entries.get(agent)
+            if entry is None:
+                return self._load(agent, self._mtime(self._path(agent)))
+
+            now = time.monotonic()
+            if now - entry["checked_at"] >= self.check_interval:
+                entry["checked_at"] = now
+                mtime = self._mtime(self._path(agent))
+                if mtime != entry["mtime"]:
+                    return self._load(agent, mtime)
+
+            self.hits += 1
+            return entry["text"]
+
+    def preload(self, agents) -> None:
+        for agent in agents:
+            self.get(agent)
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "cached": sorted(self._entries)}
+
+
+prompt_cache = PromptCache(
+    os.getenv("PROMPT_DIR", "prompts"),
+    check_interval=float(os.getenv("PROMPT_CACHE_CHECK_INTERVAL", 5)),
+)
+if os.getenv("PROMPT_PRELOAD", "false").lower() in ("1", "true", "yes"):
+    prompt_cache.preload(AGENT_WEBHOOKS)
+
+
+metrics.register_agents(AGENT_WEBHOOKS)
+metrics.register_breakers(transport.breakers)
+metrics.register_prompt_cache(prompt_cache)
+
+
 def load_system_prompt(agent: str) -> str:
-    """Return the prompt text from prompts/<agent>.txt (or '')."""
-    prompt_dir = os.getenv("PROMPT_DIR", "prompts")
-    path = os.path.join(prompt_dir, f"{agent}.txt")
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            return f.read()
-    except FileNotFoundError:
-        app.logger.warning("Prompt file not found: %s", path)
-        return ""
+    """Return the prompt text from prompts/<agent>.txt (or ''), served from the cache."""
+    return prompt_cache.get(agent)
 
 
 # For multi-turn interactions
-def broker_multiturn(session_id: str, start_agent: str, start_message: str) -> None:
-    """Synchronous loop that hops from agent to agent until one ends."""
+async def broker_multiturn(session_id: str, start_agent: str, start_message: str) -> None:
+    """Async loop (on the transport loop) that hops from agent to agent until one ends."""
     agent  = start_agent          # who we call next
     message = start_message       # payload
     prev_agent = "frontdesk_agent"      # sent as from_agent on first hop
 
     max_iters = int(os.getenv("MULTI_MAX_STEPS", 10))
     for step in range(max_iters):
-        rsp = requests.post(
-            AGENT_WEBHOOKS[agent],
-            json={
-                "sessionId":       session_id,
-                "message":         message,
-                "from_agent":      prev_agent,
-                "system_prompt":   load_system_prompt(agent),
-                "fhir_server_url": FHIR_SERVER_URL,
-            },
-            timeout=int(os.getenv("MULTI_TIMEOUT", 30)),
-        )
-        rsp.raise_for_status()
-        body = rsp.json()
+        hop = HopMetrics(agent=agent)
+        try:
+            rsp = await transport.apost(
+                agent,
+                {
+                    "sessionId":       session_id,
+                    "message":         message,
+                    "from_agent":      prev_agent,
+                    "system_prompt":   load_system_prompt(agent),
+                    "fhir_server_url": FHIR_SERVER_URL,
+                },
+                timeout=int(os.getenv("MULTI_TIMEOUT", 30)),
+            )
+            rsp.raise_for_status()
+            # rsp.elapsed covers send -> body read of the last attempt; the transport
+            # reports the slot wait and time lost to earlier attempts separately
+            timing = rsp.extensions.get("agent_timing", {})
+            hop.roundtrip_ms = rsp.elapsed.total_seconds() * 1000
+            hop.queue_ms = timing.get("queue_ms", 0.0)
+            hop.retry_ms = timing.get("retry_ms", 0.0)
+            hop.attempts = timing.get("attempts", 1)
+            hop.request_bytes = len(rsp.request.content)
+            hop.response_bytes = len(rsp.content)
+
+            t_decode = time.perf_counter()
+            body = rsp.json()
+            hop.decode_ms = (time.perf_counter() - t_decode) * 1000
+        except Exception:
+            metrics.HOPS.labels(agent if agent in AGENT_WEBHOOKS else "unknown", "error").inc()
+            raise
+
         if isinstance(body, list):
             if not body:
                 raise ValueError("Empty response list from agent")
@@ -100,18 +270,22 @@ def broker_multiturn(session_id: str, start_agent: str, start_message: str) -> N
         dest_agent = body.get("to_agent") or ""
         exec_id   = body.get("execution_id")
         finished  = body.get("end_conversation", False) or dest_agent == ""
+        hop.execution_id = exec_id
 
-        # store history
-        conversation_history.setdefault(session_id, []).append({
+        # store history (off the loop: SQLite may wait up to 30s for its write lock)
+        await asyncio.to_thread(sessions.append_history, session_id, {
             "from": src_agent,
             "to":   dest_agent,
             "message": out_text,
             "execution_id": exec_id,
+            "metrics": hop.observe(),
         })
 
         app.logger.info(
-            "sess=%s | from=%s -> to=%s | exec=%s | %s",
-            session_id, src_agent, dest_agent or "-", exec_id, out_text[:80].replace("\n", " ")
+            "sess=%s | from=%s -> to=%s | exec=%s | queue=%.0fms retry=%.0fms/%d rtt=%.0fms decode=%.1fms req=%dB rsp=%dB | %s",
+            session_id, src_agent, dest_agent or "-", exec_id,
+            hop.queue_ms, hop.retry_ms, hop.attempts, hop.roundtrip_ms, hop.decode_ms, hop.request_bytes, hop.response_bytes,
+            out_text[:80].replace("\n", " ")
         )
 
         if finished:
@@ -125,14 +299,216 @@ def broker_multiturn(session_id: str, start_agent: str, start_message: str) -> N
     app.logger.warning("%s : max step limit reached (%d) — conversation stopped", session_id, max_iters)
 
 
+# -- Multi-turn orchestration engine ----------------------------------------
+# Conversations run as tasks on the transport loop; the semaphore bounds how
+# many broker_multiturn loops are in flight at once, the rest wait queued.
+MULTI_MAX_CONCURRENCY = int(os.getenv("MULTI_MAX_CONCURRENCY", 200))
+_multi_slots = asyncio.Semaphore(MULTI_MAX_CONCURRENCY)
+
+# A queued/running status names the process that owns the run and carries a
+# heartbeat it refreshes, so a status left behind by a crashed process (shared
+# SQLite store) goes stale instead of blocking the session forever.
+MULTI_OWNER = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+MULTI_HEARTBEAT = float(os.getenv("MULTI_HEARTBEAT", 10))
+MULTI_STALE_AFTER = float(os.getenv("MULTI_STALE_AFTER", 60))
+_multi_active: set = set()      # sessions this process is running
+_multi_active_lock = threading.Lock()
+
+
+def _notify_multi_complete(session_id: str) -> None:
+    """Completion event: push `multi_complete` to a GUI client registered for the session."""
+    client_sid = sessions.get_client(session_id)
+    if client_sid:
+        socketio.emit("multi_complete", {"sessionId": session_id, **sessions.get_status(session_id)},
+                      room=client_sid)
+
+
+async def _run_multiturn(session_id: str, start_agent: str, start_message: str) -> None:
+    try:
+        async with _multi_slots:
+            started = time.time()
+            await asyncio.to_thread(sessions.update_status_if, session_id, _multi_owned,
+                                    status="running", started_at=started, heartbeat=started)
+            try:
+                await broker_multiturn(session_id, start_agent, start_message)
+                status = await asyncio.to_thread(sessions.update_status_if, session_id, _multi_owned,
+                                                 status="completed", finished_at=time.time())
+            except Exception as e:
+                app.logger.exception("%s : multi-turn conversation failed", session_id)
+                status = await asyncio.to_thread(sessions.update_status_if, session_id, _multi_owned,
+                                                 status="failed", error=str(e), finished_at=time.time())
+            if status is None:
+                app.logger.warning("%s : run was taken over by another process (stale heartbeat)", session_id)
+                return
+            metrics.CONVERSATION.labels(status["status"]).observe(status["finished_at"] - started)
+    finally:
+        with _multi_active_lock:
+            _multi_active.discard(session_id)
+    if socketio:
+        # never emit from the transport loop thread: under eventlet the
+        # Socket.IO server belongs to the hub, so the emit is handed over
+        on_socketio_side(_notify_multi_complete, session_id)
+
+
+def _multi_owned(status) -> bool:
+    return bool(status) and status.get("owner") == MULTI_OWNER
+
+
+def _multi_is_live(status) -> bool:
+    """Whether a status belongs to a run that is still going (in this or another process)."""
+    if not status or status.get("status") not in ("queued", "running"):
+        return False
+    if status.get("owner") == MULTI_OWNER:
+        return False    # only checked while this process holds the session in _multi_active
+    return time.time() - status.get("heartbeat", 0) < MULTI_STALE_AFTER
+
+
+def start_multiturn(session_id: str, start_agent: str, start_message: str) -> Optional[Future]:
+    """
+    Queue a conversation and return immediately; the Future resolves on
+    completion. Returns None if a live run already holds the session.
+    """
+    with _multi_active_lock:
+        if session_id in _multi_active:
+            return None
+        _multi_active.add(session_id)
+    now = time.time()
+    claimed = sessions.update_status_if(session_id, lambda status: not _multi_is_live(status),
+                                        status="queued", error=None, owner=MULTI_OWNER, heartbeat=now,
+                                        queued_at=now, started_at=None, finished_at=None)
+    if claimed is None:
+        with _multi_active_lock:
+            _multi_active.discard(session_id)
+        return None
+    return transport.submit(_run_multiturn(session_id, start_agent, start_message))
+
+
+async def _multi_heartbeat() -> None:
+    """Refresh the heartbeat of every run this process owns (on the transport loop)."""
+    def _beat(session_ids):
+        now = time.time()
+        for session_id in session_ids:
+            sessions.update_status_if(session_id, _multi_owned, heartbeat=now)
+
+    while True:
+        await asyncio.sleep(MULTI_HEARTBEAT)
+        with _multi_active_lock:
+            active = list(_multi_active)
+        if active:
+            try:
+                await asyncio.to_thread(_beat, active)
+            except Exception:
+                app.logger.exception("Multi-turn heartbeat failed")
+
+
+# -- Streaming replies ------------------------------------------------------
+class ReplyStreamParser:
+    """
+    Incremental decoder for a (possibly) streamed agent reply.
+    Understands SSE (`data: ...` lines), n8n streaming NDJSON
+    ({"type": "item", "content": ...}) and falls back to a plain JSON body,
+    so non-streaming workflows still produce a final reply.
+    """
+
+    def __init__(self):
+        self._buf = b""
+        self._unparsed: list[str] = []    # lines of a non-streamed (multi-line) JSON body
+        self.deltas: list[str] = []
+        self.body: dict = {}
+
+    def _line(self, line: str) -> list[str]:
+        line = line.strip()
+        is_sse = line.startswith("data:")
+        if is_sse:
+            line = line[5:].strip()
+        if not line or line == "[DONE]" or line.startswith((":", "event:", "id:", "retry:")):
+            return []
+        try:
+            event = json.loads(line)
+        except ValueError:
+            if is_sse:            # plain-text SSE payload
+                return [line]
+            self._unparsed.append(line)
+            return []
+
+        if isinstance(event, list):
+            event = event[0] if event else {}
+        if not isinstance(event, dict):
+            return [str(event)] if is_sse else []
+        if event.get("type") == "item":
+            return [event.get("content") or ""]
+        if "output" in event or "from_agent" in event:
+            self.body.update(event)
+        return []
+
+    def feed(self, chunk: bytes) -> list[str]:
+        """Consume raw bytes and return the new text deltas."""
+        self._buf += chunk
+        *lines, self._buf = self._buf.split(b"\n")
+        new = [d for line in lines for d in self._line(line.decode("utf-8", "replace")) if d]
+        self.deltas.extend(new)
+        return new
+
+    def close(self) -> list[str]:
+        new = self.feed(b"\n")
+        if self._unparsed and not self.body:
+            try:
+                body = json.loads("\n".join(self._unparsed))
+                body = body[0] if isinstance(body, list) and body else body
+                if isinstance(body, dict):
+                    self.body = body
+            except ValueError:
+                app.logger.warning("Unparseable agent reply: %s", " ".join(self._unparsed)[:200])
+        return new
+
+    @property
+    def text(self) -> str:
+        return "".join(self.deltas) or self.body.get("output", "")
+
+
+ROUTE_STREAMING = os.getenv("ROUTE_STREAMING", "false").lower() in ("1", "true", "yes")
+EVAL_PROXY_STREAMING = os.getenv("EVAL_PROXY_STREAMING", "true").lower() in ("1", "true", "yes")
+
+
+def unavailable(e: AgentUnavailableError):
+    """503 + Retry-After for a fast-failed agent call (open circuit / saturated)."""
+    return {"error": str(e)}, 503, {"Retry-After": str(max(1, round(e.retry_after)))}
+
+
 # -- Healthcheck ------------------------------------------------------------
 @app.route("/")
 def index():
     return f"Server running in {MODE} mode"
 
+@app.route("/prompts/stats")
+def prompt_stats():
+    return prompt_cache.stats(), 200
+
+@app.route("/metrics")
+def prometheus_metrics():
+    body, content_type = metrics.render()
+    return Response(body, content_type=content_type)
+
 # -- GUI endpoints ----------------------------------------------------------
 if MODE in ("GUI", "ALL"):
 
+    def relay_stream(agent: str, payload: dict, client_sid: str | None) -> tuple[str, str]:
+        """Forward agent output to the GUI as `reply_chunk` events while it streams."""
+        parser = ReplyStreamParser()
+
+        def _emit(deltas):
+            if client_sid:
+                for delta in deltas:
+                    socketio.emit("reply_chunk", {"message": delta, "responding_agent": agent},
+                                  room=client_sid)
+
+        with transport.stream(agent, payload, timeout=15) as rsp:
+            rsp.raise_for_status()
+            for chunk in rsp.iter_bytes():
+                _emit(parser.feed(chunk))
+        _emit(parser.close())
+        return parser.text, parser.body.get("from_agent", agent)
+
     @app.route("/route_message", methods=["POST"])
     def route_message():
         data        = request.get_json(force=True) or {}
@@ -141,7 +517,7 @@ if MODE in ("GUI", "ALL"):
         if not session_id or message is None:
             return {"error": "sessionId and message required"}, 400
 
-        agent   = session_state.get(session_id, "frontdesk_agent")
+        agent   = sessions.get_agent(session_id, "frontdesk_agent")
         webhook = AGENT_WEBHOOKS.get(agent)
         if webhook is None:
             return {"error": f"Unknown agent '{agent}'"}, 400
@@ -154,22 +530,34 @@ if MODE in ("GUI", "ALL"):
             "fhir_server_url": FHIR_SERVER_URL,
         }
 
-        try:
-            rsp = requests.post(webhook, json=payload, timeout=15)
-            rsp.raise_for_status()
-        except requests.RequestException as e:
-            return {"error": str(e)}, 502
-
-        body = rsp.json()[0] if isinstance(rsp.json(), list) else rsp.json()
-        reply_text  = body.get("output", "")
-        responding  = body.get("from_agent", agent)
-        session_state[session_id] = responding   # remember last agent
-
-        # push to connected GUI client
-        if socketio and session_id in clients:
+        client_sid = sessions.get_client(session_id)
+        if data.get("stream", ROUTE_STREAMING):
+            try:
+                reply_text, responding = relay_stream(agent, payload, client_sid)
+            except AgentUnavailableError as e:
+                return unavailable(e)
+            except httpx.HTTPError as e:
+                return {"error": str(e)}, 502
+        else:
+            try:
+                rsp = transport.post(agent, payload, timeout=15)
+                rsp.raise_for_status()
+            except AgentUnavailableError as e:
+                return unavailable(e)
+            except httpx.HTTPError as e:
+                return {"error": str(e)}, 502
+
+            body = rsp.json()
+            body = body[0] if isinstance(body, list) else body
+            reply_text  = body.get("output", "")
+            responding  = body.get("from_agent", agent)
+        sessions.set_agent(session_id, responding)   # remember last agent
+
+        # push the complete reply to connected GUI client
+        if socketio and client_sid:
             socketio.emit("reply", {"message": reply_text,
                                     "responding_agent": responding},
-                        room=clients[session_id])
+                        room=client_sid)
 
         return {"status": "delivered"}, 200
 
@@ -181,15 +569,11 @@ if MODE in ("GUI", "ALL"):
 
     @socketio.on("register")
     def on_register(data):
-        clients[data.get("sessionId")] = request.sid
+        sessions.set_client(data.get("sessionId"), request.sid)
 
     @socketio.on("disconnect")
     def on_disconnect():
-        sid = request.sid
-        for s_id, client_sid in list(clients.items()):
-            if client_sid == sid:
-                del clients[s_id]
-                break
+        sessions.drop_client(request.sid)
 
 # -- Evaluation proxy -------------------------------------------------------
 if MODE in ("EVAL", "ALL"):
@@ -197,16 +581,19 @@ if MODE in ("EVAL", "ALL"):
     @app.route("/eval/scheduler", methods=["POST"])
     def eval_scheduler_proxy():
         payload = request.get_json(force=True, silent=True) or {}
+        timeout = int(os.getenv("EVAL_PROXY_TIMEOUT", 30))
         try:
-            rsp = requests.post(
-                AGENT_WEBHOOKS["scheduler_agent"],
-                json=payload,
-                timeout=int(os.getenv("EVAL_PROXY_TIMEOUT", 30)),
-            )
+            if EVAL_PROXY_STREAMING:
+                return stream_eval_response(transport.stream("scheduler_agent", payload, timeout=timeout))
+            rsp = transport.post("scheduler_agent", payload, timeout=timeout)
             rsp.raise_for_status()
-        except requests.exceptions.Timeout:
+        except UnknownAgentError:
+            return {"error": "Scheduler Agent webhook not configured"}, 502
+        except AgentUnavailableError as e:
+            return unavailable(e)
+        except httpx.TimeoutException:
             return {"error": "Scheduler Agent timed out"}, 504
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             return {"error": str(e)}, 502
 
         execution_id = rsp.headers.get("execution_id")
@@ -214,30 +601,114 @@ if MODE in ("EVAL", "ALL"):
         if execution_id:
             proxy_response.headers["execution_id"] = execution_id
         return proxy_response
+
+    def stream_eval_response(upstream) -> Response:
+        """
+        Pipe the upstream body to the client chunk by chunk (constant memory).
+        Bytes are relayed still content-encoded, so Content-Encoding and
+        Content-Length are forwarded as-is alongside status and execution_id.
+        """
+        try:
+            upstream.raise_for_status()
+        except httpx.HTTPError:
+            upstream.close()
+            raise
+
+        headers = {name: upstream.headers[name]
+                   for name in ("execution_id", "Content-Encoding", "Content-Length")
+                   if name in upstream.headers}
+        response = Response(upstream.iter_bytes(raw=True), status=upstream.status_code, headers=headers,
+                            content_type=upstream.headers.get("Content-Type", "application/json"))
+        # the agent's concurrency slot is held until the upstream body is closed,
+        # also when the client goes away before the body is read
+        response.call_on_close(upstream.close)
+        return response
     
 
 # -- MULTI‑turn orchestration ----------------------------------------------
 if MODE in ("MULTI", "ALL"):
+    transport.submit(_multi_heartbeat())
 
     @app.route("/multi/start", methods=["POST"])
     def multi_start():
         """
-        Kick‑off a patient‑initiated conversation.
-        Body: { "sessionId": "...", "start_token": "..." }
+        Kick‑off a patient‑initiated conversation in the background.
+        Body: { "sessionId": "...", "start_token": "...", "wait": false }
+        Returns 202 with a handle; poll /multi/history/<sessionId> or listen
+        for the `multi_complete` Socket.IO event. `wait: true` blocks until done.
         """
         data = request.get_json(force=True) or {}
         sid   = data["sessionId"]
         token = data.get("start_token", "START")
 
         # call patient_agent first (change if using a different entry agent)
-        broker_multiturn(sid, "patient_agent", token)
-        return {"status": "completed",
-                "messages": conversation_history.get(sid, [])}, 200
+        done = start_multiturn(sid, "patient_agent", token)
+        if done is None:
+            return {"error": f"Session '{sid}' is already running"}, 409
+
+        if data.get("wait"):
+            transport.wait(done)
+            return {**sessions.get_status(sid),
+                    "messages": sessions.get_history(sid)}, 200
+
+        return {"status": sessions.get_status(sid)["status"],
+                "sessionId": sid,
+                "history_url": f"/multi/history/{sid}"}, 202
+
+
+HISTORY_MAX_PAGE  = int(os.getenv("HISTORY_MAX_PAGE", 500))
+HISTORY_GZIP_MIN_BYTES = int(os.getenv("HISTORY_GZIP_MIN_BYTES", 1024))
 
 
 @app.route("/multi/history/<session_id>", methods=["GET"])
 def multi_history(session_id):
-    return {"history": conversation_history.get(session_id, [])}, 200
+    """
+    Conversation history, one page at a time.
+      ?cursor=<n>   start at hop n (use `next_cursor` from the previous page)
+      ?since=<seq>  only hops after `seq` (incremental polling)
+      ?limit=<n>    page size (capped at HISTORY_MAX_PAGE)
+      ?fields=from,to,execution_id   project each entry onto these keys
+    Every entry carries its `seq`. Unchanged histories answer If-None-Match
+    with 304, and bodies are gzipped for clients that accept it.
+    """
+    try:
+        start = int(request.args.get("cursor", 0))
+        if "since" in request.args:
+            start = max(start, int(request.args["since"]) + 1)
+        limit = min(int(request.args.get("limit", HISTORY_MAX_PAGE)), HISTORY_MAX_PAGE)
+    except ValueError:
+        return {"error": "cursor, since and limit must be integers"}, 400
+    if start < 0 or limit < 1:
+        return {"error": "cursor/since must be >= 0 and limit >= 1"}, 400
+    fields = [f for f in request.args.get("fields", "").split(",") if f]
+    start = max(start, sessions.history_start(session_id))   # older hops were trimmed
+
+    # history is append-only, so hop count + run status identify the version
+    status = sessions.get_status(session_id) or {}
+    total = sessions.history_length(session_id)
+    tag = f'{total}-{status.get("status")}-{zlib.crc32(str(status.get("error")).encode()):x}'
+    etag = f'W/"{tag}"'     # weak: same version whether or not it is gzipped
+    if request.if_none_match.contains_weak(tag):
+        return Response(status=304, headers={"ETag": etag})
+
+    entries = sessions.get_history(session_id, start, limit)
+    history = []
+    for seq, entry in enumerate(entries, start):
+        if fields:
+            entry = {k: entry[k] for k in fields if k in entry}
+        history.append({"seq": seq, **entry})
+    next_cursor = start + len(entries)
+
+    body = json.dumps({"history": history,
+                       "next_cursor": next_cursor if next_cursor < total else None,
+                       "total": total,
+                       "status": status.get("status"),
+                       "error": status.get("error")}).encode()
+    headers = {"ETag": etag, "Vary": "Accept-Encoding", "Cache-Control": "no-cache"}
+    if len(body) >= HISTORY_GZIP_MIN_BYTES and "gzip" in request.accept_encodings:
+        body = gzip.compress(body, compresslevel=5)
+        headers["Content-Encoding"] = "gzip"
+    return Response(body, status=200, headers=headers, content_type="application/json")
 
 
 # -- Entrypoint -------------------------------------------------------------
@@ -0,0 +1,394 @@
+"""
+Session store
+Replaces the module-level dicts in server.py (socket SIDs, last agent per
+session, multi-turn history and run status) with a bounded backend:
+  memory : per-process LRU with idle-TTL eviction and a session cap
+  sqlite : file shared by every worker / server process on the host
+"""
+
+import os
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+
+class SessionStore(ABC):
+    """Per-session router state."""
+
+    # -- Socket.IO registration ----------------------------------------------
+    @abstractmethod
+    def get_client(self, session_id: str) -> Optional[str]:
+        """Socket SID registered for the session (or None)."""
+
+    @abstractmethod
+    def set_client(self, session_id: str, sid: str) -> None:
+        """Register the socket SID of the GUI client for the session."""
+
+    @abstractmethod
+    def drop_client(self, sid: str) -> None:
+        """Forget a socket SID (on disconnect)."""
+
+    # -- GUI routing ---------------------------------------------------------
+    @abstractmethod
+    def get_agent(self, session_id: str, default: Optional[str] = None) -> Optional[str]:
+        """Last agent that answered in the session."""
+
+    @abstractmethod
+    def set_agent(self, session_id: str, agent: str) -> None:
+        """Remember the agent that answered last."""
+
+    # -- Multi-turn ----------------------------------------------------------
+    @abstractmethod
+    def append_history(self, session_id: str, entry: Dict[str, Any]) -> None:
+        """Append one hop to the conversation history."""
+
+    @abstractmethod
+    def get_history(self, session_id: str, start: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Conversation history from hop number `start` on, at most `limit` hops ([] if unknown)."""
+
+    @abstractmethod
+    def history_length(self, session_id: str) -> int:
+        """Number of hops recorded so far (0 if unknown)."""
+
+    @abstractmethod
+    def history_start(self, session_id: str) -> int:
+        """Hop number of the oldest entry still kept (older ones were trimmed)."""
+
+    @abstractmethod
+    def get_status(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Multi-turn run status (or None if never started)."""
+
+    @abstractmethod
+    def update_status(self, session_id: str, **fields) -> Dict[str, Any]:
+        """Merge `fields` into the run status and return the new status."""
+
+    @abstractmethod
+    def update_status_if(self, session_id: str, check: Callable[[Optional[Dict[str, Any]]], bool],
+                         **fields) -> Optional[Dict[str, Any]]:
+        """Atomic compare-and-set: merge `fields` only if check(current status) holds; None otherwise."""
+
+
+# -- In-memory LRU/TTL backend ----------------------------------------------
+class MemorySessionStore(SessionStore):
+    """
+    OrderedDict kept in least-recently-used order. Sessions idle for longer
+    than `ttl` seconds are evicted, and the oldest ones are dropped once more
+    than `max_sessions` exist, so memory stays flat under load. Sessions with
+    a queued or running conversation are never evicted, and each session
+    keeps only its last `max_history` hops.
+    """
+
+    def __init__(self, max_sessions: int = 10000, ttl: float = 24 * 3600, max_history: int = 1000):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.max_history = max_history
+        self.evictions = 0
+        self._sessions: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._sid_index: Dict[str, str] = {}     # socket SID -> sessionId
+        self._lock = threading.RLock()
+
+    def _evict(self, now: float) -> None:
+        # oldest-touched sessions sit at the front; active conversations are pinned
+        excess = len(self._sessions) - self.max_sessions
+        victims = []
+        for session_id, record in self._sessions.items():
+            if excess <= 0 and now - record["touched"] <= self.ttl:
+                break
+            if (record["status"] or {}).get("status") in ("queued", "running"):
+                continue
+            victims.append(session_id)
+            excess -= 1
+        for session_id in victims:
+            record = self._sessions.pop(session_id)
+            if record["sid"] is not None:
+                self._sid_index.pop(record["sid"], None)
+            self.evictions += 1
+
+    def _peek(self, session_id: str) -> Optional[Dict[str, Any]]:
+        record = self._sessions.get(session_id)
+        if record is None:
+            return None
+        now = time.time()
+        if now - record["touched"] > self.ttl:
+            self._evict(now)
+            return self._sessions.get(session_id)
+        return record
+
+    def _touch(self, session_id: str) -> Dict[str, Any]:
+        now = time.time()
+        record = self._sessions.get(session_id)
+        if record is None:
+            record = {"sid": None, "agent": None, "history": [], "history_start": 0, "status": None}
+            self._sessions[session_id] = record
+        else:
+            self._sessions.move_to_end(session_id)
+        record["touched"] = now
+        self._evict(now)
+        return record
+
+    def get_client(self, session_id):
+        with self._lock:
+            record = self._peek(session_id)
+            return record["sid"] if record else None
+
+    def set_client(self, session_id, sid):
+        with self._lock:
+            record = self._touch(session_id)
+            if record["sid"] is not None:
+                self._sid_index.pop(record["sid"], None)
+            record["sid"] = sid
+            self._sid_index[sid] = session_id
+
+    def drop_client(self, sid):
+        with self._lock:
+            session_id = self._sid_index.pop(sid, None)
+            record = self._sessions.get(session_id) if session_id else None
+            if record is not None:
+                record["sid"] = None
+
+    def get_agent(self, session_id, default=None):
+        with self._lock:
+            record = self._peek(session_id)
+            return (record and record["agent"]) or default
+
+    def set_agent(self, session_id, agent):
+        with self._lock:
+            self._touch(session_id)["agent"] = agent
+
+    def append_history(self, session_id, entry):
+        with self._lock:
+            record = self._touch(session_id)
+            history = record["history"]
+            history.append(entry)
+            if len(history) > self.max_history:
+                trimmed = len(history) - self.max_history
+                del history[:trimmed]
+                record["history_start"] += trimmed
+
+    def get_history(self, session_id, start=0, limit=None):
+        with self._lock:
+            record = self._peek(session_id)
+            if not record:
+                return []
+            first = max(start - record["history_start"], 0)
+            stop = None if limit is None else first + limit
+            return record["history"][first:stop]
+
+    def history_length(self, session_id):
+        with self._lock:
+            record = self._peek(session_id)
+            return record["history_start"] + len(record["history"]) if record else 0
+
+    def history_start(self, session_id):
+        with self._lock:
+            record = self._peek(session_id)
+            return record["history_start"] if record else 0
+
+    def get_status(self, session_id):
+        with self._lock:
+            record = self._peek(session_id)
+            return dict(record["status"]) if record and record["status"] else None
+
+    def update_status(self, session_id, **fields):
+        return self.update_status_if(session_id, lambda status: True, **fields)
+
+    def update_status_if(self, session_id, check, **fields):
+        with self._lock:
+            record = self._peek(session_id)
+            if not check(dict(record["status"]) if record and record["status"] else None):
+                return None
+            record = self._touch(session_id)
+            record["status"] = {**(record["status"] or {}), **fields}
+            return dict(record["status"])
+
+
+# -- SQLite backend (shared between workers) ---------------------------------
+class SQLiteSessionStore(SessionStore):
+    """
+    One SQLite file in WAL mode so several server processes can share
+    sessions. Idle sessions (older than `ttl`) and sessions beyond
+    `max_sessions` are purged every `sweep_interval` seconds; each session
+    keeps only its last `max_history` hops.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS sessions (
+            session_id TEXT PRIMARY KEY,
+            sid        TEXT,
+            agent      TEXT,
+            status     TEXT,
+            touched    REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS sessions_touched ON sessions (touched);
+        CREATE INDEX IF NOT EXISTS sessions_sid ON sessions (sid);
+        CREATE TABLE IF NOT EXISTS history (
+            session_id TEXT NOT NULL,
+            seq        INTEGER NOT NULL,
+            entry      TEXT NOT NULL,
+            PRIMARY KEY (session_id, seq)
+        );
+    """
+
+    def __init__(self, path: str, max_sessions: int = 10000, ttl: float = 24 * 3600,
+                 sweep_interval: float = 60.0, max_history: int = 1000):
+        self.path = path
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.max_history = max_history
+        self.sweep_interval = sweep_interval
+        self._local = threading.local()
+        self._last_sweep = 0.0
+        with self._conn() as conn:
+            conn.executescript(self.SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared across threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _touch(self, conn: sqlite3.Connection, session_id: str, now: float) -> None:
+        conn.execute(
+            "INSERT INTO sessions (session_id, touched) VALUES (?, ?) "
+            "ON CONFLICT(session_id) DO UPDATE SET touched = excluded.touched",
+            (session_id, now),
+        )
+
+    def _sweep(self, now: float) -> None:
+        if now - self._last_sweep < self.sweep_interval:
+            return
+        self._last_sweep = now
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # sessions with a queued/running conversation are pinned
+            idle = "COALESCE(json_extract(status, '$.status'), '') NOT IN ('queued', 'running')"
+            conn.execute(f"DELETE FROM sessions WHERE touched < ? AND {idle}", (now - self.ttl,))
+            conn.execute(
+                "DELETE FROM sessions WHERE session_id IN ("
+                f"  SELECT session_id FROM sessions ORDER BY touched DESC LIMIT -1 OFFSET ?) AND {idle}",
+                (self.max_sessions,),
+            )
+            conn.execute("DELETE FROM history WHERE session_id NOT IN (SELECT session_id FROM sessions)")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _write(self, session_id: str, *statements: tuple) -> None:
+        """Touch the session and run (sql, params) statements in one write transaction."""
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._touch(conn, session_id, now)
+            for sql, params in statements:
+                conn.execute(sql, params)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        self._sweep(now)
+
+    def _get(self, session_id: str, column: str):
+        row = self._conn().execute(
+            f"SELECT {column} FROM sessions WHERE session_id = ? AND touched >= ?",
+            (session_id, time.time() - self.ttl),
+        ).fetchone()
+        return row[0] if row else None
+
+    def get_client(self, session_id):
+        return self._get(session_id, "sid")
+
+    def set_client(self, session_id, sid):
+        self._write(session_id, ("UPDATE sessions SET sid = ? WHERE session_id = ?", (sid, session_id)))
+
+    def drop_client(self, sid):
+        self._conn().execute("UPDATE sessions SET sid = NULL WHERE sid = ?", (sid,))
+
+    def get_agent(self, session_id, default=None):
+        return self._get(session_id, "agent") or default
+
+    def set_agent(self, session_id, agent):
+        self._write(session_id, ("UPDATE sessions SET agent = ? WHERE session_id = ?", (agent, session_id)))
+
+    def append_history(self, session_id, entry):
+        self._write(
+            session_id,
+            ("INSERT INTO history (session_id, seq, entry) VALUES "
+             "(?, (SELECT COALESCE(MAX(seq), -1) + 1 FROM history WHERE session_id = ?), ?)",
+             (session_id, session_id, json.dumps(entry))),
+            ("DELETE FROM history WHERE session_id = ? AND "
+             "seq <= (SELECT MAX(seq) FROM history WHERE session_id = ?) - ?",
+             (session_id, session_id, self.max_history)),
+        )
+
+    def get_history(self, session_id, start=0, limit=None):
+        rows = self._conn().execute(
+            "SELECT entry FROM history WHERE session_id = ? AND seq >= ? ORDER BY seq LIMIT ?",
+            (session_id, start, -1 if limit is None else limit),
+        ).fetchall()
+        return [json.loads(entry) for (entry,) in rows]
+
+    def history_length(self, session_id):
+        row = self._conn().execute(
+            "SELECT COALESCE(MAX(seq), -1) + 1 FROM history WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        return row[0]
+
+    def history_start(self, session_id):
+        row = self._conn().execute(
+            "SELECT COALESCE(MIN(seq), 0) FROM history WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        return row[0]
+
+    def get_status(self, session_id):
+        status = self._get(session_id, "status")
+        return json.loads(status) if status else None
+
+    def update_status(self, session_id, **fields):
+        return self.update_status_if(session_id, lambda status: True, **fields)
+
+    def update_status_if(self, session_id, check, **fields):
+        now = time.time()
+        conn = self._conn()
+        # the write lock is held from the read to the update, so check-and-set is atomic across processes
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT status FROM sessions WHERE session_id = ? AND touched >= ?",
+                               (session_id, now - self.ttl)).fetchone()
+            current = json.loads(row[0]) if row and row[0] else None
+            if not check(current):
+                conn.execute("ROLLBACK")
+                return None
+            self._touch(conn, session_id, now)
+            status = {**(current or {}), **fields}
+            conn.execute("UPDATE sessions SET status = ? WHERE session_id = ?", (json.dumps(status), session_id))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        self._sweep(now)
+        return status
+
+
+def session_store_from_env() -> SessionStore:
+    """Build the backend selected by SESSION_STORE (memory | sqlite)."""
+    backend = os.getenv("SESSION_STORE", "memory").lower()
+    max_sessions = int(os.getenv("SESSION_MAX_SESSIONS", 10000))
+    ttl = float(os.getenv("SESSION_TTL", 24 * 3600))
+    max_history = int(os.getenv("SESSION_MAX_HISTORY", 1000))
+    if backend == "sqlite":
+        return SQLiteSessionStore(os.getenv("SESSION_STORE_PATH", "sessions.sqlite3"),
+                                  max_sessions=max_sessions, ttl=ttl, max_history=max_history)
+    if backend == "memory":
+        return MemorySessionStore(max_sessions=max_sessions, ttl=ttl, max_history=max_history)
+    raise ValueError(f"Unknown SESSION_STORE '{backend}' (expected memory or sqlite)")